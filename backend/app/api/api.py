@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1 import auth, journal, chat, user, article, audio, quote, home
+from app.api.v1 import auth, journal, chat, user, article, audio, quote, home, monitoring
 from app.api.v1.music import router as music_router
 
 api_router = APIRouter()
@@ -12,4 +12,5 @@ api_router.include_router(audio.router, prefix="/audio", tags=["audio"])
 api_router.include_router(quote.router, prefix="/quotes", tags=["quotes"])
 api_router.include_router(home.router, tags=["home"])
 api_router.include_router(music_router, prefix="/music", tags=["music"])
+api_router.include_router(monitoring.router, prefix="/monitoring", tags=["monitoring"])
 
@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app import crud, models, schemas
-from app.dependencies import get_db
+from app.dependencies import get_read_db
 
 router = APIRouter()
 
 @router.get("/", response_model=list[schemas.Article])
-def get_articles(db: Session = Depends(get_db)):
+def get_articles(db: Session = Depends(get_read_db)):
     return crud.article.get_multi(db)
@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app import crud, schemas
-from app.dependencies import get_db
+from app.dependencies import get_read_db
 
 router = APIRouter()
 
 @router.get("/", response_model=list[schemas.AudioTrack])
-def get_audio(db: Session = Depends(get_db)):
+def get_audio(db: Session = Depends(get_read_db)):
     return crud.audio_track.get_multi(db)
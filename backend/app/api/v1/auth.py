@@ -1,36 +1,43 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import crud, schemas
-from app.core.security import create_access_token, verify_password
-from app.dependencies import get_db
+from app.core.security import create_access_token, verify_and_update_async
+from app.dependencies import get_async_db
 
 router = APIRouter()
 
 @router.post("/register", response_model=schemas.UserPublic)
-def register(
+async def register(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_in: schemas.UserCreate,
 ):
-    user = crud.user.get_by_email(db, email=user_in.email)
+    user = await crud.user.get_by_email_async(db, email=user_in.email)
     if user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    user = crud.user.create(db, obj_in=user_in)
+    user = await crud.user.create_async(db, obj_in=user_in)
     return user
 
 @router.post("/login", response_model=schemas.Token)
-def login(
+async def login(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     login_in: schemas.UserLogin,
 ):
-    user = crud.user.get_by_email(db, email=login_in.email)
-    if not user or not verify_password(login_in.password, user.hashed_password):
+    user = await crud.user.get_by_email_async(db, email=login_in.email)
+    if user:
+        verified, new_hash = await verify_and_update_async(login_in.password, user.hashed_password)
+    else:
+        verified, new_hash = False, None
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
+    if new_hash:
+        # BCRYPT_ROUNDS berubah sejak hash ini dibuat: simpan hash baru
+        await crud.user.set_password_hash_async(db, db_obj=user, hashed_password=new_hash)
 
     access_token = create_access_token(user.id)
     return {
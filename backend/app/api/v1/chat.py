@@ -1,21 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+import json
 import structlog
 
 from app import models, schemas, crud, dependencies
+from app.core.config import settings
+from app.core.deadline import deadline_scope
+from app.core.idempotency import IdempotentRoute
+from app.db.unit_of_work import release_connection_async
 from app.models.chat import SenderType
+from app.schemas.plan import ConversationPlan
 from app.services.planner_service import PlannerService
 from app.services.generator_service import GeneratorService
 from app.services.emotion_service import EmotionService
+from app.services.chat_context_service import chat_context_cache
+from app.services.prompt_assembler import PromptAssembler
 
-router = APIRouter()
+router = APIRouter(route_class=IdempotentRoute)
 log = structlog.get_logger(__name__)
 
 
 # Di app/api/v1/chat.py
-def get_latest_journal(db: Session, user: models.User) -> str:
-    journals = crud.journal.get_multi_by_owner(
+async def get_latest_journal(db: AsyncSession, user: schemas.Principal) -> str:
+    journals = await crud.journal.get_multi_by_owner_async(
         db=db,
         owner_id=user.id,
         limit=1,
@@ -24,81 +36,152 @@ def get_latest_journal(db: Session, user: models.User) -> str:
     return journals[0].content if journals else ""
 
 
-@router.post("/", response_model=schemas.chat.ChatMessage)
-async def handle_chat_message(
-        *,
-        db: Session = Depends(dependencies.get_db),
-        chat_in: schemas.chat.ChatRequest,
-        current_user: models.User = Depends(dependencies.get_current_user),
-        planner: PlannerService = Depends(),
-        generator: GeneratorService = Depends(),
-        emotion_service: EmotionService = Depends(),
-):
-    log.info("handle_chat_message:start", user_id=current_user.id)
+@dataclass
+class ChatTurn:
+    user_message: str
+    chat_history: List[str]
+    history_formatted: List[Dict[str, str]]
+    latest_journal: str
+    user_profile: Optional[schemas.user_profile.UserProfile]
+    emotion_label: str
 
-    # Ambil memori pengguna (profil psikologis jangka panjang)
-    user_profile = crud.user_profile.get_by_user_id(db, user_id=current_user.id)
 
-    # Ambil jurnal terbaru (konteks jangka pendek emosional)
-    latest_journal = get_latest_journal(db, user=current_user)
+async def _prepare_turn(
+        db: AsyncSession,
+        chat_in: schemas.chat.ChatRequest,
+        current_user: schemas.Principal,
+        emotion_service: EmotionService,
+        assembler: PromptAssembler,
+) -> ChatTurn:
+    """Simpan pesan pengguna lalu kumpulkan konteks untuk giliran ini."""
+    # Snapshot konteks dari cache: profil psikologis jangka panjang,
+    # jurnal terbaru dan riwayat pesan (tanpa query bila cache hangat)
+    snapshot = await chat_context_cache.get_snapshot_async(db, current_user.id)
+    user_profile = snapshot.profile
+    latest_journal = assembler.truncate_journal(snapshot.latest_journal)
 
     # Deteksi emosi dari pesan terbaru
     emotion_label = emotion_service.detect_emotion(chat_in.message)
 
-    # Simpan pesan USER ke database
+    # Simpan pesan USER ke database (snapshot ikut diperbarui oleh CRUD)
     user_message_obj = schemas.chat.ChatMessageCreate(
         content=chat_in.message,
         sender_type=SenderType.USER,
         emotion=emotion_label,
     )
-    crud.chat_message.create_with_owner(
+    await crud.chat_message.create_with_owner_async(
         db=db,
         obj_in=user_message_obj,
         owner_id=current_user.id
     )
 
-    # Ambil 10 riwayat pesan terakhir (dalam urutan kronologis)
-    history_db = crud.chat_message.get_multi_by_owner(
-        db=db,
-        owner_id=current_user.id,
-        limit=10
+    # Riwayat pesan terakhir (kronologis), termasuk pesan yang baru disimpan
+    snapshot = await chat_context_cache.get_snapshot_async(db, current_user.id)
+
+    # Pangkas riwayat sesuai anggaran token model generator; giliran yang
+    # keluar dari prompt dilipat ke ringkasan bergulir (sekali per pesan)
+    kept, dropped = assembler.fit_history(
+        snapshot.messages,
+        assembler.history_budget(assembler.settings.GENERATOR_MODEL_NAME),
     )
-    history_db_reversed = history_db[::-1]  # kronologis dari paling awal ke akhir
+    summary = snapshot.summary
+    newly_dropped = [m for m in dropped if m.id > snapshot.summary_last_message_id]
+    if newly_dropped:
+        summary = assembler.update_summary(summary, newly_dropped)
+        await crud.conversation_summary.upsert_async(
+            db,
+            user_id=current_user.id,
+            summary=summary,
+            last_message_id=newly_dropped[-1].id,
+        )
 
-    chat_history = [msg.content for msg in history_db_reversed]
-    history_formatted = [
-        {"role": msg.sender_type.value, "content": msg.content}
-        for msg in history_db_reversed
-    ]
+    # Jangan tahan koneksi DB selama planner/generator menunggu LLM
+    await release_connection_async(db)
 
-    # Perencanaan strategi komunikasi
-    conversation_plan = await planner.get_plan(
+    return ChatTurn(
         user_message=chat_in.message,
-        chat_history=chat_history,
+        chat_history=[msg.content for msg in kept],
+        history_formatted=assembler.format_history(kept, summary),
         latest_journal=latest_journal,
-        user_profile=user_profile,  # bisa None
+        user_profile=user_profile,
         emotion_label=emotion_label,
     )
 
-    # Hasilkan respons AI
-    final_response = await generator.generate_response(
-        plan=conversation_plan,
-        history=history_formatted,
-        emotion=emotion_label,
+
+async def _plan_turn(planner: PlannerService, turn: ChatTurn) -> ConversationPlan:
+    # Perencanaan strategi komunikasi
+    return await planner.get_plan(
+        user_message=turn.user_message,
+        chat_history=turn.chat_history,
+        latest_journal=turn.latest_journal,
+        user_profile=turn.user_profile,  # bisa None
+        emotion_label=turn.emotion_label,
     )
 
-    # Simpan pesan AI ke database
+
+async def _save_ai_message(
+        db: AsyncSession,
+        current_user: schemas.Principal,
+        content: str,
+        conversation_plan: ConversationPlan,
+) -> models.ChatMessage:
     ai_message_obj = schemas.chat.ChatMessageCreate(
-        content=final_response,
+        content=content,
         sender_type=SenderType.AI,
         ai_technique=conversation_plan.technique.value,
     )
-    ai_message_db = crud.chat_message.create_with_owner(
+    return await crud.chat_message.create_with_owner_async(
         db=db,
         obj_in=ai_message_obj,
         owner_id=current_user.id
     )
 
+
+def _sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+@router.post("/", response_model=schemas.chat.ChatMessage)
+async def handle_chat_message(
+        *,
+        db: AsyncSession = Depends(dependencies.get_async_db),
+        chat_in: schemas.chat.ChatRequest,
+        current_user: schemas.Principal = Depends(dependencies.get_current_user),
+        planner: PlannerService = Depends(),
+        generator: GeneratorService = Depends(),
+        emotion_service: EmotionService = Depends(),
+        assembler: PromptAssembler = Depends(),
+):
+    log.info("handle_chat_message:start", user_id=current_user.id)
+
+    # Semua tahap (planner, generator) berbagi satu anggaran waktu; bila habis,
+    # service mengembalikan fallback sehingga respons tetap dalam SLO
+    with deadline_scope(settings.CHAT_REQUEST_DEADLINE_SECONDS):
+        turn = await _prepare_turn(
+            db, chat_in, current_user, emotion_service, assembler
+        )
+
+        if settings.CHAT_COMBINED_PLAN_AND_GENERATE:
+            # Satu round trip: teknik + balasan dari satu panggilan terstruktur
+            conversation_plan, final_response = await generator.plan_and_generate(
+                history=turn.history_formatted,
+                emotion=turn.emotion_label,
+                latest_journal=turn.latest_journal,
+                user_profile=turn.user_profile,
+            )
+        else:
+            conversation_plan = await _plan_turn(planner, turn)
+
+            # Hasilkan respons AI
+            final_response = await generator.generate_response(
+                plan=conversation_plan,
+                history=turn.history_formatted,
+                emotion=turn.emotion_label,
+            )
+
+    # Simpan pesan AI ke database
+    ai_message_db = await _save_ai_message(db, current_user, final_response, conversation_plan)
+
     log.info(
         "handle_chat_message:success",
         user_id=current_user.id,
@@ -108,13 +191,97 @@ async def handle_chat_message(
     return ai_message_db
 
 
+@router.post("/stream")
+async def stream_chat_message(
+        *,
+        db: AsyncSession = Depends(dependencies.get_async_db),
+        chat_in: schemas.chat.ChatRequest,
+        current_user: schemas.Principal = Depends(dependencies.get_current_user),
+        planner: PlannerService = Depends(),
+        generator: GeneratorService = Depends(),
+        emotion_service: EmotionService = Depends(),
+        assembler: PromptAssembler = Depends(),
+):
+    """
+    Varian streaming (Server-Sent Events) dari ``handle_chat_message``.
+    Mengirim event ``token`` untuk setiap potongan balasan, lalu satu event
+    ``done`` berisi ``ChatMessage`` yang sudah tersimpan.
+    """
+    log.info("stream_chat_message:start", user_id=current_user.id)
+
+    with deadline_scope(settings.CHAT_REQUEST_DEADLINE_SECONDS) as request_deadline:
+        turn = await _prepare_turn(
+            db, chat_in, current_user, emotion_service, assembler
+        )
+        # Mode gabungan tidak dipakai di sini: balasan JSON terstruktur tidak bisa
+        # diteruskan token demi token, jadi streaming tetap planner -> generator.
+        conversation_plan = await _plan_turn(planner, turn)
+
+    async def event_stream() -> AsyncIterator[str]:
+        tokens: List[str] = []
+        # Body dikirim setelah endpoint selesai, jadi deadline dipasang ulang
+        with deadline_scope(at=request_deadline):
+            async for token in generator.stream_response(
+                plan=conversation_plan,
+                history=turn.history_formatted,
+                emotion=turn.emotion_label,
+            ):
+                tokens.append(token)
+                yield _sse_event("token", {"content": token})
+
+        ai_message_db = await _save_ai_message(
+            db, current_user, "".join(tokens).strip(), conversation_plan
+        )
+        log.info(
+            "stream_chat_message:success",
+            user_id=current_user.id,
+            ai_technique=conversation_plan.technique.value,
+        )
+        yield _sse_event("done", schemas.chat.ChatMessage.model_validate(ai_message_db))
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Matikan buffering nginx agar token langsung diteruskan ke klien
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@router.get("/", response_model=List[schemas.chat.ChatMessage])
+async def read_chat_history(
+        *,
+        response: Response,
+        db: AsyncSession = Depends(dependencies.get_user_async_read_db),
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        current_user: schemas.Principal = Depends(dependencies.get_current_user),
+):
+    """
+    Riwayat chat, pesan terbaru dulu. Kirim nilai header ``X-Next-Cursor``
+    sebagai ``cursor`` untuk halaman berikutnya (lebih lama).
+    """
+    try:
+        messages, next_cursor = await crud.chat_message.get_page_by_owner_async(
+            db, owner_id=current_user.id, limit=min(limit, 100), cursor=cursor
+        )
+    except crud.InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Cursor tidak valid.")
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return messages
+
+
 @router.patch("/{chat_id}/flag", response_model=schemas.chat.ChatMessage)
 def flag_chat_message(
     *,
     chat_id: int,
     flag: schemas.chat.ChatFlagUpdate,
     db: Session = Depends(dependencies.get_db),
-    current_user: models.User = Depends(dependencies.get_current_user),
+    current_user: schemas.Principal = Depends(dependencies.get_current_user),
 ):
     msg = crud.chat_message.set_flag(
         db=db,
@@ -132,7 +299,7 @@ def delete_chat_message(
     *,
     chat_id: int,
     db: Session = Depends(dependencies.get_db),
-    current_user: models.User = Depends(dependencies.get_current_user),
+    current_user: schemas.Principal = Depends(dependencies.get_current_user),
 ):
     msg = crud.chat_message.remove(
         db=db,
@@ -1,16 +1,17 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from app import crud, schemas
-from app.dependencies import get_db
+from app.core.config import settings
+from app.dependencies import get_async_session_factory
+from app.services.home_feed_service import home_feed_cache
 
 router = APIRouter()
 
-@router.get("/home-feed")
-def get_home_feed(db: Session = Depends(get_db)):
-    """Return combined recent content for the home screen."""
-    articles = crud.article.get_multi(db)
-    audio_tracks = crud.audio_track.get_multi(db)
-    quotes = crud.motivational_quote.get_multi(db)
+
+async def _build_home_feed(db: AsyncSession) -> list:
+    articles = await crud.article.get_multi_async(db)
+    audio_tracks = await crud.audio_track.get_multi_async(db)
+    quotes = await crud.motivational_quote.get_multi_async(db)
 
     items = []
     for obj in articles:
@@ -21,4 +22,32 @@ def get_home_feed(db: Session = Depends(get_db)):
         items.append({"type": "quote", "data": schemas.MotivationalQuote.model_validate(obj)})
 
     items.sort(key=lambda x: x["data"].id, reverse=True)
-    return items
+    return [{"type": item["type"], "data": item["data"].model_dump(mode="json")} for item in items]
+
+
+@router.get("/home-feed")
+async def get_home_feed(
+    request: Request,
+    session_factory: async_sessionmaker = Depends(get_async_session_factory),
+):
+    """Return combined recent content for the home screen."""
+    # Dirakit dari primary, bukan replica: versi dinaikkan saat commit di
+    # primary, dan replica yang tertinggal bisa mengisi versi baru dengan data
+    # lama yang lalu tersimpan selama HOME_FEED_CACHE_TTL. Rebuild hanya
+    # sekali per versi sehingga bebannya kecil.
+    # Rebuild berjalan di task milik cache dengan session sendiri: tetap
+    # selesai untuk penunggu lain meski permintaan ini dibatalkan.
+    async def build() -> list:
+        async with session_factory() as db:
+            return await _build_home_feed(db)
+
+    # Feed dirakit sekali per versi konten; klien dengan ETag yang sama dapat 304
+    body, etag = await home_feed_cache.get_or_build_async(build)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.HOME_FEED_MAX_AGE}",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,13 +1,16 @@
 # backend/app/api/v1/journal.py (Versi Perbaikan)
 
-from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException, Response
 from sqlalchemy.orm import Session
-from app import crud, models, schemas
-from app.dependencies import get_db, get_current_user
-from app.tasks import analyze_profile_task
+from app import crud, schemas
+from app.core.idempotency import IdempotentRoute
+from app.dependencies import get_db, get_current_user, get_user_read_db
+from app.tasks import enqueue_profile_analysis
 import structlog
 
-router = APIRouter()
+router = APIRouter(route_class=IdempotentRoute)
 log = structlog.get_logger(__name__)
 
 
@@ -16,7 +19,7 @@ def create_journal(
         *,
         db: Session = Depends(get_db),
         journal_in: schemas.JournalCreate,
-        current_user: models.User = Depends(get_current_user),
+        current_user: schemas.Principal = Depends(get_current_user),
         background_tasks: BackgroundTasks,
 ):
     if not journal_in.content.strip():
@@ -24,31 +27,41 @@ def create_journal(
 
     journal = crud.journal.create_with_owner(db=db, obj_in=journal_in, owner_id=current_user.id)
 
-    log.info(
-        "Jurnal dibuat, penjadwalan analisis ditangguhkan sementara",
-        user_id=current_user.id,
-        journal_id=journal.id,
-    )
+    # Setelah respons (dan commit) terkirim; rentetan jurnal dari pengguna yang
+    # sama dilebur menjadi satu analisis profil
+    background_tasks.add_task(enqueue_profile_analysis, current_user.id)
+
+    log.info("Jurnal dibuat", user_id=current_user.id, journal_id=journal.id)
 
     return journal
 
 @router.get("/", response_model=list[schemas.JournalInDB])
 def read_journals(
-        db: Session = Depends(get_db),
+        response: Response,
+        db: Session = Depends(get_user_read_db),
         skip: int = 0,
         limit: int = 100,
-        current_user: models.User = Depends(get_current_user),
+        cursor: Optional[str] = None,
+        current_user: schemas.Principal = Depends(get_current_user),
 ):
+    """
+    Jurnal terbaru dulu. Halaman berikutnya diambil dengan mengirim nilai
+    header ``X-Next-Cursor`` sebagai ``cursor``; header tidak dikirim bila
+    sudah halaman terakhir. ``skip`` hanya untuk klien lama (offset).
+    """
     limit = min(limit, 100)
-    journals = crud.journal.get_multi_by_owner(
-        db, owner_id=current_user.id, skip=skip, limit=limit, order_by="created_at desc"
-    )
+    if skip and not cursor:
+        return crud.journal.get_multi_by_owner(
+            db, owner_id=current_user.id, skip=skip, limit=limit, order_by="created_at desc"
+        )
 
-    # --- PERBAIKAN DI SINI ---
-    # Secara eksplisit menangani kasus di mana tidak ada jurnal yang ditemukan
-    # dan langsung mengembalikan daftar kosong untuk mencegah error lebih lanjut.
-    if not journals:
-        return []
+    try:
+        journals, next_cursor = crud.journal.get_page_by_owner(
+            db, owner_id=current_user.id, limit=limit, cursor=cursor
+        )
+    except crud.InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Cursor tidak valid.")
 
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return journals
-
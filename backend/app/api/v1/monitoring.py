@@ -0,0 +1,25 @@
+import os
+
+from fastapi import APIRouter, Depends
+
+from app.db.pool import pool_stats
+from app.db.replica import replica_enabled
+from app.db.session import async_engine, async_replica_engine, engine, replica_engine
+from app.dependencies import verify_monitoring_token
+
+# Tidak bergantung pada nginx: port API bisa dijangkau langsung
+router = APIRouter(dependencies=[Depends(verify_monitoring_token)])
+
+
+@router.get("/db-pool")
+def read_db_pool_stats():
+    """Metrik connection pool worker ini (setiap worker gunicorn punya pool sendiri)."""
+    stats = {
+        "pid": os.getpid(),
+        "sync": pool_stats(engine),
+        "async": pool_stats(async_engine.sync_engine),
+    }
+    if replica_enabled():
+        stats["replica_sync"] = pool_stats(replica_engine)
+        stats["replica_async"] = pool_stats(async_replica_engine.sync_engine)
+    return stats
@@ -1,13 +1,13 @@
 # backend/app/api/v1/music.py (Versi Final dengan Logika VideoID)
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from spotipy import Spotify
 from spotipy.oauth2 import SpotifyClientCredentials
 import structlog
 import re
 
-from app import crud, models, schemas, dependencies
+from app import crud, schemas, dependencies
 from app.core.config import settings
 from app.services.music_keyword_service import MusicKeywordService
 
@@ -59,7 +59,7 @@ def _process_search_results(search_results: dict) -> list[schemas.AudioTrack]:
 @router.get("/", response_model=list[schemas.AudioTrack])
 def search_music(
     mood: str = Query(..., min_length=1),
-    current_user: models.User = Depends(dependencies.get_current_user)
+    current_user: schemas.Principal = Depends(dependencies.get_current_user)
 ):
     if not mood:
         raise HTTPException(status_code=400, detail="Mood parameter is required")
@@ -80,11 +80,11 @@ def search_music(
 @router.get("/recommend", response_model=list[schemas.AudioTrack])
 async def recommend_music(
     *,
-    db: Session = Depends(dependencies.get_db),
-    current_user: models.User = Depends(dependencies.get_current_user),
+    db: AsyncSession = Depends(dependencies.get_async_db),
+    current_user: schemas.Principal = Depends(dependencies.get_current_user),
     keyword_service: MusicKeywordService = Depends(),
 ):
-    journals = crud.journal.get_multi_by_owner(
+    journals = await crud.journal.get_multi_by_owner_async(
         db=db, owner_id=current_user.id, limit=5, order_by="created_at desc"
     )
 
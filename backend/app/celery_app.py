@@ -2,6 +2,9 @@
 
 import os
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
+from kombu import Queue
+from app.core.config import settings
 
 # Ambil URL Redis dari environment variable
 redis_url = f"redis://{os.environ.get('REDIS_HOST', 'localhost')}:{os.environ.get('REDIS_PORT', '6379')}/0"
@@ -12,4 +15,70 @@ celery_app = Celery(
     broker=redis_url,
     backend=redis_url,
     include=["app.tasks"] # Tunjuk ke file tempat task didefinisikan
-)
\ No newline at end of file
+)
+
+# Antrian terpisah agar task panjang tidak menahan task pendek di belakangnya:
+# "analysis" untuk analisis profil dan skor sentimen (CPU, concurrency tidak
+# melebihi jumlah core). Task yang menunggu I/O (mis. panggilan LLM) kelak
+# mendapat antrian dan worker sendiri; saat ini semua panggilan LLM ada di
+# jalur permintaan. Worker di docker-compose memilih antriannya lewat -Q.
+QUEUE_DEFAULT = "default"
+QUEUE_ANALYSIS = "analysis"
+
+celery_app.conf.update(
+    task_queues=[Queue(QUEUE_DEFAULT), Queue(QUEUE_ANALYSIS)],
+    task_default_queue=QUEUE_DEFAULT,
+    task_routes={
+        "app.tasks.analyze_*": {"queue": QUEUE_ANALYSIS},
+        "app.tasks.schedule_profile_analysis": {"queue": QUEUE_ANALYSIS},
+        "app.tasks.score_*": {"queue": QUEUE_ANALYSIS},
+    },
+    # Ambil satu task per proses: task lama tidak menimbun antrian lokal
+    # sementara proses lain menganggur. acks_late + reject_on_worker_lost:
+    # task diulang bila worker mati di tengah jalan (task harus idempoten).
+    worker_prefetch_multiplier=settings.CELERY_PREFETCH_MULTIPLIER,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    # Semua task saat ini fire-and-forget; hasil tidak disimpan di Redis.
+    # Task yang butuh hasil harus eksplisit ignore_result=False.
+    task_ignore_result=True,
+    result_expires=settings.CELERY_RESULT_EXPIRES,
+    task_serializer="json",
+    accept_content=["json"],
+)
+
+
+@worker_init.connect
+def _register_session_events(**kwargs):
+    # Sebelum fork: semua proses anak mewarisi listener session
+    from app.events import register_session_events
+
+    register_session_events()
+
+
+@worker_process_init.connect
+def _reset_db_pools(**kwargs):
+    # Proses anak prefork mewarisi koneksi pool dari induk; jangan dipakai
+    # bersama. dispose(close=False) membuang referensinya tanpa menutup
+    # socket milik induk, lalu setiap anak membuka pool sendiri yang dipakai
+    # ulang oleh semua task di proses itu.
+    from app.db.session import dispose_engines_after_fork
+
+    dispose_engines_after_fork()
+
+
+# Jadwal Celery beat: batch analisis profil untuk pengguna yang jurnalnya
+# berubah, dan skor sentimen jurnal baru per micro-batch
+celery_app.conf.beat_schedule = {
+    "analyze-stale-profiles": {
+        "task": "app.tasks.schedule_profile_analysis",
+        "schedule": settings.PROFILE_ANALYSIS_INTERVAL_SECONDS,
+        "options": {"queue": QUEUE_ANALYSIS},
+    },
+    "score-journal-sentiment": {
+        "task": "app.tasks.score_journal_sentiment_task",
+        "schedule": settings.SENTIMENT_SCORING_INTERVAL_SECONDS,
+        # Run yang tertinggal tidak perlu menumpuk: run berikutnya menyusul
+        "options": {"queue": QUEUE_ANALYSIS, "expires": settings.SENTIMENT_SCORING_INTERVAL_SECONDS},
+    },
+}
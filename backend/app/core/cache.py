@@ -0,0 +1,301 @@
+"""
+Cache dua tingkat: LRU in-process (per worker) + Redis opsional yang dipakai
+bersama oleh semua worker gunicorn. Redis bersifat *fail-open*: bila tidak
+dikonfigurasi atau sedang bermasalah, hanya tier lokal yang dipakai.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+import redis
+import redis.asyncio as aioredis
+import structlog
+
+from app.core.config import settings
+
+log = structlog.get_logger(__name__)
+
+_MISSING = object()
+
+# Percobaan ulang WATCH/MULTI sebelum ``update`` menyerah dan membuang entri
+UPDATE_RETRIES = 5
+
+
+class LRUCache:
+    """LRU thread-safe dengan TTL per entri."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires_at, value = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+@lru_cache(maxsize=1)
+def get_redis() -> Optional[redis.Redis]:
+    """Client Redis sinkron bersama, atau None bila REDIS_URL tidak diset."""
+    if not settings.REDIS_URL:
+        return None
+    return redis.Redis.from_url(
+        settings.REDIS_URL,
+        decode_responses=True,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_async_redis() -> Optional[aioredis.Redis]:
+    """Client Redis asyncio bersama, atau None bila REDIS_URL tidak diset."""
+    if not settings.REDIS_URL:
+        return None
+    return aioredis.Redis.from_url(
+        settings.REDIS_URL,
+        decode_responses=True,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    )
+
+
+class TieredCache:
+    """
+    Cache JSON dengan namespace. ``local_ttl`` menentukan berapa lama tier
+    lokal boleh dipercaya sebelum membaca ulang Redis (worker lain mungkin
+    sudah menulis versi yang lebih baru).
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        maxsize: int = 1024,
+        ttl: float = 300,
+        local_ttl: Optional[float] = None,
+        redis_client_factory: Callable[[], Optional[redis.Redis]] = get_redis,
+        async_redis_client_factory: Callable[[], Optional[aioredis.Redis]] = get_async_redis,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.local = LRUCache(maxsize=maxsize)
+        self._redis_factory = redis_client_factory
+        self._async_redis_factory = async_redis_client_factory
+        # Baca-ubah-tulis tier lokal (tanpa Redis) dari beberapa thread
+        self._update_lock = threading.Lock()
+
+    def _key(self, key: Any) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _local_ttl(self, has_redis: bool) -> float:
+        if has_redis and self.local_ttl is not None:
+            return min(self.local_ttl, self.ttl)
+        return self.ttl
+
+    @property
+    def redis(self) -> Optional[redis.Redis]:
+        return self._redis_factory()
+
+    @property
+    def async_redis(self) -> Optional[aioredis.Redis]:
+        return self._async_redis_factory()
+
+    # --- sinkron -----------------------------------------------------------
+
+    def get(self, key: Any, *, local: bool = True) -> Any:
+        full_key = self._key(key)
+        if local:
+            value = self.local.get(full_key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+        client = self.redis
+        if client is None:
+            return None
+        try:
+            raw = client.get(full_key)
+        except redis.RedisError as e:
+            log.warning("cache_redis_error", op="get", namespace=self.namespace, error=str(e))
+            return None
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        self.local.set(full_key, value, ttl=self._local_ttl(True))
+        return value
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None) -> None:
+        full_key = self._key(key)
+        ttl = ttl or self.ttl
+        client = self.redis
+        self.local.set(full_key, value, ttl=min(ttl, self._local_ttl(client is not None)))
+        if client is None:
+            return
+        try:
+            client.set(full_key, json.dumps(value), ex=int(ttl))
+        except redis.RedisError as e:
+            log.warning("cache_redis_error", op="set", namespace=self.namespace, error=str(e))
+
+    def delete(self, key: Any) -> None:
+        full_key = self._key(key)
+        self.local.delete(full_key)
+        client = self.redis
+        if client is None:
+            return
+        try:
+            client.delete(full_key)
+        except redis.RedisError as e:
+            log.warning("cache_redis_error", op="delete", namespace=self.namespace, error=str(e))
+
+    def _update_local(self, full_key: str, fn: Callable[[Any], Any], ttl: float) -> None:
+        with self._update_lock:
+            value = fn(self.local.get(full_key))
+            if value is not None:
+                self.local.set(full_key, value, ttl=ttl)
+
+    def update(self, key: Any, fn: Callable[[Any], Any], ttl: Optional[float] = None) -> None:
+        """
+        Baca-ubah-tulis atomik: ``fn(nilai saat ini atau None)`` mengembalikan
+        nilai baru, atau None untuk tidak menulis apa pun. Di Redis memakai
+        WATCH/MULTI (diulang bila kunci diubah worker lain di tengah jalan);
+        bila tetap berebut atau Redis bermasalah entri dibuang sehingga dibaca
+        ulang dari sumbernya, bukan ditimpa dengan versi yang kehilangan tulisan.
+        """
+        full_key = self._key(key)
+        ttl = ttl or self.ttl
+        client = self.redis
+        if client is None:
+            self._update_local(full_key, fn, ttl)
+            return
+        try:
+            with client.pipeline() as pipe:
+                for _ in range(UPDATE_RETRIES):
+                    try:
+                        pipe.watch(full_key)
+                        raw = pipe.get(full_key)
+                        value = fn(None if raw is None else json.loads(raw))
+                        if value is None:
+                            self.local.delete(full_key)
+                            return
+                        pipe.multi()
+                        pipe.set(full_key, json.dumps(value), ex=int(ttl))
+                        pipe.execute()
+                        self.local.set(full_key, value, ttl=min(ttl, self._local_ttl(True)))
+                        return
+                    except redis.WatchError:
+                        continue
+            log.warning("cache_update_contended", namespace=self.namespace)
+        except redis.RedisError as e:
+            log.warning("cache_redis_error", op="update", namespace=self.namespace, error=str(e))
+        self.delete(key)
+
+    # --- async -------------------------------------------------------------
+
+    async def get_async(self, key: Any, *, local: bool = True) -> Any:
+        full_key = self._key(key)
+        if local:
+            value = self.local.get(full_key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+        client = self.async_redis
+        if client is None:
+            return None
+        try:
+            raw = await client.get(full_key)
+        except redis.RedisError as e:
+            log.warning("cache_redis_error", op="get", namespace=self.namespace, error=str(e))
+            return None
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        self.local.set(full_key, value, ttl=self._local_ttl(True))
+        return value
+
+    async def set_async(self, key: Any, value: Any, ttl: Optional[float] = None) -> None:
+        full_key = self._key(key)
+        ttl = ttl or self.ttl
+        client = self.async_redis
+        self.local.set(full_key, value, ttl=min(ttl, self._local_ttl(client is not None)))
+        if client is None:
+            return
+        try:
+            await client.set(full_key, json.dumps(value), ex=int(ttl))
+        except redis.RedisError as e:
+            log.warning("cache_redis_error", op="set", namespace=self.namespace, error=str(e))
+
+    async def delete_async(self, key: Any) -> None:
+        full_key = self._key(key)
+        self.local.delete(full_key)
+        client = self.async_redis
+        if client is None:
+            return
+        try:
+            await client.delete(full_key)
+        except redis.RedisError as e:
+            log.warning("cache_redis_error", op="delete", namespace=self.namespace, error=str(e))
+
+    async def update_async(self, key: Any, fn: Callable[[Any], Any], ttl: Optional[float] = None) -> None:
+        full_key = self._key(key)
+        ttl = ttl or self.ttl
+        client = self.async_redis
+        if client is None:
+            self._update_local(full_key, fn, ttl)
+            return
+        try:
+            async with client.pipeline() as pipe:
+                for _ in range(UPDATE_RETRIES):
+                    try:
+                        await pipe.watch(full_key)
+                        raw = await pipe.get(full_key)
+                        value = fn(None if raw is None else json.loads(raw))
+                        if value is None:
+                            self.local.delete(full_key)
+                            return
+                        pipe.multi()
+                        pipe.set(full_key, json.dumps(value), ex=int(ttl))
+                        await pipe.execute()
+                        self.local.set(full_key, value, ttl=min(ttl, self._local_ttl(True)))
+                        return
+                    except redis.WatchError:
+                        continue
+            log.warning("cache_update_contended", namespace=self.namespace)
+        except redis.RedisError as e:
+            log.warning("cache_redis_error", op="update", namespace=self.namespace, error=str(e))
+        await self.delete_async(key)
+
+    def clear_local(self) -> None:
+        self.local.clear()
@@ -3,16 +3,143 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     DATABASE_URL: str = os.environ.get("DATABASE_URL", "sqlite:///./test.db")
+    # Optional override; derived from DATABASE_URL (aiosqlite/asyncpg) when unset
+    ASYNC_DATABASE_URL: str | None = None
+    # Replika baca opsional. Bacaan pengguna tetap ke primary selama
+    # READ_YOUR_WRITES_SECONDS setelah ia menulis (lag replikasi).
+    DATABASE_REPLICA_URL: str | None = None
+    ASYNC_DATABASE_REPLICA_URL: str | None = None
+    READ_YOUR_WRITES_SECONDS: int = 5
+
+    # Connection pool (Postgres). Setiap worker gunicorn punya dua engine (sync
+    # dan async) dengan pool sendiri. Bila DB_MAX_CONNECTIONS diisi, ukuran pool
+    # diturunkan dari anggaran itu dibagi WEB_CONCURRENCY x 2 engine, tanpa
+    # overflow, agar total koneksi tidak melebihi max_connections server.
+    WEB_CONCURRENCY: int = 4
+    DB_MAX_CONNECTIONS: int | None = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: float = 10.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Batas waktu per statement di server (ms); 0 = tanpa batas
+    DB_STATEMENT_TIMEOUT_MS: int = 15000
+    # Lama SQLite menunggu lock tulis sebelum "database is locked" (detik)
+    DB_SQLITE_BUSY_TIMEOUT: float = 15.0
     SECRET_KEY: str = os.environ.get("SECRET_KEY", "supersecretkey")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    # Cost bcrypt; hash lama dengan cost lain di-rehash saat login berhasil
+    BCRYPT_ROUNDS: int = 12
+    # Proses khusus hashing password per worker (terpisah dari threadpool)
+    PASSWORD_HASH_WORKERS: int = 2
+    # Cache principal untuk get_current_user (detik); dibuang saat user berubah
+    AUTH_CACHE_TTL: int = 60
+    AUTH_CACHE_LOCAL_TTL: float = 5.0
+    AUTH_CACHE_SIZE: int = 10000
+    # Token bersama untuk /api/v1/monitoring (header X-Monitoring-Token);
+    # tanpa token endpoint monitoring selalu ditolak
+    MONITORING_TOKEN: str | None = None
 
     # API keys and model configuration for the AI chat features
     OPENROUTER_API_KEY: str | None = None
     PLANNER_MODEL_NAME: str = "deepseek/deepseek-chat-v3-0324"
     GENERATOR_MODEL_NAME: str = "deepseek/deepseek-chat-v3-0324"
+    # "llm": selalu panggil planner LLM, "hybrid": classifier lokal dulu dan
+    # LLM hanya bila confidence < threshold, "local": tanpa LLM planner
+    PLANNER_MODE: str = "llm"
+    PLANNER_LOCAL_CONFIDENCE_THRESHOLD: float = 0.75
+    # Satu panggilan LLM terstruktur untuk memilih teknik + menulis balasan
+    CHAT_COMBINED_PLAN_AND_GENERATE: bool = False
+    # Deadline end-to-end per permintaan chat (detik). Planner LLM dilewati bila
+    # sisa anggaran < PLANNER_MIN_BUDGET_SECONDS, dan harus menyisakan
+    # GENERATOR_RESERVED_SECONDS untuk generator.
+    CHAT_REQUEST_DEADLINE_SECONDS: float = 15.0
+    PLANNER_MIN_BUDGET_SECONDS: float = 6.0
+    GENERATOR_RESERVED_SECONDS: float = 5.0
+    OPENROUTER_BASE_URL: str = "https://openrouter.ai/api/v1"
+
+    # Shared OpenRouter HTTP client (connection pool, keep-alive, HTTP/2)
+    OPENROUTER_HTTP2: bool = True
+    OPENROUTER_MAX_CONNECTIONS: int = 100
+    OPENROUTER_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPENROUTER_KEEPALIVE_EXPIRY: float = 60.0
+    OPENROUTER_CONNECT_TIMEOUT: float = 5.0
+    OPENROUTER_TIMEOUT: float = 20.0
+
+    # Ketahanan panggilan LLM: model alternatif (berurutan) bila model utama
+    # gagal, retry ber-jitter, hedging setelah persentil latensi, circuit breaker
+    PLANNER_FALLBACK_MODELS: list[str] = []
+    GENERATOR_FALLBACK_MODELS: list[str] = []
+    LLM_MAX_RETRIES: int = 2
+    LLM_RETRY_BASE_DELAY: float = 0.25
+    LLM_RETRY_MAX_DELAY: float = 2.0
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    # Dipakai sampai sampel latensi cukup; None = jangan hedging sebelum itu
+    LLM_HEDGE_DEFAULT_DELAY: float | None = 8.0
+    LLM_LATENCY_WINDOW: int = 200
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    LLM_CIRCUIT_RESET_TIMEOUT: float = 30.0
     APP_SITE_URL: str = "https://bizmark.id"
     APP_NAME: str = "Dear Diary"
+    # Redis untuk cache bersama antar worker (opsional, cache lokal tetap jalan tanpa ini)
+    REDIS_URL: str | None = None
+    REDIS_SOCKET_TIMEOUT: float = 0.5
+
+    # Idempotency-Key untuk POST chat/jurnal: lama respons disimpan, batas
+    # kunci "sedang diproses", dan lama duplikat menunggu eksekusi pertama
+    IDEMPOTENCY_TTL: int = 86400
+    IDEMPOTENCY_LOCK_TTL: int = 60
+    IDEMPOTENCY_WAIT_SECONDS: float = 30.0
+    IDEMPOTENCY_POLL_INTERVAL: float = 0.1
+    IDEMPOTENCY_LOCAL_CACHE_SIZE: int = 4096
+
+    # Feed beranda: cache feed yang sudah dirakit (server) dan max-age untuk
+    # klien/CDN; versi dinaikkan setiap konten berubah
+    HOME_FEED_CACHE_TTL: int = 3600
+    HOME_FEED_LOCAL_TTL: float = 2.0
+    HOME_FEED_MAX_AGE: int = 60
+
+    # Batch analisis profil (Celery beat): interval, ukuran chunk per task dan
+    # jumlah chunk maksimum per run (membatasi beban worker)
+    PROFILE_ANALYSIS_INTERVAL_SECONDS: int = 900
+    PROFILE_ANALYSIS_CHUNK_SIZE: int = 200
+    PROFILE_ANALYSIS_MAX_CHUNKS: int = 20
+    # Pengguna yang sudah dikirim ke worker tidak dikirim lagi oleh run
+    # berikutnya selama jendela ini (kecuali analisisnya sudah selesai)
+    PROFILE_ANALYSIS_CLAIM_SECONDS: int = 1800
+    # Worker Celery: task diambil satu per satu per proses; hasil task yang
+    # memang disimpan kedaluwarsa setelah CELERY_RESULT_EXPIRES detik
+    CELERY_PREFETCH_MULTIPLIER: int = 1
+    CELERY_RESULT_EXPIRES: int = 3600
+    # Analisis per pengguna setelah menulis jurnal: ditunda selama jendela ini
+    # dan dilebur (paling banyak satu tertunda per pengguna, butuh Redis)
+    PROFILE_ANALYSIS_DEBOUNCE_SECONDS: int = 60
+    PROFILE_ANALYSIS_PENDING_GRACE_SECONDS: int = 300
+    # Skor sentimen jurnal baru (Celery beat): interval, jurnal per batch (satu
+    # UPDATE massal) dan batch maksimum per run
+    SENTIMENT_SCORING_INTERVAL_SECONDS: int = 60
+    SENTIMENT_BATCH_SIZE: int = 500
+    SENTIMENT_MAX_BATCHES: int = 20
+
+    # Snapshot konteks chat per pengguna (profil, jurnal terbaru, pesan terakhir)
+    CHAT_CONTEXT_WINDOW: int = 20
+    CHAT_CONTEXT_CACHE_SIZE: int = 2048
+    CHAT_CONTEXT_CACHE_TTL: int = 1800
+    CHAT_CONTEXT_LOCAL_TTL: float = 2.0
+
+    # Perakitan prompt: anggaran token per model (total prompt), sisanya
+    # memakai PROMPT_DEFAULT_TOKEN_BUDGET. Pesan di luar anggaran atau di luar
+    # PROMPT_HISTORY_MAX_MESSAGES dilipat ke ringkasan bergulir per pengguna.
+    PROMPT_TOKEN_BUDGETS: dict[str, int] = {}
+    PROMPT_DEFAULT_TOKEN_BUDGET: int = 2048
+    PROMPT_RESERVED_TOKENS: int = 600
+    PROMPT_HISTORY_MAX_MESSAGES: int = 10
+    PROMPT_JOURNAL_MAX_TOKENS: int = 400
+    PROMPT_SUMMARY_MAX_TOKENS: int = 300
+
     SPOTIFY_CLIENT_ID: str | None = None
     SPOTIFY_CLIENT_SECRET: str | None = None
 
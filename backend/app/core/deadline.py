@@ -0,0 +1,60 @@
+"""
+Deadline per permintaan yang dibawa lewat ``ContextVar`` sehingga setiap
+tahap (planner, generator, client OpenRouter) hanya memakai sisa anggaran
+waktu tanpa harus meneruskan parameter tambahan ke setiap fungsi.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# Waktu absolut (time.monotonic) saat permintaan harus sudah selesai
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Anggaran waktu permintaan sudah habis sebelum tahap ini dimulai."""
+
+
+def get_deadline() -> Optional[float]:
+    return _deadline.get()
+
+
+def remaining() -> Optional[float]:
+    """Sisa detik sampai deadline, atau None bila tidak ada deadline."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def cap_timeout(timeout: Optional[float]) -> Optional[float]:
+    """
+    Batasi ``timeout`` dengan sisa anggaran. Melempar ``DeadlineExceeded``
+    bila anggaran sudah habis.
+    """
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
+    return left if timeout is None else min(timeout, left)
+
+
+@contextmanager
+def deadline_scope(
+    timeout: Optional[float] = None, *, at: Optional[float] = None
+) -> Iterator[Optional[float]]:
+    """
+    Tetapkan deadline ``timeout`` detik dari sekarang (atau absolut ``at``)
+    untuk blok ini. Scope bersarang hanya bisa memperketat deadline luar.
+    """
+    candidates = [d for d in (_deadline.get(), at) if d is not None]
+    if timeout is not None:
+        candidates.append(time.monotonic() + timeout)
+    token = _deadline.set(min(candidates) if candidates else None)
+    try:
+        yield _deadline.get()
+    finally:
+        _deadline.reset(token)
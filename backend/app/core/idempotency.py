@@ -0,0 +1,229 @@
+"""
+Dukungan header ``Idempotency-Key`` untuk endpoint POST.
+
+Router yang memakai ``IdempotentRoute`` menyimpan respons pertama untuk setiap
+kunci (Redis bila tersedia, jika tidak LRU lokal) dan mengembalikannya lagi
+untuk retry dengan kunci yang sama. Duplikat yang datang bersamaan menunggu
+eksekusi pertama (future lokal untuk worker yang sama, ``SET NX`` di Redis
+untuk worker lain) sehingga handler, panggilan LLM dan insert hanya terjadi
+sekali.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import time
+from typing import Callable, Coroutine, Dict, Optional
+
+import redis
+import structlog
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
+
+from app.core.cache import LRUCache, get_async_redis
+from app.core.config import settings
+from app.core.security import token_subject
+from app.db.unit_of_work import commit_request
+
+log = structlog.get_logger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+PENDING = "pending"
+DONE = "done"
+
+
+class IdempotencyStore:
+    """Rekaman ``{state, fingerprint, response}`` per kunci dengan TTL."""
+
+    def __init__(
+        self,
+        namespace: str = "idempotency",
+        maxsize: int = 4096,
+        redis_client_factory=get_async_redis,
+    ):
+        self.namespace = namespace
+        self.local = LRUCache(maxsize=maxsize)
+        self._redis_factory = redis_client_factory
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[dict]:
+        client = self._redis_factory()
+        if client is not None:
+            try:
+                raw = await client.get(self._key(key))
+                return None if raw is None else json.loads(raw)
+            except redis.RedisError as e:
+                log.warning("idempotency_redis_error", op="get", error=str(e))
+        return self.local.get(self._key(key))
+
+    async def acquire(self, key: str, fingerprint: str, ttl: float) -> bool:
+        """Tandai kunci sebagai sedang diproses; False bila sudah ada rekaman."""
+        record = {"state": PENDING, "fingerprint": fingerprint}
+        client = self._redis_factory()
+        if client is not None:
+            try:
+                return bool(await client.set(self._key(key), json.dumps(record), nx=True, ex=int(ttl)))
+            except redis.RedisError as e:
+                log.warning("idempotency_redis_error", op="acquire", error=str(e))
+        if self.local.get(self._key(key)) is not None:
+            return False
+        self.local.set(self._key(key), record, ttl=ttl)
+        return True
+
+    async def complete(self, key: str, record: dict, ttl: float) -> None:
+        client = self._redis_factory()
+        if client is not None:
+            try:
+                await client.set(self._key(key), json.dumps(record), ex=int(ttl))
+                return
+            except redis.RedisError as e:
+                log.warning("idempotency_redis_error", op="complete", error=str(e))
+        self.local.set(self._key(key), record, ttl=ttl)
+
+    async def release(self, key: str) -> None:
+        self.local.delete(self._key(key))
+        client = self._redis_factory()
+        if client is not None:
+            try:
+                await client.delete(self._key(key))
+            except redis.RedisError as e:
+                log.warning("idempotency_redis_error", op="release", error=str(e))
+
+    def clear_local(self) -> None:
+        self.local.clear()
+
+
+idempotency_store = IdempotencyStore(maxsize=settings.IDEMPOTENCY_LOCAL_CACHE_SIZE)
+
+# Eksekusi yang sedang berjalan di worker ini: kunci -> future rekaman (atau
+# None bila respons tidak disimpan dan penunggu harus menjalankan sendiri)
+_inflight: Dict[str, "asyncio.Future[Optional[dict]]"] = {}
+
+
+def _principal_scope(request: Request) -> str:
+    # Per pengguna (``sub``), bukan per token: retry setelah token di-refresh
+    # tetap memakai kunci yang sama. Token tidak valid ditolak oleh handler
+    # (403), jadi respons yang tersimpan di scope "anonymous" tidak bocor.
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    subject = token_subject(token) if scheme.lower() == "bearer" and token else None
+    return "anonymous" if subject is None else f"user:{subject}"
+
+
+def _scoped_key(request: Request, key: str) -> str:
+    # Kunci hanya berlaku untuk pengguna dan endpoint yang sama
+    raw = "\n".join([_principal_scope(request), request.method, request.url.path, key])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _to_record(response: Response, fingerprint: str) -> dict:
+    headers = {
+        k: v for k, v in response.headers.items()
+        if k.lower() not in ("content-length", "set-cookie")
+    }
+    return {
+        "state": DONE,
+        "fingerprint": fingerprint,
+        "status_code": response.status_code,
+        "headers": headers,
+        "body": base64.b64encode(response.body).decode(),
+    }
+
+
+def _replay(record: dict, fingerprint: str) -> Response:
+    if record["fingerprint"] != fingerprint:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key sudah dipakai untuk permintaan yang berbeda.",
+        )
+    response = Response(
+        content=base64.b64decode(record["body"]),
+        status_code=record["status_code"],
+        headers=record["headers"],
+    )
+    response.headers[REPLAYED_HEADER] = "true"
+    return response
+
+
+async def _wait_for_record(key: str) -> Optional[dict]:
+    """Tunggu worker lain menyelesaikan kunci yang sama (polling Redis)."""
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        record = await idempotency_store.get(key)
+        if record is None or record["state"] == DONE:
+            return record
+        await asyncio.sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
+    raise HTTPException(
+        status_code=409,
+        detail="Permintaan dengan Idempotency-Key ini masih diproses.",
+    )
+
+
+class IdempotentRoute(APIRoute):
+    """``APIRoute`` yang menghormati header ``Idempotency-Key`` pada POST."""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[None, None, Response]]:
+        original_handler = super().get_route_handler()
+
+        async def handler(request: Request) -> Response:
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if request.method != "POST" or not key:
+                return await original_handler(request)
+            if len(key) > MAX_KEY_LENGTH:
+                raise HTTPException(status_code=400, detail="Idempotency-Key terlalu panjang.")
+
+            fingerprint = hashlib.sha256(await request.body()).hexdigest()
+            scoped = _scoped_key(request, key)
+
+            # Duplikat bersamaan di worker yang sama: tunggu eksekusi pertama
+            inflight = _inflight.get(scoped)
+            if inflight is not None:
+                record = await asyncio.shield(inflight)
+                if record is None:
+                    return await original_handler(request)
+                return _replay(record, fingerprint)
+
+            record = await idempotency_store.get(scoped)
+            if record is None and not await idempotency_store.acquire(
+                scoped, fingerprint, settings.IDEMPOTENCY_LOCK_TTL
+            ):
+                record = await idempotency_store.get(scoped)
+            if record is not None:
+                if record["state"] == PENDING and record["fingerprint"] == fingerprint:
+                    record = await _wait_for_record(scoped)
+                    if record is None:
+                        # Eksekusi lain gagal dan melepas kunci; jalankan ulang
+                        return await original_handler(request)
+                return _replay(record, fingerprint)
+
+            future: "asyncio.Future[Optional[dict]]" = asyncio.get_running_loop().create_future()
+            _inflight[scoped] = future
+            try:
+                response = await original_handler(request)
+                if isinstance(response, StreamingResponse) or response.status_code >= 500:
+                    # Respons streaming/gagal tidak disimpan; retry boleh dieksekusi
+                    await idempotency_store.release(scoped)
+                    future.set_result(None)
+                    return response
+                # Commit unit-of-work dulu: respons hanya disimpan bila datanya tersimpan
+                if response.status_code < 400:
+                    await commit_request(request)
+                record = _to_record(response, fingerprint)
+                await idempotency_store.complete(scoped, record, settings.IDEMPOTENCY_TTL)
+                future.set_result(record)
+                return response
+            except BaseException:
+                await idempotency_store.release(scoped)
+                if not future.done():
+                    future.set_result(None)
+                raise
+            finally:
+                _inflight.pop(scoped, None)
+
+        return handler
@@ -0,0 +1,346 @@
+"""Shared, connection-pooled HTTP client for the OpenRouter API."""
+
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+import httpx
+import structlog
+
+from app.core.config import Settings
+from app.core.deadline import DeadlineExceeded, cap_timeout, remaining
+from app.core.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LatencyTracker,
+    LLMUnavailableError,
+    backoff_delay,
+    is_transient,
+)
+
+
+class OpenRouterClient:
+    """
+    Wrapper tipis di atas satu ``httpx.AsyncClient`` yang dipakai bersama oleh
+    semua service. Koneksi TCP/TLS ke openrouter.ai tetap hidup (keep-alive,
+    HTTP/2) sehingga setiap giliran chat tidak perlu handshake baru.
+
+    ``complete``/``stream_complete`` menambahkan lapisan ketahanan di atas
+    ``chat_completion``: retry dengan jitter untuk error transien, hedging ke
+    model cadangan bila latensi melewati persentil, circuit breaker per model,
+    dan fallback berurutan ke model-model alternatif.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.settings = settings
+        self.log = structlog.get_logger(__name__)
+        self._client = httpx.AsyncClient(
+            base_url=settings.OPENROUTER_BASE_URL,
+            http2=settings.OPENROUTER_HTTP2,
+            limits=httpx.Limits(
+                max_connections=settings.OPENROUTER_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENROUTER_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OPENROUTER_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                settings.OPENROUTER_TIMEOUT,
+                connect=settings.OPENROUTER_CONNECT_TIMEOUT,
+            ),
+            transport=transport,
+        )
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latency: Dict[str, LatencyTracker] = {}
+
+    @property
+    def is_closed(self) -> bool:
+        return self._client.is_closed
+
+    async def chat_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        **options: Any,
+    ) -> Dict:
+        """
+        Kirim satu permintaan ``/chat/completions`` dan kembalikan JSON-nya.
+        ``options`` diteruskan apa adanya (mis. ``response_format``). Timeout
+        dibatasi sisa deadline permintaan (lihat ``app.core.deadline``).
+        """
+        timeout = cap_timeout(timeout)
+        json_data = {
+            "model": model,
+            "messages": messages,
+            **options,
+        }
+        response = await self._client.post(
+            "/chat/completions",
+            headers=headers,
+            json=json_data,
+            timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def stream_chat_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Panggil ``/chat/completions`` dengan ``stream=true`` dan hasilkan
+        potongan teks (delta) segera setelah diterima dari OpenRouter.
+        """
+        timeout = cap_timeout(timeout)
+        json_data = {
+            "model": model,
+            "messages": messages,
+            "stream": True,
+        }
+        async with self._client.stream(
+            "POST",
+            "/chat/completions",
+            headers=headers,
+            json=json_data,
+            timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                # Baris kosong memisahkan event, baris ":" adalah komentar keep-alive
+                if not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(payload)
+                except json.JSONDecodeError:
+                    self.log.warning("openrouter_stream_bad_chunk", payload=payload)
+                    continue
+                choices = chunk.get("choices") or []
+                if not choices:
+                    continue
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+
+    # --- ketahanan ---------------------------------------------------------
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = self._breakers.setdefault(
+                model,
+                CircuitBreaker(
+                    failure_threshold=self.settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                    reset_timeout=self.settings.LLM_CIRCUIT_RESET_TIMEOUT,
+                ),
+            )
+        return breaker
+
+    def latency(self, model: str) -> LatencyTracker:
+        tracker = self._latency.get(model)
+        if tracker is None:
+            tracker = self._latency.setdefault(
+                model, LatencyTracker(window=self.settings.LLM_LATENCY_WINDOW)
+            )
+        return tracker
+
+    def hedge_delay(self, model: str) -> Optional[float]:
+        """Detik menunggu ``model`` sebelum mengirim permintaan cadangan."""
+        if not self.settings.LLM_HEDGE_ENABLED:
+            return None
+        tracker = self.latency(model)
+        if len(tracker) < self.settings.LLM_HEDGE_MIN_SAMPLES:
+            return self.settings.LLM_HEDGE_DEFAULT_DELAY
+        return tracker.percentile(self.settings.LLM_HEDGE_PERCENTILE)
+
+    def _hit_budget(self, exc: BaseException, budget: Optional[float]) -> bool:
+        """
+        True bila kegagalan ini karena anggaran permintaan kita habis, bukan
+        karena provider: ``DeadlineExceeded``, atau timeout HTTP yang sudah
+        dipangkas ke sisa deadline (lebih pendek dari OPENROUTER_TIMEOUT).
+        """
+        if isinstance(exc, DeadlineExceeded):
+            return True
+        return (
+            isinstance(exc, httpx.TimeoutException)
+            and budget is not None
+            and budget < self.settings.OPENROUTER_TIMEOUT
+        )
+
+    def _record_error(
+        self, breaker: CircuitBreaker, exc: BaseException, budget: Optional[float] = None
+    ) -> None:
+        if self._hit_budget(exc, budget):
+            # Deadline kita sendiri: tidak mengatakan apa pun tentang provider
+            breaker.release()
+        # 4xx non-transien berarti provider hidup (permintaannya yang salah)
+        elif isinstance(exc, httpx.HTTPStatusError) and not is_transient(exc):
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+
+    async def _attempt(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        headers: Optional[Dict[str, str]],
+        **options: Any,
+    ) -> Dict:
+        """Panggil satu model dengan retry ber-jitter untuk error transien."""
+        breaker = self.breaker(model)
+        latency = self.latency(model)
+        max_retries = self.settings.LLM_MAX_RETRIES
+        for attempt in range(max_retries + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(model)
+            budget = remaining()
+            start = time.monotonic()
+            try:
+                data = await self.chat_completion(model, messages, headers=headers, **options)
+            except asyncio.CancelledError:
+                # Kalah hedge/deadline: latensi sebenarnya minimal selama ini.
+                # Tanpa sampel ini persentil hanya berisi pemenang dan terus turun.
+                latency.record(time.monotonic() - start)
+                breaker.release()
+                raise
+            except Exception as e:
+                if isinstance(e, httpx.TimeoutException):
+                    latency.record(time.monotonic() - start)
+                self._record_error(breaker, e, budget)
+                if self._hit_budget(e, budget) or not is_transient(e) or attempt >= max_retries:
+                    raise
+                delay = backoff_delay(
+                    attempt,
+                    self.settings.LLM_RETRY_BASE_DELAY,
+                    self.settings.LLM_RETRY_MAX_DELAY,
+                )
+                left = remaining()
+                if left is not None and left <= delay:
+                    # Tidak cukup waktu untuk mencoba lagi sebelum deadline
+                    raise
+                self.log.warning(
+                    "openrouter_retry", model=model, attempt=attempt + 1, delay=round(delay, 3), error=str(e)
+                )
+                await asyncio.sleep(delay)
+                continue
+            breaker.record_success()
+            latency.record(time.monotonic() - start)
+            return data
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    async def complete(
+        self,
+        models: Sequence[str],
+        messages: List[Dict[str, str]],
+        headers: Optional[Dict[str, str]] = None,
+        **options: Any,
+    ) -> Dict:
+        """
+        ``chat_completion`` dengan fallback berurutan pada ``models``. Bila model
+        yang sedang berjalan melewati ``hedge_delay``-nya, model berikutnya
+        dijalankan paralel (sekali per panggilan); jawaban pertama yang sukses
+        dipakai dan sisanya dibatalkan. Melempar ``TimeoutError`` bila deadline
+        permintaan terlewati.
+        """
+        queue = list(dict.fromkeys(models))
+        errors: List[BaseException] = []
+        pending: Dict[asyncio.Task, str] = {}
+        hedged = False
+
+        def launch_next() -> None:
+            while queue:
+                model = queue.pop(0)
+                if self.breaker(model).state == CircuitBreaker.OPEN:
+                    self.log.warning("openrouter_circuit_open", model=model)
+                    errors.append(CircuitOpenError(model))
+                    continue
+                task = asyncio.ensure_future(self._attempt(model, messages, headers, **options))
+                pending[task] = model
+                return
+
+        # Seluruh rangkaian retry/hedge/fallback dibatasi sisa deadline
+        async with asyncio.timeout(cap_timeout(None)):
+            launch_next()
+            try:
+                while pending:
+                    timeout = None
+                    if not hedged and queue and len(pending) == 1:
+                        timeout = self.hedge_delay(next(iter(pending.values())))
+                    done, _ = await asyncio.wait(
+                        pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not done:
+                        hedged = True
+                        self.log.warning(
+                            "openrouter_hedge", slow_model=next(iter(pending.values())), after=round(timeout, 3)
+                        )
+                        launch_next()
+                        continue
+                    for task in done:
+                        model = pending.pop(task)
+                        exc = task.exception()
+                        if exc is None:
+                            return task.result()
+                        self.log.warning("openrouter_model_failed", model=model, error=str(exc))
+                        errors.append(exc)
+                    if not pending:
+                        launch_next()
+            finally:
+                for task in pending:
+                    task.cancel()
+        raise LLMUnavailableError(errors)
+
+    async def stream_complete(
+        self,
+        models: Sequence[str],
+        messages: List[Dict[str, str]],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        ``stream_chat_completion`` dengan circuit breaker dan fallback ke model
+        berikutnya selama belum ada token yang terkirim. Tanpa hedging/retry:
+        token yang sudah diteruskan ke klien tidak bisa ditarik kembali.
+        """
+        errors: List[BaseException] = []
+        for model in dict.fromkeys(models):
+            breaker = self.breaker(model)
+            if not breaker.allow():
+                self.log.warning("openrouter_circuit_open", model=model)
+                errors.append(CircuitOpenError(model))
+                continue
+            sent_any = False
+            budget = remaining()
+            try:
+                async for token in self.stream_chat_completion(model, messages, headers=headers):
+                    if not sent_any:
+                        breaker.record_success()
+                        sent_any = True
+                    yield token
+            except Exception as e:
+                if sent_any:
+                    raise
+                self._record_error(breaker, e, budget)
+                self.log.warning("openrouter_model_failed", model=model, error=str(e))
+                errors.append(e)
+                continue
+            except BaseException:
+                if not sent_any:
+                    breaker.release()
+                raise
+            if not sent_any:
+                breaker.record_success()
+            return
+        raise LLMUnavailableError(errors)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
@@ -0,0 +1,144 @@
+"""
+Primitif ketahanan untuk panggilan LLM: klasifikasi error transien, backoff
+eksponensial dengan jitter, pelacak latensi (persentil) per model, dan
+circuit breaker per model. Semua state bersifat per proses dan tidak
+memakai I/O, sehingga aman dipanggil dari event loop.
+"""
+
+import math
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Optional
+
+import httpx
+
+# Status HTTP yang layak dicoba ulang: timeout, rate limit, dan error server
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(Exception):
+    """Model sedang dianggap mati; permintaan ditolak tanpa menyentuh jaringan."""
+
+    def __init__(self, model: str):
+        super().__init__(f"circuit open for model {model}")
+        self.model = model
+
+
+class LLMUnavailableError(Exception):
+    """Semua model kandidat gagal atau ditolak circuit breaker."""
+
+    def __init__(self, errors: list):
+        super().__init__("; ".join(f"{type(e).__name__}: {e}" for e in errors) or "no models")
+        self.errors = errors
+
+
+def is_transient(exc: BaseException) -> bool:
+    """True bila error kemungkinan hilang bila dicoba ulang."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, httpx.TransportError)
+
+
+def backoff_delay(
+    attempt: int,
+    base: float,
+    cap: float,
+    rand: Callable[[float, float], float] = random.uniform,
+) -> float:
+    """Full jitter: acak antara 0 dan min(cap, base * 2^attempt)."""
+    return rand(0, min(cap, base * (2 ** attempt)))
+
+
+class LatencyTracker:
+    """
+    Jendela bergulir latensi untuk menghitung persentil: sukses, plus batas
+    bawah (waktu berjalan) untuk percobaan yang dibatalkan atau timeout.
+    """
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        # Nearest-rank
+        rank = max(math.ceil(pct / 100 * len(samples)), 1)
+        return samples[min(rank, len(samples)) - 1]
+
+
+class CircuitBreaker:
+    """
+    Closed -> open setelah ``failure_threshold`` kegagalan berturut-turut.
+    Setelah ``reset_timeout`` detik, satu permintaan percobaan (half-open)
+    diizinkan; sukses menutup sirkuit, gagal membukanya lagi.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probe_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._probe_in_flight = False
+
+    def release(self) -> None:
+        """Lepaskan slot percobaan tanpa hasil (mis. permintaan dibatalkan)."""
+        with self._lock:
+            self._probe_in_flight = False
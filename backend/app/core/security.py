@@ -1,10 +1,22 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Optional, Tuple, Union
 from passlib.context import CryptContext
-from jose import jwt
+from jose import JWTError, jwt
 from .config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min = max = default: hash dengan cost lain (lebih murah atau lebih mahal)
+# dianggap perlu di-rehash saat login berikutnya
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -12,6 +24,50 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(cocok, hash baru bila parameter hash berubah sejak hash lama dibuat)."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+# --- Hashing di process pool -------------------------------------------------
+# bcrypt memakan CPU ~0.25 detik per panggilan; di threadpool FastAPI lonjakan
+# login menghabiskan thread yang dipakai semua endpoint sync. Pool proses
+# terpisah (dibuat malas per worker gunicorn, setelah fork) membatasi paralelisme
+# hashing ke PASSWORD_HASH_WORKERS; permintaan lain menunggu di event loop.
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_password_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                # spawn: jangan mewarisi thread/event loop worker induk
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+def shutdown_password_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+async def _run_in_executor(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(get_password_executor(), fn, *args)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_executor(get_password_hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_executor(verify_password, plain_password, hashed_password)
+
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await _run_in_executor(verify_and_update, plain_password, hashed_password)
+
 def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -21,3 +77,13 @@ def create_access_token(subject: Union[str, Any], expires_delta: timedelta = Non
     to_encode = {"exp": expire, "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
+
+
+def token_subject(token: str) -> Optional[str]:
+    """``sub`` dari access token yang valid, atau None."""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    subject = payload.get("sub")
+    return None if subject is None else str(subject)
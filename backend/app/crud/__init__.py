@@ -1,7 +1,7 @@
 # backend/app/crud/__init__.py
 
 # CRUD Base
-from .base import CRUDBase
+from .base import CRUDBase, InvalidCursorError
 
 # User & Profile
 from .crud_user import CRUDUser, user
@@ -10,6 +10,7 @@ from .crud_user_profile import user_profile
 # Journal, Chat, Article
 from .crud_journal import CRUDJournal, journal
 from .crud_chat import chat_message
+from .crud_conversation_summary import conversation_summary
 from .crud_article import article
 
 # Audio, Quotes
@@ -18,11 +19,13 @@ from .crud_motivational_quote import motivational_quote
 
 __all__ = [
     "CRUDBase",
+    "InvalidCursorError",
     "CRUDUser",
     "CRUDJournal",
     "user",
     "journal",
     "chat_message",
+    "conversation_summary",
     "article",
     "audio_track",
     "motivational_quote",
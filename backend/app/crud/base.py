@@ -1,14 +1,76 @@
 # backend/app/crud/base.py
 
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, Generic, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 from pydantic import BaseModel
+from sqlalchemy import Select, and_, delete, insert, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.db.base_class import Base
+from app.db.unit_of_work import is_unit_of_work
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+
+
+class InvalidCursorError(ValueError):
+    """Cursor pagination tidak bisa didekode."""
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise InvalidCursorError(f"invalid cursor: {cursor!r}") from e
+
+
+def persist(db: Session, db_obj: Any) -> None:
+    """
+    Simpan perubahan ``db``. Dalam unit-of-work cukup flush (commit sekali di
+    akhir permintaan); di luar itu commit lalu refresh ``db_obj`` bila ada.
+    """
+    if is_unit_of_work(db):
+        db.flush()
+        return
+    db.commit()
+    if db_obj is not None:
+        db.refresh(db_obj)
+
+
+async def persist_async(db: AsyncSession, db_obj: Any) -> None:
+    if is_unit_of_work(db):
+        await db.flush()
+        return
+    await db.commit()
+    if db_obj is not None:
+        await db.refresh(db_obj)
+
+
+def _chunks(rows: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+# Dialek yang mendukung INSERT ... ON CONFLICT
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         self.model = model
@@ -21,13 +83,169 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     ) -> List[ModelType]:
         return db.query(self.model).offset(skip).limit(limit).all()
 
+    # --- Keyset pagination (model dengan owner_id dan created_at) ----------
+    # Urutan terbaru dulu pada (created_at, id); halaman berikutnya dimulai
+    # tepat setelah baris terakhir sehingga biayanya konstan berapa pun
+    # kedalaman halaman, tidak seperti offset.
+
+    def _page_by_owner_query(
+        self, *, owner_id: int, limit: int, cursor: Optional[str]
+    ) -> Select:
+        model = self.model
+        query = select(model).where(model.owner_id == owner_id)
+        if cursor:
+            created_at, id = decode_cursor(cursor)
+            query = query.where(
+                or_(
+                    model.created_at < created_at,
+                    and_(model.created_at == created_at, model.id < id),
+                )
+            )
+        # Satu baris ekstra untuk mengetahui apakah masih ada halaman berikutnya
+        return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+    def _split_page(
+        self, rows: List[ModelType], limit: int
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    def get_page_by_owner(
+        self, db: Session, *, owner_id: int, limit: int = 100, cursor: Optional[str] = None
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """Kembalikan (baris, cursor berikutnya atau None)."""
+        query = self._page_by_owner_query(owner_id=owner_id, limit=limit, cursor=cursor)
+        return self._split_page(list(db.execute(query).scalars().all()), limit)
+
+    async def get_page_by_owner_async(
+        self, db: AsyncSession, *, owner_id: int, limit: int = 100, cursor: Optional[str] = None
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        query = self._page_by_owner_query(owner_id=owner_id, limit=limit, cursor=cursor)
+        result = await db.execute(query)
+        return self._split_page(list(result.scalars().all()), limit)
+
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         # Konversi Pydantic model ke dict
         obj_in_data = obj_in.model_dump()
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        persist(db, db_obj)
+        return db_obj
+
+    # --- Operasi bulk -------------------------------------------------------
+    # Satu statement executemany dan satu persist() per batch (commit, atau
+    # flush dalam unit-of-work permintaan), bukan satu commit + refresh per
+    # baris. Hook per model (mis. cache snapshot chat di
+    # CRUDJournal/CRUDChatMessage) tidak dipanggil oleh operasi ini.
+
+    def _to_row(self, obj_in: Union[CreateSchemaType, Dict[str, Any]]) -> Dict[str, Any]:
+        return obj_in if isinstance(obj_in, dict) else obj_in.model_dump()
+
+    def _execute_batches(
+        self, db: Session, stmt: Any, rows: List[Dict[str, Any]], batch_size: int
+    ) -> List[ModelType]:
+        returning = db.get_bind().dialect.insert_executemany_returning
+        objs: List[ModelType] = []
+        for batch in _chunks(rows, batch_size):
+            if returning:
+                result = db.execute(
+                    stmt.returning(self.model),
+                    batch,
+                    execution_options={"populate_existing": True},
+                )
+                batch_objs = result.scalars().all()
+                # Lepas dari session agar commit tidak meng-expire objek yang
+                # sudah terisi dari RETURNING (tanpa SELECT refresh per baris)
+                for obj in batch_objs:
+                    db.expunge(obj)
+                objs.extend(batch_objs)
+            else:
+                db.execute(stmt, batch)
+            persist(db, None)
+        return objs
+
+    def create_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        batch_size: int = 1000,
+    ) -> List[ModelType]:
+        """
+        Insert banyak baris sekaligus. Mengembalikan objek yang dibuat (sudah
+        terlepas dari session; urutan tidak dijamin sama dengan input) bila
+        dialek mendukung RETURNING untuk executemany, selain itu daftar kosong.
+        """
+        rows = [self._to_row(obj_in) for obj_in in objs_in]
+        if not rows:
+            return []
+        return self._execute_batches(db, insert(self.model), rows, batch_size)
+
+    def upsert(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        index_elements: Sequence[str],
+        update_fields: Optional[Sequence[str]] = None,
+        batch_size: int = 1000,
+    ) -> List[ModelType]:
+        """
+        ``INSERT ... ON CONFLICT (index_elements) DO UPDATE``. ``index_elements``
+        harus berupa primary key atau unique constraint. ``update_fields``
+        default: semua kolom input selain ``index_elements``; daftar kosong
+        berarti ``DO NOTHING``. ValueError untuk dialek tanpa ON CONFLICT.
+        """
+        rows = [self._to_row(obj_in) for obj_in in objs_in]
+        if not rows:
+            return []
+
+        dialect = db.get_bind().dialect.name
+        dialect_insert = _UPSERT_INSERTS.get(dialect)
+        if dialect_insert is None:
+            raise ValueError(f"upsert is not supported for dialect {dialect!r}")
+
+        stmt = dialect_insert(self.model)
+        if update_fields is None:
+            update_fields = [key for key in rows[0] if key not in index_elements]
+        if update_fields:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(index_elements),
+                set_={field: stmt.excluded[field] for field in update_fields},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=list(index_elements))
+        return self._execute_batches(db, stmt, rows, batch_size)
+
+    def delete_many(self, db: Session, *, ids: Sequence[Any], batch_size: int = 1000) -> int:
+        """Hapus baris berdasarkan id; mengembalikan jumlah baris terhapus."""
+        deleted = 0
+        for batch in _chunks(list(ids), batch_size):
+            result = db.execute(
+                delete(self.model).where(self.model.id.in_(batch)),
+                execution_options={"synchronize_session": False},
+            )
+            deleted += result.rowcount
+            persist(db, None)
+        return deleted
+
+    async def get_async(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        result = await db.execute(select(self.model).where(self.model.id == id))
+        return result.scalars().first()
+
+    async def get_multi_async(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+    ) -> List[ModelType]:
+        result = await db.execute(select(self.model).offset(skip).limit(limit))
+        return list(result.scalars().all())
+
+    async def create_async(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        obj_in_data = obj_in.model_dump()
+        db_obj = self.model(**obj_in_data)
+        db.add(db_obj)
+        await persist_async(db, db_obj)
         return db_obj
 
     def update(
@@ -49,13 +267,12 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                 setattr(db_obj, field, update_data[field])
 
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        persist(db, db_obj)
         return db_obj
 
     def remove(self, db: Session, *, id: int) -> Optional[ModelType]:
         obj = db.query(self.model).get(id)
         if obj:
             db.delete(obj)
-            db.commit()
+            persist(db, None)
         return obj
\ No newline at end of file
@@ -1,7 +1,10 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from .base import CRUDBase
+from .base import CRUDBase, persist, persist_async
 from app.models.chat import ChatMessage
 from app.schemas.chat import ChatMessageCreate, ChatMessageUpdate
+from app.services.chat_context_service import chat_context_cache
 
 class CRUDChatMessage(CRUDBase[ChatMessage, ChatMessageCreate, ChatMessageUpdate]):
     def create_with_owner(self, db, *, obj_in: ChatMessageCreate, owner_id: int) -> ChatMessage:
@@ -10,8 +13,8 @@ class CRUDChatMessage(CRUDBase[ChatMessage, ChatMessageCreate, ChatMessageUpdate
             owner_id=owner_id
         )
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        persist(db, db_obj)
+        chat_context_cache.record_message(owner_id, db_obj)
         return db_obj
 
     def get_multi_by_owner(self, db, *, owner_id: int, skip: int = 0, limit: int = 100):
@@ -24,6 +27,30 @@ class CRUDChatMessage(CRUDBase[ChatMessage, ChatMessageCreate, ChatMessageUpdate
             .all()
         )
 
+    async def create_with_owner_async(
+        self, db: AsyncSession, *, obj_in: ChatMessageCreate, owner_id: int
+    ) -> ChatMessage:
+        db_obj = ChatMessage(
+            **obj_in.model_dump(),
+            owner_id=owner_id
+        )
+        db.add(db_obj)
+        await persist_async(db, db_obj)
+        await chat_context_cache.record_message_async(owner_id, db_obj)
+        return db_obj
+
+    async def get_multi_by_owner_async(
+        self, db: AsyncSession, *, owner_id: int, skip: int = 0, limit: int = 100
+    ) -> list[ChatMessage]:
+        result = await db.execute(
+            select(self.model)
+            .where(ChatMessage.owner_id == owner_id)
+            .order_by(ChatMessage.created_at.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
     def remove(self, db: Session, *, id: int, owner_id: int) -> ChatMessage | None:
         obj = (
             db.query(ChatMessage)
@@ -32,7 +59,8 @@ class CRUDChatMessage(CRUDBase[ChatMessage, ChatMessageCreate, ChatMessageUpdate
         )
         if obj:
             db.delete(obj)
-            db.commit()
+            persist(db, None)
+            chat_context_cache.invalidate_after_commit(db, owner_id)
         return obj
 
     def set_flag(
@@ -46,8 +74,8 @@ class CRUDChatMessage(CRUDBase[ChatMessage, ChatMessageCreate, ChatMessageUpdate
         if obj:
             obj.is_flagged = flag
             db.add(obj)
-            db.commit()
-            db.refresh(obj)
+            persist(db, obj)
+            chat_context_cache.invalidate_after_commit(db, owner_id)
         return obj
 
 chat_message = CRUDChatMessage(ChatMessage)
@@ -0,0 +1,51 @@
+# backend/app/crud/crud_conversation_summary.py
+
+import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .base import _UPSERT_INSERTS, CRUDBase, persist_async
+from app.models.conversation_summary import ConversationSummary
+from app.services.chat_context_service import chat_context_cache
+
+class CRUDConversationSummary(CRUDBase[ConversationSummary, None, None]):
+    async def get_by_user_id_async(
+        self, db: AsyncSession, *, user_id: int
+    ) -> ConversationSummary | None:
+        result = await db.execute(select(self.model).where(self.model.user_id == user_id))
+        return result.scalars().first()
+
+    async def upsert_async(
+        self, db: AsyncSession, *, user_id: int, summary: str, last_message_id: int
+    ) -> None:
+        """
+        Simpan ringkasan bergulir pengguna dan perbarui snapshot konteks chat.
+        Satu ``INSERT ... ON CONFLICT (user_id) DO UPDATE``: dua giliran pertama
+        yang bersamaan tidak saling bertabrakan di unique ``user_id``.
+        """
+        dialect = db.get_bind().dialect.name
+        dialect_insert = _UPSERT_INSERTS.get(dialect)
+        if dialect_insert is None:
+            raise ValueError(f"upsert is not supported for dialect {dialect!r}")
+
+        stmt = dialect_insert(self.model).values(
+            user_id=user_id,
+            summary=summary,
+            last_message_id=last_message_id,
+            updated_at=datetime.datetime.utcnow(),
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[self.model.user_id],
+                set_={
+                    "summary": stmt.excluded.summary,
+                    "last_message_id": stmt.excluded.last_message_id,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+        )
+        await persist_async(db, None)
+        chat_context_cache.track_pending(db, user_id)
+        await chat_context_cache.record_summary_async(user_id, summary, last_message_id)
+
+conversation_summary = CRUDConversationSummary(ConversationSummary)
@@ -1,10 +1,15 @@
 # backend/app/crud/crud_journal.py (Versi Perbaikan)
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.crud.base import CRUDBase
+from app.crud.base import CRUDBase, persist, persist_async
 from app.models.journal import Journal
 from app.schemas.journal import JournalCreate, JournalUpdate
-from sqlalchemy import desc # Pastikan `desc` diimpor
+from app.services import profile_aggregates
+from app.services.chat_context_service import chat_context_cache
+from typing import Iterator, Sequence
+
+from sqlalchemy import desc, select, update # Pastikan `desc` diimpor
 
 class CRUDJournal(CRUDBase[Journal, JournalCreate, JournalUpdate]):
     def create_with_owner(
@@ -12,8 +17,9 @@ class CRUDJournal(CRUDBase[Journal, JournalCreate, JournalUpdate]):
     ) -> Journal:
         db_obj = Journal(**obj_in.model_dump(), owner_id=owner_id)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        persist(db, db_obj)
+        chat_context_cache.record_journal(owner_id, db_obj)
+        profile_aggregates.record_journal_created(db, db_obj)
         return db_obj
 
     def get_multi_by_owner(
@@ -32,4 +38,62 @@ class CRUDJournal(CRUDBase[Journal, JournalCreate, JournalUpdate]):
 
         return journals
 
+    async def create_with_owner_async(
+        self, db: AsyncSession, *, obj_in: JournalCreate, owner_id: int
+    ) -> Journal:
+        db_obj = Journal(**obj_in.model_dump(), owner_id=owner_id)
+        db.add(db_obj)
+        await persist_async(db, db_obj)
+        await chat_context_cache.record_journal_async(owner_id, db_obj)
+        await profile_aggregates.record_journal_created_async(db, db_obj)
+        return db_obj
+
+    async def get_multi_by_owner_async(
+        self, db: AsyncSession, *, owner_id: int, skip: int = 0, limit: int = 100, order_by: str = None
+    ) -> list[Journal]:
+        query = select(self.model).where(self.model.owner_id == owner_id)
+
+        if order_by == "created_at desc":
+            query = query.order_by(desc(self.model.created_at))
+
+        result = await db.execute(query.offset(skip).limit(limit))
+        return list(result.scalars().all())
+
+    def get_unscored(self, db: Session, *, limit: int) -> list:
+        """(id, content) jurnal yang belum diskor sentimennya, urut id (indeks parsial)."""
+        query = (
+            select(self.model.id, self.model.content)
+            .where(self.model.sentiment_label.is_(None))
+            .order_by(self.model.id)
+            .limit(limit)
+        )
+        return list(db.execute(query).all())
+
+    def stream_for_scoring(
+        self, db: Session, *, after_id: int, limit: int, batch_size: int, only_unscored: bool = True
+    ) -> Iterator[Sequence]:
+        """
+        Baris (id, content) setelah ``after_id``, paling banyak ``limit``, dialirkan
+        per ``batch_size`` (``yield_per``: cursor server di Postgres) alih-alih
+        dimuat sekaligus.
+        """
+        query = select(self.model.id, self.model.content).where(self.model.id > after_id)
+        if only_unscored:
+            query = query.where(self.model.sentiment_label.is_(None))
+        query = query.order_by(self.model.id).limit(limit).execution_options(yield_per=batch_size)
+        yield from db.execute(query).partitions()
+
+    def update_sentiments(self, db: Session, scores: Sequence[dict]) -> None:
+        """UPDATE massal per primary key: ``[{"id", "sentiment_score", "sentiment_label"}]``."""
+        if scores:
+            db.execute(update(self.model), list(scores))
+
+    def remove(self, db: Session, *, id: int) -> Journal | None:
+        obj = super().remove(db, id=id)
+        if obj:
+            # Agregat mood dikurangi; snapshot chat ikut dibuang di dalamnya
+            # (jurnal terbaru di snapshot mungkin yang baru saja dihapus)
+            profile_aggregates.record_journal_deleted(db, obj)
+        return obj
+
 journal = CRUDJournal(Journal)
@@ -1,8 +1,28 @@
+from typing import Any, Dict, Optional, Set, Union
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from .base import CRUDBase
+from .base import CRUDBase, persist, persist_async
+from app.core.cache import TieredCache
+from app.core.config import settings
+from app.db.unit_of_work import run_from_session_event
 from app.models.user import User
-from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash
+from app.schemas.user import Principal, UserCreate, UserUpdate
+from app.core.security import get_password_hash, get_password_hash_async
+
+# Principal (id, email, username, is_active) per user id untuk autentikasi;
+# TTL pendek, dan dibuang saat baris user berubah (lihat event di bawah)
+principal_cache = TieredCache(
+    "principal",
+    maxsize=settings.AUTH_CACHE_SIZE,
+    ttl=settings.AUTH_CACHE_TTL,
+    local_ttl=settings.AUTH_CACHE_LOCAL_TTL,
+)
+
+# Session.info: id user yang berubah dalam transaksi berjalan
+_CHANGED_USERS = "principal_changed_users"
+
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     def get_by_email(self, db: Session, *, email: str) -> User | None:
@@ -15,8 +35,104 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             hashed_password=get_password_hash(obj_in.password),
         )
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        persist(db, db_obj)
+        return db_obj
+
+    async def get_by_email_async(self, db: AsyncSession, *, email: str) -> User | None:
+        result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
+
+    async def create_async(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
+        # Hash di process pool, bukan di event loop / threadpool
+        db_obj = User(
+            email=obj_in.email,
+            username=obj_in.username,
+            hashed_password=await get_password_hash_async(obj_in.password),
+        )
+        db.add(db_obj)
+        await persist_async(db, db_obj)
         return db_obj
 
+    async def set_password_hash_async(self, db: AsyncSession, *, db_obj: User, hashed_password: str) -> User:
+        db_obj.hashed_password = hashed_password
+        await persist_async(db, db_obj)
+        return db_obj
+
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: User,
+        obj_in: Union[UserUpdate, Dict[str, Any]]
+    ) -> User:
+        update_data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+        if update_data.get("password"):
+            update_data = dict(update_data)
+            update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        return super().update(db, db_obj=db_obj, obj_in=update_data)
+
+    def get_principal(self, db: Session, *, id: int) -> Optional[Principal]:
+        """User untuk autentikasi; dari cache bila ada, tanpa query DB."""
+        data = principal_cache.get(id)
+        if data is not None:
+            return Principal.model_validate(data)
+        db_obj = self.get(db, id=id)
+        if db_obj is None:
+            return None
+        principal = Principal.model_validate(db_obj)
+        principal_cache.set(id, principal.model_dump())
+        return principal
+
+    def invalidate_principal(self, id: int) -> None:
+        principal_cache.delete(id)
+
+
 user = CRUDUser(User)
+
+
+def _collect_changed_users(session: Session, flush_context) -> None:
+    changed: Set[int] = session.info.setdefault(_CHANGED_USERS, set())
+    for obj in (*session.dirty, *session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            changed.add(obj.id)
+
+
+async def _invalidate_principals_async(user_ids: Set[int]) -> None:
+    for user_id in user_ids:
+        await principal_cache.delete_async(user_id)
+
+
+def _invalidate_changed_users(session: Session) -> None:
+    # Hanya commit transaksi utama (event ini juga dipanggil saat savepoint dilepas)
+    if session.in_nested_transaction():
+        return
+    user_ids = session.info.pop(_CHANGED_USERS, None)
+    if not user_ids:
+        return
+
+    def invalidate() -> None:
+        for user_id in user_ids:
+            user.invalidate_principal(user_id)
+
+    # Commit AsyncSession (mis. rehash bcrypt saat login): client Redis async
+    run_from_session_event(invalidate, lambda: _invalidate_principals_async(user_ids))
+
+
+def _discard_changed_users(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    session.info.pop(_CHANGED_USERS, None)
+
+
+_SESSION_EVENTS = (
+    (Session, "after_flush", _collect_changed_users),
+    (Session, "after_commit", _invalidate_changed_users),
+    (Session, "after_rollback", _discard_changed_users),
+)
+
+
+def register_session_events() -> None:
+    """Pasang event invalidasi cache principal pada semua session (idempoten)."""
+    for target, name, fn in _SESSION_EVENTS:
+        if not event.contains(target, name, fn):
+            event.listen(target, name, fn)
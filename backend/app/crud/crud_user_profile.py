@@ -1,8 +1,14 @@
 # backend/app/crud/crud_user_profile.py
 
+import datetime
+from typing import List, Optional, Sequence
+
+from sqlalchemy import or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from .base import CRUDBase
-from app.models.user_profile import UserProfile
+from .base import CRUDBase, persist
+from app.models.user import User
+from app.models.user_profile import STALE_PROFILE_SQL, UserProfile
 from app.schemas.user_profile import UserProfileUpdate
 
 class CRUDUserProfile(CRUDBase[UserProfile, None, UserProfileUpdate]):
@@ -10,12 +16,67 @@ class CRUDUserProfile(CRUDBase[UserProfile, None, UserProfileUpdate]):
         """Mengambil profil berdasarkan ID pengguna."""
         return db.query(self.model).filter(self.model.user_id == user_id).first()
 
+    async def get_by_user_id_async(self, db: AsyncSession, *, user_id: int) -> UserProfile | None:
+        """Versi async dari `get_by_user_id`."""
+        result = await db.execute(select(self.model).where(self.model.user_id == user_id))
+        return result.scalars().first()
+
     def create_with_user(self, db: Session, *, user_id: int) -> UserProfile:
         """Membuat profil kosong untuk pengguna baru."""
         db_obj = UserProfile(user_id=user_id)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        persist(db, db_obj)
         return db_obj
 
+    def get_stale_user_ids(
+        self,
+        db: Session,
+        *,
+        after_id: int = 0,
+        limit: int = 500,
+        claimed_before: Optional[datetime.datetime] = None,
+    ) -> List[int]:
+        """
+        Id pengguna (urut naik, setelah ``after_id``) yang jurnal terbarunya
+        lebih baru dari ``last_analyzed`` profilnya, atau belum punya profil.
+        Profil basi dibaca lewat indeks parsial ``ix_user_profiles_stale``
+        (tanpa memindai jurnal); pengguna tanpa profil lewat anti-join.
+        Dengan ``claimed_before``, pengguna yang diklaim setelah waktu itu dan
+        belum dianalisis sejak klaim tersebut dilewati.
+        """
+        stale = select(UserProfile.user_id).where(
+            UserProfile.user_id > after_id, text(STALE_PROFILE_SQL)
+        )
+        if claimed_before is not None:
+            stale = stale.where(
+                or_(
+                    UserProfile.analysis_claimed_at.is_(None),
+                    UserProfile.analysis_claimed_at < claimed_before,
+                    UserProfile.analysis_claimed_at <= UserProfile.last_analyzed,
+                )
+            )
+        missing = (
+            select(User.id)
+            .outerjoin(UserProfile, UserProfile.user_id == User.id)
+            .where(User.id > after_id, UserProfile.id.is_(None))
+        )
+        user_ids = [
+            *db.execute(stale.order_by(UserProfile.user_id).limit(limit)).scalars(),
+            *db.execute(missing.order_by(User.id).limit(limit)).scalars(),
+        ]
+        return sorted(user_ids)[:limit]
+
+    def claim_for_analysis(
+        self, db: Session, *, user_ids: Sequence[int], claimed_at: datetime.datetime
+    ) -> None:
+        """
+        Tandai pengguna sebagai sudah dikirim ke worker (profil kosong dibuat
+        bila belum ada) agar run batch yang tumpang tindih tidak mengirimnya lagi.
+        """
+        self.upsert(
+            db,
+            objs_in=[{"user_id": user_id, "analysis_claimed_at": claimed_at} for user_id in user_ids],
+            index_elements=["user_id"],
+        )
+
 user_profile = CRUDUserProfile(UserProfile)
\ No newline at end of file
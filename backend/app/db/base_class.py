@@ -6,6 +6,10 @@ class Base:
     id: Any
     __name__: str
 
+    # Default dari server ikut diambil lewat RETURNING saat flush, jadi objek
+    # baru tidak perlu refresh() (lihat app.db.unit_of_work)
+    __mapper_args__ = {"eager_defaults": True}
+
     # Generate __tablename__ automatically
     @declared_attr
     def __tablename__(cls) -> str:
@@ -0,0 +1,121 @@
+"""
+Connection pool yang mencatat metrik untuk monitoring.
+
+``QueuePool`` bawaan hanya memberi ``status()``; di sini setiap checkout
+ditimbang: berapa lama menunggu koneksi, berapa kali harus menunggu, berapa
+kali timeout (pool habis) dan berapa koneksi overflow yang dibuka. Angkanya
+per proses (per worker gunicorn) dan dibaca lewat ``pool_stats``.
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, Dict
+
+import structlog
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+log = structlog.get_logger(__name__)
+
+# Checkout yang lebih lama dari ini dihitung sebagai "menunggu" (detik)
+WAIT_THRESHOLD = 0.005
+
+# Ditandai oleh event pool "connect" (koneksi DBAPI baru dibuat) selama
+# ``connect()`` berjalan di thread/greenlet yang sama
+_new_connection: ContextVar[bool] = ContextVar("db_pool_new_connection", default=False)
+
+
+def _mark_new_connection(dbapi_connection, connection_record) -> None:
+    _new_connection.set(True)
+
+
+@dataclass
+class PoolMetrics:
+    checkouts: int = 0
+    waits: int = 0
+    timeouts: int = 0
+    overflow_opened: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+
+class _InstrumentedMixin:
+    """
+    Dicampur ke kelas pool SQLAlchemy. Hanya memakai API publik: ``connect()``
+    ditimbang, event ``connect`` menandai koneksi baru, ``overflow()`` untuk
+    overflow, sehingga tidak bergantung pada internal ``QueuePool``.
+    """
+
+    metrics: PoolMetrics
+
+    def _init_metrics(self, max_overflow: int) -> None:
+        self.metrics = PoolMetrics()
+        self.max_overflow = max_overflow
+        self._metrics_lock = threading.Lock()
+        if not event.contains(self, "connect", _mark_new_connection):
+            event.listen(self, "connect", _mark_new_connection)
+
+    def connect(self):
+        start = time.monotonic()
+        token = _new_connection.set(False)
+        try:
+            conn = super().connect()
+            created = _new_connection.get()
+        except exc.TimeoutError:
+            with self._metrics_lock:
+                self.metrics.timeouts += 1
+            log.warning("db_pool_timeout", status=self.status())
+            raise
+        finally:
+            _new_connection.reset(token)
+        waited = time.monotonic() - start
+        with self._metrics_lock:
+            m = self.metrics
+            m.checkouts += 1
+            # Koneksi baru dibuat: lamanya connect, bukan antre di pool
+            if created and self.overflow() > 0:
+                m.overflow_opened += 1
+            if not created and waited >= WAIT_THRESHOLD:
+                m.waits += 1
+                m.wait_seconds_total += waited
+                m.wait_seconds_max = max(m.wait_seconds_max, waited)
+        return conn
+
+    def recreate(self):
+        # dispose() membuat pool baru; metrik tetap dibawa agar monoton naik
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        return new_pool
+
+
+class InstrumentedQueuePool(_InstrumentedMixin, QueuePool):
+    def __init__(self, *args: Any, max_overflow: int = 10, **kwargs: Any):
+        super().__init__(*args, max_overflow=max_overflow, **kwargs)
+        self._init_metrics(max_overflow)
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedMixin, AsyncAdaptedQueuePool):
+    def __init__(self, *args: Any, max_overflow: int = 10, **kwargs: Any):
+        super().__init__(*args, max_overflow=max_overflow, **kwargs)
+        self._init_metrics(max_overflow)
+
+
+def pool_stats(engine: Engine) -> Dict[str, Any]:
+    """Snapshot kondisi pool saat ini plus metrik kumulatif (bila ada)."""
+    pool: Pool = engine.pool
+    stats: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+        )
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        stats["max_overflow"] = pool.max_overflow
+        stats.update(asdict(metrics))
+    return stats
@@ -0,0 +1,89 @@
+"""
+Routing baca ke replika dengan perlindungan read-your-writes.
+
+Setiap commit yang menulis data milik seorang pengguna mencatat waktu tulis
+per pengguna di cache bersama (Redis bila ada) selama
+``READ_YOUR_WRITES_SECONDS``. Selama catatan itu ada, bacaan pengguna tersebut
+tetap ke primary sehingga ia tidak melihat data lama akibat lag replikasi.
+Tanpa ``DATABASE_REPLICA_URL`` semua bacaan ke primary dan tidak ada yang
+dicatat.
+"""
+
+import time
+from typing import Any, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.cache import TieredCache
+from app.core.config import settings
+from app.models.user import User
+
+# Session.info: pengguna yang datanya ditulis dalam transaksi berjalan
+_WRITTEN_OWNERS = "replica_written_owners"
+
+last_write_cache = TieredCache(
+    "db_last_write",
+    maxsize=4096,
+    ttl=settings.READ_YOUR_WRITES_SECONDS,
+)
+
+
+def replica_enabled() -> bool:
+    return bool(settings.DATABASE_REPLICA_URL)
+
+
+def _owner_of(obj: Any) -> Optional[int]:
+    if isinstance(obj, User):
+        return obj.id
+    owner_id = getattr(obj, "owner_id", None)
+    if owner_id is None:
+        owner_id = getattr(obj, "user_id", None)
+    return owner_id
+
+
+def record_write(user_id: int) -> None:
+    last_write_cache.set(user_id, time.time())
+
+
+def recently_wrote(user_id: int) -> bool:
+    """True bila pengguna menulis dalam jendela read-your-writes."""
+    return last_write_cache.get(user_id) is not None
+
+
+def _collect_written_owners(session: Session, flush_context) -> None:
+    if not replica_enabled():
+        return
+    owners: Set[int] = session.info.setdefault(_WRITTEN_OWNERS, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        owner_id = _owner_of(obj)
+        if owner_id is not None:
+            owners.add(owner_id)
+
+
+def _record_committed_writes(session: Session) -> None:
+    # Hanya commit transaksi utama (event ini juga dipanggil saat savepoint dilepas)
+    if session.in_nested_transaction():
+        return
+    for owner_id in session.info.pop(_WRITTEN_OWNERS, ()):
+        record_write(owner_id)
+
+
+def _discard_written_owners(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    session.info.pop(_WRITTEN_OWNERS, None)
+
+
+_SESSION_EVENTS = (
+    (Session, "after_flush", _collect_written_owners),
+    (Session, "after_commit", _record_committed_writes),
+    (Session, "after_rollback", _discard_written_owners),
+)
+
+
+def register_session_events() -> None:
+    """Pasang event read-your-writes pada semua session (idempoten)."""
+    for target, name, fn in _SESSION_EVENTS:
+        if not event.contains(target, name, fn):
+            event.listen(target, name, fn)
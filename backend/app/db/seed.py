@@ -29,14 +29,16 @@ QUOTES = [
 def seed() -> None:
     db = SessionLocal()
     try:
-        for data in ARTICLES:
-            crud.article.create(db, obj_in=schemas.ArticleCreate(**data))
-
-        for data in AUDIO_TRACKS:
-            crud.audio_track.create(db, obj_in=schemas.AudioTrackCreate(**data))
-
-        for data in QUOTES:
-            crud.motivational_quote.create(db, obj_in=schemas.MotivationalQuoteCreate(**data))
+        # Satu insert + commit per tabel, bukan per baris
+        crud.article.create_many(
+            db, objs_in=[schemas.ArticleCreate(**data) for data in ARTICLES]
+        )
+        crud.audio_track.create_many(
+            db, objs_in=[schemas.AudioTrackCreate(**data) for data in AUDIO_TRACKS]
+        )
+        crud.motivational_quote.create_many(
+            db, objs_in=[schemas.MotivationalQuoteCreate(**data) for data in QUOTES]
+        )
     finally:
         db.close()
 
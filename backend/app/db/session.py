@@ -1,6 +1,98 @@
+from typing import Any, Dict, Tuple
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.core.config import settings
+from app.core.config import Settings, settings
+from app.db.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+
+
+def get_async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL to the equivalent async driver URL."""
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+def pool_limits(config: Settings) -> Tuple[int, int]:
+    """(pool_size, max_overflow) untuk satu engine di satu worker."""
+    if config.DB_MAX_CONNECTIONS:
+        # Dua engine (sync + async) per worker berbagi anggaran koneksi
+        per_engine = config.DB_MAX_CONNECTIONS // (max(config.WEB_CONCURRENCY, 1) * 2)
+        return max(per_engine, 1), 0
+    return config.DB_POOL_SIZE, config.DB_MAX_OVERFLOW
+
+
+def engine_options(url: str, config: Settings, *, is_async: bool = False) -> Dict[str, Any]:
+    """Argumen ``create_engine`` sesuai dialek dan ``Settings``."""
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        # SQLite tidak punya server pool/timeout; cukup izinkan lintas thread
+        # (threadpool FastAPI) dan tunggu lock tulis alih-alih langsung gagal
+        connect_args: Dict[str, Any] = {"timeout": config.DB_SQLITE_BUSY_TIMEOUT}
+        if not is_async:
+            connect_args["check_same_thread"] = False
+        return {"connect_args": connect_args}
 
-engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False})
+    pool_size, max_overflow = pool_limits(config)
+    options: Dict[str, Any] = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+    }
+    if backend == "postgresql" and config.DB_STATEMENT_TIMEOUT_MS:
+        timeout = str(config.DB_STATEMENT_TIMEOUT_MS)
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL, settings))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Jalur async untuk endpoint `async def` agar query tidak memblokir event loop
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, settings, is_async=True)
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+# Replika baca (opsional); tanpa DATABASE_REPLICA_URL sama dengan primary
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_engine(
+        settings.DATABASE_REPLICA_URL,
+        **engine_options(settings.DATABASE_REPLICA_URL, settings),
+    )
+    ASYNC_DATABASE_REPLICA_URL = settings.ASYNC_DATABASE_REPLICA_URL or get_async_database_url(
+        settings.DATABASE_REPLICA_URL
+    )
+    async_replica_engine = create_async_engine(
+        ASYNC_DATABASE_REPLICA_URL,
+        **engine_options(ASYNC_DATABASE_REPLICA_URL, settings, is_async=True),
+    )
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    AsyncReadSessionLocal = async_sessionmaker(
+        bind=async_replica_engine, autoflush=False, expire_on_commit=False
+    )
+else:
+    replica_engine = engine
+    async_replica_engine = async_engine
+    ReadSessionLocal = SessionLocal
+    AsyncReadSessionLocal = AsyncSessionLocal
+
+
+def dispose_engines_after_fork() -> None:
+    """Dipanggil di proses anak setelah fork (worker Celery prefork)."""
+    for pooled in {engine, replica_engine, async_engine.sync_engine, async_replica_engine.sync_engine}:
+        pooled.dispose(close=False)
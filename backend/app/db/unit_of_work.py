@@ -0,0 +1,123 @@
+"""
+Unit-of-work per permintaan HTTP.
+
+Session dari ``get_db``/``get_async_db`` ditandai ``Session.info[UNIT_OF_WORK]``
+sehingga CRUD hanya melakukan ``flush`` (PK dan default terisi dari INSERT /
+RETURNING, tanpa ``refresh``). ``UnitOfWorkMiddleware`` melakukan satu commit
+tepat sebelum status respons dikirim: commit yang gagal tetap menjadi 500,
+bukan 200 yang datanya hilang. Tulisan setelah respons mulai dikirim (mis.
+SSE) di-commit saat dependency ditutup.
+
+Session tanpa tanda ini (Celery, seed, override di test) tetap commit per
+operasi seperti sebelumnya.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, List, Union
+
+from sqlalchemy.exc import MissingGreenlet
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+UNIT_OF_WORK = "unit_of_work"
+_STATE_KEY = "db_sessions"
+
+AnySession = Union[Session, AsyncSession]
+
+
+def is_unit_of_work(db: AnySession) -> bool:
+    return bool(db.info.get(UNIT_OF_WORK))
+
+
+def register_session(request: Request, db: AnySession) -> bool:
+    """
+    Ikutkan ``db`` dalam unit-of-work permintaan ini. False bila middleware
+    tidak terpasang (session lalu tetap commit per operasi).
+    """
+    sessions = getattr(request.state, _STATE_KEY, None)
+    if sessions is None:
+        return False
+    db.info[UNIT_OF_WORK] = True
+    sessions.append(db)
+    return True
+
+
+def run_from_session_event(
+    sync_fn: Callable[[], None], async_fn: Callable[[], Awaitable[None]]
+) -> None:
+    """
+    Jalankan I/O dari event session (sinkron), mis. invalidasi cache setelah
+    commit. Untuk ``AsyncSession`` event berjalan di greenlet di dalam event
+    loop: ``async_fn`` dijalankan lewat ``await_`` agar loop tidak diblokir
+    client sinkron. Di luar event loop ``sync_fn``.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        sync_fn()
+        return
+    try:
+        await_(async_fn())
+    except MissingGreenlet:
+        # Session sinkron yang dipakai di dalam coroutine (mis. test/skrip)
+        sync_fn()
+
+
+async def commit_sessions(sessions: List[AnySession]) -> None:
+    for db in sessions:
+        if isinstance(db, AsyncSession):
+            await db.commit()
+        else:
+            # Session sinkron: commit (I/O + fsync) jangan memblokir event loop
+            await run_in_threadpool(db.commit)
+
+
+async def rollback_sessions(sessions: List[AnySession]) -> None:
+    for db in sessions:
+        if isinstance(db, AsyncSession):
+            await db.rollback()
+        else:
+            await run_in_threadpool(db.rollback)
+
+
+async def release_connection_async(db: AsyncSession) -> None:
+    """
+    Commit lebih awal agar koneksi kembali ke pool sebelum menunggu I/O lama
+    (mis. panggilan LLM); tulisan berikutnya membuka transaksi baru.
+    """
+    if is_unit_of_work(db) and db.in_transaction():
+        await db.commit()
+
+
+async def commit_request(request: Request) -> None:
+    """Commit lebih awal, mis. sebelum respons disimpan untuk idempotency."""
+    await commit_sessions(getattr(request.state, _STATE_KEY, None) or [])
+
+
+class UnitOfWorkMiddleware:
+    """Commit (status < 400) atau rollback semua session permintaan sebelum header respons dikirim."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        sessions: List[Any] = []
+        scope.setdefault("state", {})[_STATE_KEY] = sessions
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                if message["status"] < 400:
+                    await commit_sessions(sessions)
+                else:
+                    await rollback_sessions(sessions)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,24 +1,74 @@
-from typing import Generator
-from fastapi import Depends, HTTPException, status
+import secrets
+from typing import AsyncGenerator, Generator
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Session
 
-from app import crud, models, schemas
+from app import crud, schemas
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.core.openrouter import OpenRouterClient
+from app.db.replica import recently_wrote, replica_enabled
+from app.db.session import AsyncReadSessionLocal, AsyncSessionLocal, ReadSessionLocal, SessionLocal
+from app.db.unit_of_work import register_session
 
 reusable_oauth2 = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-def get_db() -> Generator:
+def get_db(request: Request) -> Generator:
+    # Unit-of-work: CRUD hanya flush, UnitOfWorkMiddleware commit sekali
+    # sebelum respons dikirim; commit di sini menangkap tulisan sesudahnya
+    db = SessionLocal()
+    register_session(request, db)
     try:
-        db = SessionLocal()
         yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)) -> models.User:
+async def get_async_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        register_session(request, db)
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+def get_async_session_factory() -> async_sessionmaker:
+    """
+    Pabrik session primary untuk pekerjaan yang bisa hidup lebih lama dari
+    permintaannya (mis. rebuild feed single-flight yang ditunggu permintaan lain).
+    """
+    return AsyncSessionLocal
+
+def get_read_db() -> Generator:
+    """Session baca-saja untuk konten bersama (artikel, audio, kutipan): replika bila ada."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+def get_openrouter_client(request: Request) -> OpenRouterClient:
+    """Return the app-scoped OpenRouter client created in the lifespan."""
+    client = getattr(request.app.state, "openrouter_client", None)
+    if client is None or client.is_closed:
+        # Lifespan did not run (e.g. TestClient without a context manager)
+        client = OpenRouterClient(settings)
+        request.app.state.openrouter_client = client
+    return client
+
+def get_current_user(db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)) -> schemas.Principal:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         token_data = schemas.TokenPayload(**payload)
@@ -27,7 +77,41 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(reusabl
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = crud.user.get(db, id=token_data.sub)
+    # Cache principal: tanpa query DB selama masih hangat (session belum
+    # membuka koneksi bila tidak dipakai)
+    user = crud.user.get_principal(db, id=int(token_data.sub))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    if not user.is_active:
+        raise HTTPException(status_code=403, detail="Inactive user")
     return user
+
+def verify_monitoring_token(x_monitoring_token: str | None = Header(default=None)) -> None:
+    """Endpoint monitoring hanya untuk scraper internal yang memegang MONITORING_TOKEN."""
+    expected = settings.MONITORING_TOKEN
+    if not expected or not x_monitoring_token or not secrets.compare_digest(
+        x_monitoring_token.encode(), expected.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+
+def _reads_from_primary(user: schemas.Principal) -> bool:
+    # Read-your-writes: setelah pengguna menulis, replika mungkin belum menyusul
+    return not replica_enabled() or recently_wrote(user.id)
+
+def get_user_read_db(current_user: schemas.Principal = Depends(get_current_user)) -> Generator:
+    """Session baca-saja untuk data milik pengguna, dengan read-your-writes."""
+    db = SessionLocal() if _reads_from_primary(current_user) else ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_user_async_read_db(
+    current_user: schemas.Principal = Depends(get_current_user),
+) -> AsyncGenerator[AsyncSession, None]:
+    session_factory = AsyncSessionLocal if _reads_from_primary(current_user) else AsyncReadSessionLocal
+    async with session_factory() as db:
+        yield db
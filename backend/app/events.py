@@ -0,0 +1,19 @@
+"""
+Pendaftaran event session SQLAlchemy milik beberapa lapisan (read-your-writes
+replica di ``app.db``, invalidasi cache principal di ``app.crud``, invalidasi
+snapshot konteks chat dan feed beranda di ``app.services``). Dipanggil
+eksplisit saat startup API dan worker Celery, sehingga ``app.db`` tidak perlu
+mengimpor lapisan service hanya demi efek samping import.
+"""
+
+from app.crud import crud_user
+from app.db import replica
+from app.services import chat_context_service, home_feed_service
+
+
+def register_session_events() -> None:
+    """Idempoten: aman dipanggil lebih dari sekali dalam satu proses."""
+    replica.register_session_events()
+    crud_user.register_session_events()
+    chat_context_service.register_session_events()
+    home_feed_service.register_session_events()
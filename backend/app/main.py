@@ -2,21 +2,32 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.api.api import api_router
+from app.core.config import settings
+from app.core.openrouter import OpenRouterClient
+from app.core.security import shutdown_password_executor
+from app.db.unit_of_work import UnitOfWorkMiddleware
+from app.events import register_session_events
 import os
 from alembic import command
 from alembic.config import Config
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Run database migrations on startup."""
+    """Run database migrations and open shared clients on startup."""
     print("Running database migrations...")
     alembic_cfg = Config(os.path.join(os.path.dirname(__file__), "..", "alembic.ini"))
     command.upgrade(alembic_cfg, "head")
     print("Migrations complete.")
+    app.state.openrouter_client = OpenRouterClient(settings)
     yield
-    # Kode untuk dijalankan saat shutdown bisa ditambahkan di sini
+    await app.state.openrouter_client.aclose()
+    shutdown_password_executor()
+
+# Sebelum permintaan/session pertama (juga tanpa lifespan, mis. di test)
+register_session_events()
 
 app = FastAPI(title="Dear Diary API", lifespan=lifespan)
+app.add_middleware(UnitOfWorkMiddleware)
 
 app.include_router(api_router, prefix="/api/v1")
 
@@ -12,6 +12,7 @@ from .motivational_quote import MotivationalQuote
 
 # === Interaction-related Models ===
 from .chat import ChatMessage
+from .conversation_summary import ConversationSummary
 
 
 __all__ = [
@@ -22,4 +23,5 @@ __all__ = [
     "AudioTrack",
     "MotivationalQuote",
     "ChatMessage",
+    "ConversationSummary",
 ]
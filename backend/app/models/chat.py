@@ -1,5 +1,5 @@
 from enum import Enum
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SQLAlchemyEnum, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SQLAlchemyEnum, Boolean, Index
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 import datetime
@@ -10,6 +10,10 @@ class SenderType(str, Enum):
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    # Riwayat per pengguna selalu difilter owner_id dan diurutkan created_at
+    __table_args__ = (
+        Index("ix_chat_messages_owner_id_created_at", "owner_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     content = Column(String, nullable=False)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey
+from app.db.base_class import Base
+import datetime
+
+class ConversationSummary(Base):
+    """
+    Ringkasan bergulir dari giliran chat lama yang sudah tidak masuk prompt.
+    Satu baris per pengguna.
+    """
+    __tablename__ = "conversation_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False, index=True)
+    summary = Column(Text, nullable=False, default="")
+    # ID pesan chat terakhir yang sudah dilipat ke dalam ringkasan
+    last_message_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
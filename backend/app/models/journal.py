@@ -1,10 +1,22 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, Index, text
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 from app.models.user import User
 import datetime
 
 class Journal(Base):
+    # Riwayat per pengguna selalu difilter owner_id dan diurutkan created_at
+    __table_args__ = (
+        Index("ix_journals_owner_id_created_at", "owner_id", "created_at"),
+        # Antrian skor sentimen: hanya jurnal yang belum diskor (tetap kecil)
+        Index(
+            "ix_journals_unscored",
+            "id",
+            postgresql_where=text("sentiment_label IS NULL"),
+            sqlite_where=text("sentiment_label IS NULL"),
+        ),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     content = Column(Text)
@@ -1,9 +1,13 @@
 # backend/app/models/user_profile.py
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Index, text
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
-import datetime
+
+STALE_PROFILE_SQL = (
+    "last_journal_at IS NOT NULL AND (last_analyzed IS NULL OR last_journal_at > last_analyzed)"
+)
+
 
 class UserProfile(Base):
     """
@@ -11,6 +15,16 @@ class UserProfile(Base):
     Ini adalah 'memori' jangka panjang sistem tentang pengguna.
     """
     __tablename__ = "user_profiles" # Nama tabel eksplisit
+    # Profil yang perlu dianalisis ulang (jurnal lebih baru dari analisis
+    # terakhir): batch periodik memindai indeks parsial ini, bukan jurnal
+    __table_args__ = (
+        Index(
+            "ix_user_profiles_stale",
+            "user_id",
+            postgresql_where=text(STALE_PROFILE_SQL),
+            sqlite_where=text(STALE_PROFILE_SQL),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False, index=True)
@@ -22,4 +36,15 @@ class UserProfile(Base):
     emerging_themes = Column(JSON, comment="Tema dominan dari jurnal & chat pengguna. Cth: {'pekerjaan': 0.8}")
     sentiment_trend = Column(String, comment="Tren sentimen pengguna. Cth: 'meningkat', 'menurun', 'stabil'")
 
-    last_analyzed = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
\ No newline at end of file
+    # Agregat inkremental, diperbarui setiap jurnal dibuat/dihapus (O(1) per
+    # tulisan); emerging_themes dan sentiment_trend diturunkan dari sini
+    mood_counts = Column(JSON, comment="Jumlah jurnal per mood. Cth: {'senang': 3, 'sedih': 1}")
+    last_mood = Column(String, comment="Mood jurnal terbaru")
+    last_journal_at = Column(DateTime, comment="created_at jurnal terbaru")
+
+    # Hanya ditulis oleh analisis ulang (profile_analyzer.analyze_user), bukan
+    # oleh setiap update agregat; NULL = belum pernah dianalisis
+    last_analyzed = Column(DateTime)
+    # Diisi batch periodik saat pengguna dikirim ke worker; selama klaim ini
+    # berlaku (dan belum ada analisis sesudahnya) run berikutnya melewatinya
+    analysis_claimed_at = Column(DateTime)
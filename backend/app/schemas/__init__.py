@@ -1,4 +1,4 @@
-from .user import UserBase, UserCreate, UserUpdate, UserInDB, UserPublic, UserLogin
+from .user import UserBase, UserCreate, UserUpdate, UserInDB, UserPublic, UserLogin, Principal
 from .journal import JournalBase, JournalCreate, JournalUpdate, JournalInDB
 from .token import Token, TokenPayload
 from .chat import ChatMessage
@@ -13,6 +13,7 @@ __all__ = [
     "UserInDB",
     "UserPublic",
     "UserLogin",
+    "Principal",
     "JournalBase",
     "JournalCreate",
     "JournalUpdate",
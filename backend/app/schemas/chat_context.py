@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+from app.schemas.user_profile import UserProfile
+
+
+class ChatContextMessage(BaseModel):
+    id: int
+    role: str
+    content: str
+
+
+class ChatContextSnapshot(BaseModel):
+    """Konteks yang dibutuhkan satu giliran chat, disimpan di cache per pengguna."""
+    profile: Optional[UserProfile] = None
+    latest_journal: str = ""
+    messages: List[ChatContextMessage] = []
+    # Ringkasan bergulir giliran lama + ID pesan terakhir yang sudah diringkas
+    summary: str = ""
+    summary_last_message_id: int = 0
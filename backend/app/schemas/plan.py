@@ -17,3 +17,9 @@ class CommunicationTechnique(str, Enum):
 
 class ConversationPlan(BaseModel):
     technique: CommunicationTechnique = Field(..., description="The communication technique chosen by the planner AI.")
+
+class PlannedResponse(BaseModel):
+    """Hasil mode gabungan: teknik yang dipilih sekaligus balasan untuk pengguna."""
+
+    technique: CommunicationTechnique = Field(..., description="The communication technique applied in the reply.")
+    reply: str = Field(..., description="The counselor reply shown to the user.")
@@ -21,6 +21,13 @@ class UserInDB(UserBase):
 class UserPublic(UserBase):
     id: int
 
+class Principal(UserBase):
+    """Pengguna terautentikasi (tanpa hash password), aman untuk di-cache."""
+    id: int
+    is_active: bool = True
+
+    model_config = ConfigDict(from_attributes=True)
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
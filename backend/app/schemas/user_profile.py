@@ -16,7 +16,7 @@ class UserProfile(UserProfileBase):
     """Schema umum untuk konsumsi eksternal (misal: di API response)."""
     id: int
     user_id: int
-    last_analyzed: datetime
+    last_analyzed: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -0,0 +1,225 @@
+"""
+Snapshot konteks chat per pengguna: ringkasan profil, jurnal terbaru, dan
+jendela bergulir pesan terakhir. Snapshot diperbarui saat ada penulisan lewat
+CRUD (pesan/jurnal baru) sehingga jalur chat tidak perlu query baca sama
+sekali selama cache masih hangat.
+"""
+
+from typing import Any, Optional, Union
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from app.core.cache import TieredCache
+from app.core.config import settings
+from app.db.unit_of_work import is_unit_of_work, run_from_session_event
+from app.models.chat import ChatMessage
+from app.models.conversation_summary import ConversationSummary
+from app.models.journal import Journal
+from app.models.user_profile import UserProfile
+from app.schemas.chat_context import ChatContextMessage, ChatContextSnapshot
+
+# Session.info: pemilik snapshot yang sudah diperbarui dari tulisan yang
+# belum di-commit (unit-of-work); dibatalkan bila transaksi tidak di-commit
+_PENDING_OWNERS = "chat_context_pending_owners"
+# Session.info: pemilik yang snapshot-nya dibuang setelah transaksi utama
+# berakhir (commit maupun rollback), bukan sebelum commit: permintaan lain
+# bisa memuat ulang snapshot dari keadaan sebelum commit lalu menyimpannya
+_STALE_OWNERS = "chat_context_stale_owners"
+
+
+def _to_context_message(message: ChatMessage) -> ChatContextMessage:
+    return ChatContextMessage(
+        id=message.id,
+        role=message.sender_type.value,
+        content=message.content,
+    )
+
+
+class ChatContextCache:
+    def __init__(self, cache: TieredCache, window: int):
+        self.cache = cache
+        self.window = window
+
+    async def _load_async(self, db: AsyncSession, user_id: int) -> ChatContextSnapshot:
+        profile = (
+            await db.execute(select(UserProfile).where(UserProfile.user_id == user_id))
+        ).scalars().first()
+        latest_journal = (
+            await db.execute(
+                select(Journal.content)
+                .where(Journal.owner_id == user_id)
+                .order_by(Journal.created_at.desc())
+                .limit(1)
+            )
+        ).scalar()
+        messages = (
+            await db.execute(
+                select(ChatMessage)
+                .where(ChatMessage.owner_id == user_id)
+                .order_by(ChatMessage.created_at.desc())
+                .limit(self.window)
+            )
+        ).scalars().all()
+        summary = (
+            await db.execute(
+                select(ConversationSummary).where(ConversationSummary.user_id == user_id)
+            )
+        ).scalars().first()
+
+        return ChatContextSnapshot(
+            profile=profile,
+            latest_journal=latest_journal or "",
+            messages=[_to_context_message(m) for m in reversed(messages)],
+            summary=summary.summary if summary else "",
+            summary_last_message_id=summary.last_message_id if summary else 0,
+        )
+
+    async def get_snapshot_async(self, db: AsyncSession, user_id: int) -> ChatContextSnapshot:
+        data = await self.cache.get_async(user_id)
+        if data is not None:
+            return ChatContextSnapshot.model_validate(data)
+
+        snapshot = await self._load_async(db, user_id)
+        await self.cache.set_async(user_id, snapshot.model_dump(mode="json"))
+        return snapshot
+
+    # --- Pembaruan saat penulisan ------------------------------------------
+    # Dalam unit-of-work snapshot diperbarui setelah flush (agar giliran yang
+    # sama langsung melihat pesannya); bila transaksi batal, snapshot pemilik
+    # tersebut dibuang lewat event session di bawah.
+
+    def track_pending(self, db: Union[Session, AsyncSession, None], owner_id: int) -> None:
+        if db is not None and is_unit_of_work(db):
+            db.info.setdefault(_PENDING_OWNERS, set()).add(owner_id)
+
+    # Baca-ubah-tulis atomik lewat ``TieredCache.update`` (WATCH/MULTI di
+    # Redis, sumber kebenaran antar worker): dua giliran bersamaan untuk
+    # pengguna yang sama tidak saling menimpa. Snapshot yang belum ada tidak
+    # dibuat dari tulisan; dimuat penuh pada baca berikutnya.
+
+    def _append_message(self, message: ChatMessage):
+        def apply(data: Any) -> Optional[dict]:
+            if data is None:
+                return None
+            snapshot = ChatContextSnapshot.model_validate(data)
+            snapshot.messages.append(_to_context_message(message))
+            snapshot.messages = snapshot.messages[-self.window:]
+            return snapshot.model_dump(mode="json")
+        return apply
+
+    def _set_latest_journal(self, journal: Journal):
+        content = journal.content or ""
+
+        def apply(data: Any) -> Optional[dict]:
+            if data is None:
+                return None
+            snapshot = ChatContextSnapshot.model_validate(data)
+            snapshot.latest_journal = content
+            return snapshot.model_dump(mode="json")
+        return apply
+
+    def _set_summary(self, summary: str, last_message_id: int):
+        def apply(data: Any) -> Optional[dict]:
+            if data is None:
+                return None
+            snapshot = ChatContextSnapshot.model_validate(data)
+            snapshot.summary = summary
+            snapshot.summary_last_message_id = last_message_id
+            return snapshot.model_dump(mode="json")
+        return apply
+
+    def record_message(self, owner_id: int, message: ChatMessage) -> None:
+        self.track_pending(object_session(message), owner_id)
+        self.cache.update(owner_id, self._append_message(message))
+
+    async def record_message_async(self, owner_id: int, message: ChatMessage) -> None:
+        self.track_pending(object_session(message), owner_id)
+        await self.cache.update_async(owner_id, self._append_message(message))
+
+    def record_journal(self, owner_id: int, journal: Journal) -> None:
+        self.track_pending(object_session(journal), owner_id)
+        self.cache.update(owner_id, self._set_latest_journal(journal))
+
+    async def record_journal_async(self, owner_id: int, journal: Journal) -> None:
+        self.track_pending(object_session(journal), owner_id)
+        await self.cache.update_async(owner_id, self._set_latest_journal(journal))
+
+    async def record_summary_async(self, owner_id: int, summary: str, last_message_id: int) -> None:
+        await self.cache.update_async(owner_id, self._set_summary(summary, last_message_id))
+
+    def invalidate_after_commit(self, db: Union[Session, AsyncSession], owner_id: int) -> None:
+        """``invalidate`` yang ditunda sampai transaksi unit-of-work selesai."""
+        if is_unit_of_work(db):
+            db.info.setdefault(_STALE_OWNERS, set()).add(owner_id)
+        else:
+            # Di luar unit-of-work tulisan sudah di-commit oleh persist()
+            self.invalidate(owner_id)
+
+    async def invalidate_after_commit_async(self, db: AsyncSession, owner_id: int) -> None:
+        if is_unit_of_work(db):
+            db.info.setdefault(_STALE_OWNERS, set()).add(owner_id)
+        else:
+            await self.invalidate_async(owner_id)
+
+    def invalidate(self, owner_id: int) -> None:
+        self.cache.delete(owner_id)
+
+    async def invalidate_async(self, owner_id: int) -> None:
+        await self.cache.delete_async(owner_id)
+
+    async def invalidate_many_async(self, owner_ids) -> None:
+        for owner_id in owner_ids:
+            await self.cache.delete_async(owner_id)
+
+
+def _invalidate_from_event(owner_ids) -> None:
+    if not owner_ids:
+        return
+
+    def invalidate() -> None:
+        for owner_id in owner_ids:
+            chat_context_cache.invalidate(owner_id)
+
+    run_from_session_event(invalidate, lambda: chat_context_cache.invalidate_many_async(owner_ids))
+
+
+def _clear_pending_owners(session: Session) -> None:
+    # Hanya commit transaksi utama (event ini juga dipanggil saat savepoint dilepas)
+    if session.in_nested_transaction():
+        return
+    session.info.pop(_PENDING_OWNERS, None)
+
+
+def _invalidate_uncommitted_owners(session: Session, transaction) -> None:
+    # Transaksi utama berakhir: snapshot yang diperbarui dari tulisan yang
+    # tidak jadi di-commit (rollback/close) dan snapshot yang ditandai usang
+    if transaction.parent is None:
+        _invalidate_from_event(
+            set(session.info.pop(_PENDING_OWNERS, ())) | set(session.info.pop(_STALE_OWNERS, ()))
+        )
+
+
+_SESSION_EVENTS = (
+    (Session, "after_commit", _clear_pending_owners),
+    (Session, "after_transaction_end", _invalidate_uncommitted_owners),
+)
+
+
+def register_session_events() -> None:
+    """Pasang event invalidasi snapshot konteks chat pada semua session (idempoten)."""
+    for target, name, fn in _SESSION_EVENTS:
+        if not event.contains(target, name, fn):
+            event.listen(target, name, fn)
+
+
+chat_context_cache = ChatContextCache(
+    TieredCache(
+        "chat-context",
+        maxsize=settings.CHAT_CONTEXT_CACHE_SIZE,
+        ttl=settings.CHAT_CONTEXT_CACHE_TTL,
+        local_ttl=settings.CHAT_CONTEXT_LOCAL_TTL,
+    ),
+    window=settings.CHAT_CONTEXT_WINDOW,
+)
@@ -1,16 +1,27 @@
-import httpx
+import json
 import structlog
-from typing import List, Dict
+from typing import Any, AsyncIterator, List, Dict, Optional, Tuple
 
 from fastapi import Depends
 from app.core.config import Settings, settings
-from app.schemas.plan import ConversationPlan
+from app.core.openrouter import OpenRouterClient
+from app.dependencies import get_openrouter_client
+from app.models.user_profile import UserProfile
+from app.schemas.plan import CommunicationTechnique, ConversationPlan, PlannedResponse
+from app.services.planner_service import format_profile_summary
+
+EMPTY_RESPONSE_FALLBACK = "Maaf, aku belum bisa memberikan tanggapan. Bisa kamu ceritakan sedikit lagi?"
+ERROR_RESPONSE_FALLBACK = "Maaf, ada gangguan teknis. I'm listening, bisa kamu ulangi lagi?"
 
 
 class GeneratorService:
-    def __init__(self, settings: Settings = Depends(lambda: settings)):
+    def __init__(
+        self,
+        settings: Settings = Depends(lambda: settings),
+        openrouter: OpenRouterClient = Depends(get_openrouter_client),
+    ):
         self.settings = settings
-        self.api_base_url = "https://openrouter.ai/api/v1"
+        self.openrouter = openrouter
         self.log = structlog.get_logger(__name__)
 
         # Teknik komunikasi yang tersedia
@@ -26,61 +37,80 @@ class GeneratorService:
             "unknown": "Ask a simple open question like 'Could you tell me more?'",
         }
 
-    async def _call_openrouter(self, model: str, messages: List[Dict[str, str]]) -> Dict:
+    async def _call_openrouter(
+        self, model: str, messages: List[Dict[str, str]], **options: Any
+    ) -> Dict:
         """Kirim permintaan ke OpenRouter API"""
         headers = {
             "Authorization": f"Bearer {self.settings.OPENROUTER_API_KEY}"
         }
-        json_data = {
-            "model": model,
-            "messages": messages
+        return await self.openrouter.complete(
+            models=[model, *self.settings.GENERATOR_FALLBACK_MODELS],
+            messages=messages,
+            headers=headers,
+            **options,
+        )
+
+    async def _stream_openrouter(
+        self, model: str, messages: List[Dict[str, str]]
+    ) -> AsyncIterator[str]:
+        """Kirim permintaan streaming ke OpenRouter API"""
+        headers = {
+            "Authorization": f"Bearer {self.settings.OPENROUTER_API_KEY}"
         }
+        async for token in self.openrouter.stream_complete(
+            models=[model, *self.settings.GENERATOR_FALLBACK_MODELS],
+            messages=messages,
+            headers=headers,
+        ):
+            yield token
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.api_base_url}/chat/completions",
-                headers=headers,
-                json=json_data,
-                timeout=20.0,
-            )
-            response.raise_for_status()
-            return response.json()
+    def _persona_prompt(self) -> str:
+        return (
+            "Kamu adalah dr. Stone, Konselor yang suportif dan responsif secara emosional. "
+            "Selalu jawab dalam Bahasa Indonesia yang santai dan penuh empati. "
+            "Balasanmu harus singkat, 2-3 kalimat, tanpa memberi judgement. "
+            "Jangan sertakan deskripsi tindakan atau narasi dalam tanda bintang (contoh: *menghela nafas*). "
+            "Gunakan emotikon Jepang (kaomoji) mengekspresikan perasaan. "
+        )
 
-    async def generate_response(
+    def _build_messages(
             self,
             plan: ConversationPlan,
             history: List[Dict[str, str]],
             emotion: str,
-    ) -> str:
-        """Menghasilkan respons dari model berdasarkan riwayat chat dan teknik yang dipilih"""
-        self.log.info("generating_response", technique=plan.technique.value)
-
+    ) -> List[Dict[str, str]]:
+        """Susun system prompt + riwayat chat untuk teknik yang dipilih"""
         technique_instruction = self.TOOLBOX.get(
             plan.technique.value, self.TOOLBOX["unknown"]
         )
 
-        chat_history_str = "\n".join(
-            f"{msg['role']}: {msg['content']}" for msg in history
-        )
+        # Riwayat dikirim sebagai `messages`, jadi tidak diulang di system prompt
         user_message = history[-1]["content"] if history else ""
 
         prompt = (
-            "Kamu adalah dr. Stone, Konselor yang suportif dan responsif secara emosional. "
-            "Selalu jawab dalam Bahasa Indonesia yang santai dan penuh empati. "
-            "Balasanmu harus singkat, 2-3 kalimat, tanpa memberi judgement. "
-            "Jangan sertakan deskripsi tindakan atau narasi dalam tanda bintang (contoh: *menghela nafas*). "
-            "Gunakan emotikon Jepang (kaomoji) mengekspresikan perasaan. "
+            self._persona_prompt() +
             "Variasikan teknik komunikasi yang ditetapkan agar percakapan terasa alami. "
             "Gunakan hanya informasi berikut sebagai konteks dan jangan menambahkan detail yang tidak disebutkan. "
             "JANGAN kosong.\n\n"
-            f"Riwayat chat:\n{chat_history_str}\n\n"
             f"Pesan pengguna terbaru:\n{user_message}\n\n"
             f"**Emosi pengguna:** {emotion}\n"
             f"**Teknik:** {plan.technique.value}\n"
             f"**Cara menerapkan:** {technique_instruction}"
         )
 
-        messages = [{"role": "system", "content": prompt}] + history
+        return [{"role": "system", "content": prompt}] + history
+
+    async def generate_response(
+            self,
+            plan: ConversationPlan,
+            history: List[Dict[str, str]],
+            emotion: str,
+    ) -> str:
+        """Menghasilkan respons dari model berdasarkan riwayat chat dan teknik yang dipilih"""
+        self.log.info("generating_response", technique=plan.technique.value)
+
+        messages = self._build_messages(plan, history, emotion)
 
         try:
             data = await self._call_openrouter(
@@ -90,11 +120,105 @@ class GeneratorService:
             content = data["choices"][0]["message"]["content"].strip()
 
             if not content:
-                self.log.error("generator_empty_response", prompt=prompt, technique=plan.technique.value)
-                return "Maaf, aku belum bisa memberikan tanggapan. Bisa kamu ceritakan sedikit lagi?"
+                self.log.error("generator_empty_response", prompt=messages[0]["content"], technique=plan.technique.value)
+                return EMPTY_RESPONSE_FALLBACK
 
             return content
 
         except Exception as e:
             self.log.error("generator_service_error", error=str(e))
-            return "Maaf, ada gangguan teknis. I'm listening, bisa kamu ulangi lagi?"
+            return ERROR_RESPONSE_FALLBACK
+
+    async def stream_response(
+            self,
+            plan: ConversationPlan,
+            history: List[Dict[str, str]],
+            emotion: str,
+    ) -> AsyncIterator[str]:
+        """
+        Versi streaming dari ``generate_response``: hasilkan token segera
+        setelah diterima. Jika gagal sebelum ada token yang terkirim, hasilkan
+        pesan fallback yang sama dengan versi non-streaming.
+        """
+        self.log.info("streaming_response", technique=plan.technique.value)
+
+        messages = self._build_messages(plan, history, emotion)
+        sent_any = False
+
+        try:
+            async for token in self._stream_openrouter(
+                model=self.settings.GENERATOR_MODEL_NAME,
+                messages=messages,
+            ):
+                if not sent_any:
+                    # Buang spasi di awal agar hasil akhir sama dengan .strip()
+                    token = token.lstrip()
+                    if not token:
+                        continue
+                sent_any = True
+                yield token
+        except Exception as e:
+            self.log.error("generator_stream_error", error=str(e))
+            if not sent_any:
+                yield ERROR_RESPONSE_FALLBACK
+            return
+
+        if not sent_any:
+            self.log.error("generator_empty_response", prompt=messages[0]["content"], technique=plan.technique.value)
+            yield EMPTY_RESPONSE_FALLBACK
+
+    async def plan_and_generate(
+            self,
+            history: List[Dict[str, str]],
+            emotion: str,
+            latest_journal: str,
+            user_profile: Optional[UserProfile],
+    ) -> Tuple[ConversationPlan, str]:
+        """
+        Mode gabungan: satu panggilan LLM dengan output terstruktur yang memilih
+        teknik komunikasi sekaligus menulis balasannya, menggantikan dua
+        panggilan berurutan planner -> generator.
+        """
+        self.log.info("planning_and_generating_response")
+
+        toolbox = "\n".join(
+            f"- {name}: {instruction}"
+            for name, instruction in self.TOOLBOX.items()
+            if name != CommunicationTechnique.UNKNOWN.value
+        )
+        user_message = history[-1]["content"] if history else ""
+        prompt = (
+            self._persona_prompt() +
+            "Pertama pilih SATU teknik komunikasi yang paling sesuai dari daftar berikut, "
+            "lalu tulis balasan dengan menerapkan teknik itu.\n\n"
+            f"Teknik yang tersedia:\n{toolbox}\n\n"
+            f"Profil pengguna:{format_profile_summary(user_profile)}\n"
+            f"Entri jurnal terbaru pengguna: {latest_journal or 'Tidak ada'}\n"
+            f"Pesan pengguna terbaru:\n{user_message}\n"
+            f"**Emosi pengguna:** {emotion}\n\n"
+            'Balas HANYA dengan objek JSON: {"technique": "<name>", "reply": "<balasan>"}.'
+        )
+        messages = [{"role": "system", "content": prompt}] + history
+
+        try:
+            data = await self._call_openrouter(
+                model=self.settings.GENERATOR_MODEL_NAME,
+                messages=messages,
+                response_format={"type": "json_object"},
+            )
+            content = data["choices"][0]["message"]["content"].strip()
+
+            # Bersihkan jika response dibungkus dalam blok kode Markdown
+            if content.startswith("```"):
+                content = content.strip("`").removeprefix("json").strip()
+
+            planned = PlannedResponse.model_validate(json.loads(content))
+            reply = planned.reply.strip()
+            if not reply:
+                self.log.error("generator_empty_response", technique=planned.technique.value)
+                reply = EMPTY_RESPONSE_FALLBACK
+            return ConversationPlan(technique=planned.technique), reply
+
+        except Exception as e:
+            self.log.error("generator_combined_error", error=str(e))
+            return ConversationPlan(technique=CommunicationTechnique.UNKNOWN), ERROR_RESPONSE_FALLBACK
@@ -0,0 +1,159 @@
+"""
+Cache feed beranda (artikel, audio, kutipan) yang sudah dirakit dan
+diserialisasi, dengan invalidasi berversi.
+
+Setiap commit yang mengubah salah satu tabel konten menaikkan nomor versi
+(``INCR`` di Redis, counter lokal tanpa Redis); feed disimpan di bawah kunci
+versinya sehingga entri lama tidak perlu dihapus satu per satu dan habis
+sendiri oleh TTL. Rebuild saat cache kosong dijalankan sekali per worker
+(single-flight): permintaan lain untuk versi yang sama menunggu hasilnya.
+"""
+
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+import redis
+import structlog
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.cache import TieredCache
+from app.core.config import settings
+from app.models.article import Article
+from app.models.audio import AudioTrack
+from app.models.motivational_quote import MotivationalQuote
+
+log = structlog.get_logger(__name__)
+
+FEED_MODELS = (Article, AudioTrack, MotivationalQuote)
+
+# Session.info: transaksi ini mengubah konten feed
+_FEED_CHANGED = "home_feed_changed"
+
+_VERSION_KEY = "version"
+
+
+def make_etag(body: str) -> str:
+    return '"' + hashlib.sha256(body.encode()).hexdigest()[:32] + '"'
+
+
+class HomeFeedCache:
+    def __init__(self, cache: TieredCache):
+        self.cache = cache
+        # Rebuild yang sedang berjalan di worker ini: versi -> task (body, etag)
+        self._inflight: Dict[int, "asyncio.Task[Tuple[str, str]]"] = {}
+
+    # --- Versi ---------------------------------------------------------------
+
+    async def get_version_async(self) -> int:
+        # Tier lokal dipercaya selama local_ttl: bump dari worker lain terlihat
+        # paling lambat setelah itu
+        return int(await self.cache.get_async(_VERSION_KEY) or 0)
+
+    def bump_version(self) -> None:
+        full_key = self.cache._key(_VERSION_KEY)
+        client = self.cache.redis
+        if client is not None:
+            try:
+                version = int(client.incr(full_key))
+                self.cache.local.set(full_key, version, ttl=self.cache._local_ttl(True))
+                return
+            except redis.RedisError as e:
+                log.warning("home_feed_redis_error", op="incr", error=str(e))
+        # Tanpa Redis counter lokal tidak boleh kedaluwarsa (kembali ke versi lama)
+        version = int(self.cache.local.get(full_key) or 0) + 1
+        self.cache.local.set(full_key, version)
+
+    # --- Feed ------------------------------------------------------------------
+
+    async def get_or_build_async(
+        self, build: Callable[[], Awaitable[Any]]
+    ) -> Tuple[str, str]:
+        """
+        (body JSON, ETag) untuk versi saat ini; ``build`` dipanggil bila kosong.
+        ``build`` dijalankan sebagai task milik cache, bukan milik pemanggil:
+        pemanggil yang dibatalkan (klien putus) tidak membatalkan rebuild
+        yang juga ditunggu permintaan lain.
+        """
+        version = await self.get_version_async()
+        cached = await self.cache.get_async(f"feed:{version}")
+        if cached is not None:
+            return cached["body"], cached["etag"]
+
+        task = self._inflight.get(version)
+        if task is None:
+            task = asyncio.ensure_future(self._build(version, build))
+            self._inflight[version] = task
+            task.add_done_callback(lambda done: self._forget(version, done))
+        return await asyncio.shield(task)
+
+    async def _build(self, version: int, build: Callable[[], Awaitable[Any]]) -> Tuple[str, str]:
+        body = json.dumps(await build(), separators=(",", ":"))
+        etag = make_etag(body)
+        await self.cache.set_async(f"feed:{version}", {"body": body, "etag": etag})
+        return body, etag
+
+    def _forget(self, version: int, task: "asyncio.Task[Tuple[str, str]]") -> None:
+        if self._inflight.get(version) is task:
+            del self._inflight[version]
+        # Hindari "exception was never retrieved" bila semua penunggu sudah pergi
+        if not task.cancelled():
+            task.exception()
+
+
+home_feed_cache = HomeFeedCache(
+    TieredCache(
+        "home_feed",
+        maxsize=64,
+        ttl=settings.HOME_FEED_CACHE_TTL,
+        local_ttl=settings.HOME_FEED_LOCAL_TTL,
+    )
+)
+
+
+def _touches_feed(mappers) -> bool:
+    return any(mapper.class_ in FEED_MODELS for mapper in mappers)
+
+
+def _collect_feed_changes(session: Session, flush_context) -> None:
+    if any(isinstance(obj, FEED_MODELS) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_FEED_CHANGED] = True
+
+
+def _collect_bulk_feed_changes(orm_execute_state) -> None:
+    # insert()/update()/delete() massal (create_many, upsert, delete_many)
+    if (
+        orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+    ) and _touches_feed(orm_execute_state.all_mappers):
+        orm_execute_state.session.info[_FEED_CHANGED] = True
+
+
+def _bump_feed_version(session: Session) -> None:
+    # Hanya commit transaksi utama (event ini juga dipanggil saat savepoint dilepas)
+    if session.in_nested_transaction():
+        return
+    if session.info.pop(_FEED_CHANGED, False):
+        home_feed_cache.bump_version()
+
+
+def _discard_feed_changes(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    session.info.pop(_FEED_CHANGED, None)
+
+
+_SESSION_EVENTS = (
+    (Session, "after_flush", _collect_feed_changes),
+    (Session, "do_orm_execute", _collect_bulk_feed_changes),
+    (Session, "after_commit", _bump_feed_version),
+    (Session, "after_rollback", _discard_feed_changes),
+)
+
+
+def register_session_events() -> None:
+    """Pasang event invalidasi feed beranda pada semua session (idempoten)."""
+    for target, name, fn in _SESSION_EVENTS:
+        if not event.contains(target, name, fn):
+            event.listen(target, name, fn)
@@ -1,6 +1,5 @@
 """Utilities for generating a music keyword suggestion."""
 
-import httpx
 import structlog
 from typing import List, Dict
 from textwrap import dedent
@@ -8,32 +7,30 @@ from textwrap import dedent
 from fastapi import Depends
 
 from app.core.config import Settings, settings
+from app.core.openrouter import OpenRouterClient
+from app.dependencies import get_openrouter_client
 from app.models.journal import Journal
 
 
 class MusicKeywordService:
-    def __init__(self, settings: Settings = Depends(lambda: settings)):
+    def __init__(
+        self,
+        settings: Settings = Depends(lambda: settings),
+        openrouter: OpenRouterClient = Depends(get_openrouter_client),
+    ):
         self.settings = settings
-        self.api_base_url = "https://openrouter.ai/api/v1"
+        self.openrouter = openrouter
         self.log = structlog.get_logger(__name__)
 
     async def _call_openrouter(self, model: str, messages: List[Dict[str, str]]) -> Dict:
         headers = {
             "Authorization": f"Bearer {self.settings.OPENROUTER_API_KEY}"
         }
-        json_data = {
-            "model": model,
-            "messages": messages
-        }
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.api_base_url}/chat/completions",
-                headers=headers,
-                json=json_data,
-                timeout=20.0,
-            )
-            response.raise_for_status()
-            return response.json()
+        return await self.openrouter.complete(
+            models=[model, *self.settings.GENERATOR_FALLBACK_MODELS],
+            messages=messages,
+            headers=headers,
+        )
 
     async def generate_keyword(self, journals: List[Journal]) -> str:
         """Generate a music keyword based on the latest journal entries."""
@@ -1,18 +1,42 @@
-import httpx
 import json
 import structlog
 from typing import List, Dict, Optional
 from textwrap import dedent
 
 from fastapi import Depends
+from app.core import deadline
 from app.core.config import Settings, settings
+from app.core.openrouter import OpenRouterClient
+from app.dependencies import get_openrouter_client
 from app.schemas.plan import CommunicationTechnique, ConversationPlan
 from app.models.user_profile import UserProfile  # pastikan path ini valid
+from app.services.technique_classifier import TechniqueClassifier, get_technique_classifier
+
+def format_profile_summary(user_profile: Optional[UserProfile]) -> str:
+    """Ringkas profil psikologis pengguna untuk dimasukkan ke prompt."""
+    if not user_profile:
+        return "Profil pengguna belum dianalisis."
+    emerging = user_profile.emerging_themes or {}
+    themes_str = ", ".join(
+        f"{k} ({v:.0%})" for k, v in emerging.items()
+    ) if emerging else "Tidak tersedia"
+    sentiment = user_profile.sentiment_trend or "Tidak tersedia"
+    return f"""
+            - Tema yang sering muncul dalam hidupnya: {themes_str}
+            - Tren emosionalnya akhir-akhir ini: {sentiment}
+            """
+
 
 class PlannerService:
-    def __init__(self, settings: Settings = Depends(lambda: settings)):
+    def __init__(
+        self,
+        settings: Settings = Depends(lambda: settings),
+        openrouter: OpenRouterClient = Depends(get_openrouter_client),
+        classifier: TechniqueClassifier = Depends(get_technique_classifier),
+    ):
         self.settings = settings
-        self.api_base_url = "https://openrouter.ai/api/v1"
+        self.openrouter = openrouter
+        self.classifier = classifier
         self.log = structlog.get_logger(__name__)
 
     async def _call_openrouter(self, model: str, messages: List[Dict[str, str]]) -> Dict:
@@ -22,20 +46,34 @@ class PlannerService:
             "X-Title": self.settings.APP_NAME,
         }
 
-        json_data = {
-            "model": model,
-            "messages": messages
-        }
+        return await self.openrouter.complete(
+            models=[model, *self.settings.PLANNER_FALLBACK_MODELS],
+            messages=messages,
+            headers=headers,
+        )
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.api_base_url}/chat/completions",
-                headers=headers,
-                json=json_data,
-                timeout=20.0
+    def _get_local_plan(self, user_message: str) -> Optional[ConversationPlan]:
+        mode = self.settings.PLANNER_MODE
+        if mode not in ("hybrid", "local"):
+            return None
+
+        prediction = self.classifier.predict(user_message)
+        threshold = self.settings.PLANNER_LOCAL_CONFIDENCE_THRESHOLD
+        if mode == "local" or prediction.confidence >= threshold:
+            self.log.info(
+                "planner_local_prediction",
+                technique=prediction.technique.value,
+                confidence=prediction.confidence,
+                source=prediction.source,
             )
-            response.raise_for_status()
-            return response.json()
+            return ConversationPlan(technique=prediction.technique)
+
+        self.log.debug(
+            "planner_local_low_confidence",
+            technique=prediction.technique.value,
+            confidence=prediction.confidence,
+        )
+        return None
 
     async def get_plan(
             self,
@@ -47,18 +85,25 @@ class PlannerService:
     ) -> ConversationPlan:
         self.log.info("planning_conversation", user_message=user_message)
 
+        # === JALUR CEPAT: classifier lokal, tanpa round trip ke LLM ===
+        local_plan = self._get_local_plan(user_message)
+        if local_plan:
+            return local_plan
+
+        # Anggaran waktu tidak cukup untuk planner + generator: pakai tebakan
+        # terbaik classifier lokal agar generator tetap kebagian waktu
+        budget = deadline.remaining()
+        if budget is not None and budget < self.settings.PLANNER_MIN_BUDGET_SECONDS:
+            prediction = self.classifier.predict(user_message)
+            self.log.warning(
+                "planner_skipped_low_budget",
+                remaining=round(budget, 3),
+                technique=prediction.technique.value,
+            )
+            return ConversationPlan(technique=prediction.technique)
+
         # === KONTEKS JANGKA PANJANG (Profil Pengguna) ===
-        profile_summary = "Profil pengguna belum dianalisis."
-        if user_profile:
-            emerging = user_profile.emerging_themes or {}
-            themes_str = ", ".join(
-                f"{k} ({v:.0%})" for k, v in emerging.items()
-            ) if emerging else "Tidak tersedia"
-            sentiment = user_profile.sentiment_trend or "Tidak tersedia"
-            profile_summary = f"""
-            - Tema yang sering muncul dalam hidupnya: {themes_str}
-            - Tren emosionalnya akhir-akhir ini: {sentiment}
-            """
+        profile_summary = format_profile_summary(user_profile)
 
         # === KONTEKS JANGKA PENDEK (Percakapan & Jurnal) ===
         history_str = "\n".join(chat_history[-5:])  # 5 pesan terakhir
@@ -88,8 +133,12 @@ class PlannerService:
 
         messages = [{"role": "system", "content": prompt}]
 
+        planner_budget = (
+            budget - self.settings.GENERATOR_RESERVED_SECONDS if budget is not None else None
+        )
         try:
-            data = await self._call_openrouter(self.settings.PLANNER_MODEL_NAME, messages)
+            with deadline.deadline_scope(planner_budget):
+                data = await self._call_openrouter(self.settings.PLANNER_MODEL_NAME, messages)
             choices = data.get("choices", [])
             if not choices:
                 raise ValueError("No choices returned by OpenRouter.")
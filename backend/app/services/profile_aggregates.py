@@ -0,0 +1,139 @@
+"""
+Agregat profil inkremental: jumlah jurnal per mood dan mood terakhir per
+pengguna, diperbarui dalam transaksi yang sama dengan penulisan jurnal.
+
+Baris profil dikunci (``SELECT ... FOR UPDATE`` di Postgres; SQLite sudah
+menserialkan penulisan) sehingga dua jurnal yang dibuat bersamaan tidak saling
+menimpa hitungan. ``emerging_themes`` dan ``sentiment_trend`` diturunkan dari
+agregat ini tanpa membaca riwayat jurnal.
+"""
+
+import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import desc, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.crud.base import persist, persist_async
+from app.models.journal import Journal
+from app.models.user_profile import UserProfile
+from app.services.chat_context_service import chat_context_cache
+
+POSITIVE_MOODS = {"happy", "good", "great"}
+NEGATIVE_MOODS = {"sad", "bad", "angry"}
+
+
+def derive_themes(mood_counts: Dict[str, int]) -> Dict[str, float]:
+    total = sum(mood_counts.values())
+    if not total:
+        return {}
+    return {mood: count / total for mood, count in mood_counts.items()}
+
+
+def derive_trend(last_mood: Optional[str]) -> str:
+    recent_mood = (last_mood or "").lower()
+    if recent_mood in POSITIVE_MOODS:
+        return "meningkat"
+    if recent_mood in NEGATIVE_MOODS:
+        return "menurun"
+    return "stabil"
+
+
+def apply_aggregates(
+    profile: UserProfile,
+    mood_counts: Dict[str, int],
+    last: Tuple[Optional[str], Optional[datetime.datetime]],
+) -> None:
+    """Set agregat dan turunannya pada ``profile`` (dict baru agar JSON terdeteksi berubah)."""
+    mood_counts = {mood: count for mood, count in mood_counts.items() if count > 0}
+    profile.mood_counts = mood_counts
+    profile.last_mood, profile.last_journal_at = last
+    profile.emerging_themes = derive_themes(mood_counts)
+    profile.sentiment_trend = derive_trend(profile.last_mood)
+
+
+def _locked_profile_query(user_id: int):
+    # populate_existing: nilai dibaca ulang setelah kunci didapat
+    return (
+        select(UserProfile)
+        .where(UserProfile.user_id == user_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+
+
+def _latest_journal_query(owner_id: int):
+    return (
+        select(Journal.mood, Journal.created_at)
+        .where(Journal.owner_id == owner_id)
+        .order_by(desc(Journal.created_at), desc(Journal.id))
+        .limit(1)
+    )
+
+
+def locked_profile(db: Session, user_id: int) -> UserProfile:
+    profile = db.execute(_locked_profile_query(user_id)).scalars().first()
+    if profile is not None:
+        return profile
+    try:
+        # Savepoint: profil yang sama bisa dibuat bersamaan oleh permintaan lain
+        with db.begin_nested():
+            profile = UserProfile(user_id=user_id, mood_counts={})
+            db.add(profile)
+        return profile
+    except IntegrityError:
+        return db.execute(_locked_profile_query(user_id)).scalars().one()
+
+
+async def locked_profile_async(db: AsyncSession, user_id: int) -> UserProfile:
+    profile = (await db.execute(_locked_profile_query(user_id))).scalars().first()
+    if profile is not None:
+        return profile
+    try:
+        async with db.begin_nested():
+            profile = UserProfile(user_id=user_id, mood_counts={})
+            db.add(profile)
+        return profile
+    except IntegrityError:
+        return (await db.execute(_locked_profile_query(user_id))).scalars().one()
+
+
+def _added(profile: UserProfile, journal: Journal) -> None:
+    counts = dict(profile.mood_counts or {})
+    if journal.mood:
+        counts[journal.mood] = counts.get(journal.mood, 0) + 1
+    last = (profile.last_mood, profile.last_journal_at)
+    if profile.last_journal_at is None or journal.created_at >= profile.last_journal_at:
+        last = (journal.mood, journal.created_at)
+    apply_aggregates(profile, counts, last)
+
+
+def record_journal_created(db: Session, journal: Journal) -> None:
+    _added(locked_profile(db, journal.owner_id), journal)
+    persist(db, None)
+    # Profil di snapshot konteks chat sudah usang (dibuang setelah commit)
+    chat_context_cache.invalidate_after_commit(db, journal.owner_id)
+
+
+async def record_journal_created_async(db: AsyncSession, journal: Journal) -> None:
+    _added(await locked_profile_async(db, journal.owner_id), journal)
+    await persist_async(db, None)
+    await chat_context_cache.invalidate_after_commit_async(db, journal.owner_id)
+
+
+def record_journal_deleted(db: Session, journal: Journal) -> None:
+    """Dipanggil setelah jurnal dihapus (dan di-flush)."""
+    profile = locked_profile(db, journal.owner_id)
+    counts = dict(profile.mood_counts or {})
+    if journal.mood and counts.get(journal.mood):
+        counts[journal.mood] -= 1
+    last = (profile.last_mood, profile.last_journal_at)
+    if profile.last_journal_at is None or journal.created_at >= profile.last_journal_at:
+        # Jurnal terbaru yang dihapus: ambil penggantinya lewat indeks (owner_id, created_at)
+        row = db.execute(_latest_journal_query(journal.owner_id)).first()
+        last = (row.mood, row.created_at) if row else (None, None)
+    apply_aggregates(profile, counts, last)
+    persist(db, None)
+    chat_context_cache.invalidate_after_commit(db, journal.owner_id)
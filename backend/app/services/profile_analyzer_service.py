@@ -1,66 +1,73 @@
+from sqlalchemy import desc, func, select
 from sqlalchemy.orm import Session
-from app import crud, models
+from app import models
+from app.crud.base import persist
+from app.services import profile_aggregates
+from app.services.chat_context_service import chat_context_cache
+import datetime
 import logging
 from typing import Dict
-import json
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class ProfileAnalyzerService:
-    def analyze_and_update_profile(self, db: Session, user: models.User):
-        try:
-            logger.info(f"[PROFILE] Starting analysis for user_id: {user.id}")
-
-            all_journals = crud.journal.get_multi_by_owner(db=db, owner_id=user.id, limit=1000)
-
-            if not all_journals:
-                logger.info(f"[PROFILE] No journals found for user_id: {user.id}. Skipping.")
-                return
+    """
+    Hitung ulang penuh agregat profil dari seluruh jurnal pengguna. Jalur
+    normal sudah inkremental (``profile_aggregates``, per jurnal dibuat/
+    dihapus); ini hanya untuk perbaikan, mis. setelah data diubah di luar CRUD.
+    """
 
-            mood_counts: Dict[str, int] = {}
-            for journal in all_journals:
-                if journal.mood:
-                    mood_counts[journal.mood] = mood_counts.get(journal.mood, 0) + 1
+    def analyze_and_update_profile(self, db: Session, user: models.User):
+        self.analyze_user(db, user.id)
 
-            if not mood_counts:
-                logger.info(f"[PROFILE] No valid mood data for user_id: {user.id}.")
+    def analyze_user(self, db: Session, user_id: int) -> None:
+        try:
+            logger.info(f"[PROFILE] Starting analysis for user_id: {user_id}")
+
+            # Kunci profil dulu: jurnal yang dibuat bersamaan menunggu kunci ini
+            # untuk +1 inkrementalnya, sehingga hitungan di bawah tidak basi
+            profile = profile_aggregates.locked_profile(db, user_id)
+
+            # Agregasi di database: satu baris per mood (jumlah + jurnal
+            # terbaru), tanpa memuat isi jurnal. Baris pertama adalah mood
+            # jurnal terbaru menurut urutan (created_at, id), sama seperti
+            # jalur inkremental; NULL created_at diurutkan terakhir.
+            last_at = func.max(models.Journal.created_at)
+            rows = db.execute(
+                select(
+                    models.Journal.mood,
+                    func.count().label("journals"),
+                    last_at.label("last_at"),
+                )
+                .where(models.Journal.owner_id == user_id)
+                .group_by(models.Journal.mood)
+                .order_by(desc(last_at).nulls_last(), desc(func.max(models.Journal.id)))
+            ).all()
+
+            if not rows:
+                logger.info(f"[PROFILE] No journals found for user_id: {user_id}. Skipping.")
+                db.rollback()
                 return
 
-            total = sum(mood_counts.values())
-            themes = {mood: count / total for mood, count in mood_counts.items()}
-            logger.info(f"[PROFILE] Computed themes for user_id {user.id}: {themes}")
-
-            sorted_journals = sorted(all_journals, key=lambda j: j.created_at, reverse=True)
-            recent_mood = sorted_journals[0].mood.lower() if sorted_journals[0].mood else ""
-
-            sentiment_trend = "stabil"
-            if recent_mood in {"happy", "good", "great"}:
-                sentiment_trend = "meningkat"
-            elif recent_mood in {"sad", "bad", "angry"}:
-                sentiment_trend = "menurun"
-
-            profile = crud.user_profile.get_by_user_id(db, user_id=user.id)
-            update_data = {
-                "emerging_themes": themes,  # or json.dumps(themes) if not using JSONField
-                "sentiment_trend": sentiment_trend,
-            }
+            mood_counts: Dict[str, int] = {row.mood: row.journals for row in rows if row.mood}
+            latest = rows[0]
+            profile_aggregates.apply_aggregates(profile, mood_counts, (latest.mood, latest.last_at))
+            # Selalu ditulis, juga bila agregat tidak berubah, agar pengguna ini
+            # tidak terpilih lagi oleh batch berikutnya
+            profile.last_analyzed = datetime.datetime.utcnow()
+            persist(db, None)
+            logger.info(f"[PROFILE] Computed themes for user_id {user_id}: {profile.emerging_themes}")
 
-            if profile:
-                logger.info(f"[PROFILE] Updating profile for user_id: {user.id}")
-                crud.user_profile.update(db, db_obj=profile, obj_in=update_data)
-            else:
-                logger.info(f"[PROFILE] Creating new profile for user_id: {user.id}")
-                new_profile = models.UserProfile(user_id=user.id, **update_data)
-                db.add(new_profile)
-                db.commit()
-                db.refresh(new_profile)
+            # Profil di snapshot konteks chat sudah usang
+            chat_context_cache.invalidate(user_id)
 
-            logger.info(f"[PROFILE] Analysis complete for user_id: {user.id}")
+            logger.info(f"[PROFILE] Analysis complete for user_id: {user_id}")
 
         except Exception as e:
-            logger.error(f"[PROFILE] Error during analysis for user_id: {user.id} - {str(e)}")
+            db.rollback()
+            logger.error(f"[PROFILE] Error during analysis for user_id: {user_id} - {str(e)}")
 
 
 profile_analyzer = ProfileAnalyzerService()
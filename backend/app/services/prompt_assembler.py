@@ -0,0 +1,130 @@
+"""
+Perakitan prompt dengan anggaran token: menghitung token (estimasi), memangkas
+dan men-dedup riwayat, serta melipat giliran lama ke ringkasan bergulir agar
+ukuran prompt tetap terbatas berapa pun panjang percakapan.
+"""
+
+import math
+import re
+from typing import Dict, List, Sequence, Tuple
+
+from fastapi import Depends
+
+from app.core.config import Settings, settings
+from app.schemas.chat_context import ChatContextMessage
+
+# Overhead format chat per pesan (role, pemisah) pada API gaya OpenAI
+MESSAGE_OVERHEAD_TOKENS = 4
+# Rata-rata karakter per token untuk teks Indonesia/Inggris pada tokenizer BPE
+CHARS_PER_TOKEN = 4
+
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+# Nama peran di database -> peran yang dikenali API chat completions
+ROLE_MAP = {"ai": "assistant"}
+
+
+def count_tokens(text: str) -> int:
+    """Estimasi jumlah token tanpa tokenizer khusus model."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def count_message_tokens(content: str) -> int:
+    return count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Potong teks di batas kata agar muat dalam ``max_tokens``."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    limit = max(max_tokens * CHARS_PER_TOKEN - 1, 0)
+    cut = text[:limit].rsplit(" ", 1)[0] if " " in text[:limit] else text[:limit]
+    return cut.rstrip() + "…"
+
+
+class PromptAssembler:
+    def __init__(self, settings: Settings = Depends(lambda: settings)):
+        self.settings = settings
+
+    def budget_for(self, model: str) -> int:
+        return self.settings.PROMPT_TOKEN_BUDGETS.get(
+            model, self.settings.PROMPT_DEFAULT_TOKEN_BUDGET
+        )
+
+    def history_budget(self, model: str) -> int:
+        """Token yang tersisa untuk riwayat setelah instruksi dan ringkasan."""
+        reserved = (
+            self.settings.PROMPT_RESERVED_TOKENS
+            + self.settings.PROMPT_SUMMARY_MAX_TOKENS
+            + MESSAGE_OVERHEAD_TOKENS
+        )
+        return max(self.budget_for(model) - reserved, 0)
+
+    def truncate_journal(self, journal: str) -> str:
+        return truncate_to_tokens(journal, self.settings.PROMPT_JOURNAL_MAX_TOKENS)
+
+    def fit_history(
+        self, messages: Sequence[ChatContextMessage], max_tokens: int
+    ) -> Tuple[List[ChatContextMessage], List[ChatContextMessage]]:
+        """
+        Ambil pesan terbaru sebanyak yang muat dalam anggaran dan batas jumlah
+        pesan. Pesan berurutan yang identik (mis. kirim ulang) hanya dihitung
+        sekali. Mengembalikan (disimpan, dibuang) dalam urutan kronologis.
+        """
+        deduped: List[ChatContextMessage] = []
+        for msg in messages:
+            if deduped and deduped[-1].role == msg.role and deduped[-1].content == msg.content:
+                continue
+            deduped.append(msg)
+
+        kept: List[ChatContextMessage] = []
+        used = 0
+        max_messages = self.settings.PROMPT_HISTORY_MAX_MESSAGES
+        for msg in reversed(deduped):
+            cost = count_message_tokens(msg.content)
+            # Pesan terbaru selalu disimpan (dipotong bila perlu)
+            if not kept:
+                content = truncate_to_tokens(msg.content, max(max_tokens - MESSAGE_OVERHEAD_TOKENS, 1))
+                kept.append(msg.model_copy(update={"content": content}))
+                used += count_message_tokens(content)
+                continue
+            if len(kept) >= max_messages or used + cost > max_tokens:
+                break
+            kept.append(msg)
+            used += cost
+
+        kept.reverse()
+        return kept, deduped[: len(deduped) - len(kept)]
+
+    def update_summary(self, summary: str, dropped: Sequence[ChatContextMessage]) -> str:
+        """
+        Tambahkan poin singkat (kalimat pertama) dari setiap giliran yang dibuang,
+        lalu buang poin tertua bila ringkasan melebihi anggaran.
+        """
+        lines = [line for line in summary.splitlines() if line.strip()]
+        for msg in dropped:
+            first_sentence = SENTENCE_END_RE.split(msg.content.strip(), maxsplit=1)[0]
+            speaker = "Pengguna" if msg.role == "user" else "Konselor"
+            lines.append(f"- {speaker}: {truncate_to_tokens(first_sentence, 40)}")
+
+        max_tokens = self.settings.PROMPT_SUMMARY_MAX_TOKENS
+        while len(lines) > 1 and count_tokens("\n".join(lines)) > max_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    def format_history(
+        self, messages: Sequence[ChatContextMessage], summary: str = ""
+    ) -> List[Dict[str, str]]:
+        history = []
+        if summary:
+            history.append({
+                "role": "system",
+                "content": f"Ringkasan percakapan sebelumnya:\n{summary}",
+            })
+        history.extend(
+            {"role": ROLE_MAP.get(msg.role, msg.role), "content": msg.content}
+            for msg in messages
+        )
+        return history
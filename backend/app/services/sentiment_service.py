@@ -0,0 +1,136 @@
+"""
+Skor sentimen jurnal berbasis leksikon, dihitung di luar jalur permintaan.
+
+Kosakata ``EmotionService`` (hanya set katanya, bukan classifier-nya)
+diperluas dengan kosakata bahasa Indonesia (termasuk bentuk informal).
+Skor = (positif - negatif) / (positif + negatif) dalam rentang [-1, 1]; kata
+yang didahului negasi ("tidak senang", "not happy") dibalik polaritasnya.
+Skor ditulis per batch: jurnal baru oleh task Celery periodik
+(``score_pending``) dan data lama oleh ``backfill_sentiment.py``
+(``backfill``), keduanya dengan satu UPDATE massal per batch. Penskoran
+sendiri tetap lookup leksikon per teks (tanpa numpy); keuntungan batch ada
+pada satu SELECT dan satu UPDATE per batch.
+"""
+
+import re
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.services.emotion_service import EmotionService
+
+POSITIVE = "positive"
+NEGATIVE = "negative"
+NEUTRAL = "neutral"
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+
+class SentimentService:
+    POSITIVE_WORDS = EmotionService.POSITIVE_WORDS | {
+        "joy", "grateful", "thankful", "calm", "proud", "relieved", "hopeful",
+        "senang", "bahagia", "gembira", "bersyukur", "syukur", "lega", "tenang", "damai",
+        "semangat", "bangga", "puas", "baik", "hebat", "suka", "cinta", "sayang",
+        "nyaman", "optimis", "berharap", "asyik", "seru", "mantap", "keren",
+    }
+    NEGATIVE_WORDS = EmotionService.NEGATIVE_WORDS | {
+        "anxious", "worried", "lonely", "tired", "stressed", "afraid", "scared", "hopeless",
+        "sedih", "marah", "kesal", "kecewa", "takut", "cemas", "khawatir", "gelisah",
+        "stres", "lelah", "capek", "kesepian", "sepi", "buruk", "benci", "galau",
+        "frustasi", "putus", "menyesal", "sakit", "hancur", "bosan", "jenuh", "tertekan",
+    }
+    NEGATIONS = {
+        "not", "no", "never", "dont", "didnt", "isnt",
+        "tidak", "tak", "bukan", "belum", "kurang", "gak", "nggak", "enggak", "ga",
+    }
+
+    def __init__(self):
+        # Leksikon dibangun sekali; skor per kata hanya lookup dict
+        self._lexicon = {word: 1 for word in self.POSITIVE_WORDS}
+        self._lexicon.update({word: -1 for word in self.NEGATIVE_WORDS})
+
+    def _polarity(self, text: Optional[str]) -> Tuple[int, int]:
+        positive = negative = 0
+        previous = ""
+        lexicon = self._lexicon
+        for token in _TOKEN_RE.findall((text or "").lower().replace("'", "")):
+            weight = lexicon.get(token)
+            if weight is not None:
+                if previous in self.NEGATIONS:
+                    weight = -weight
+                if weight > 0:
+                    positive += 1
+                else:
+                    negative += 1
+            previous = token
+        return positive, negative
+
+    def score(self, text: Optional[str]) -> Tuple[float, str]:
+        positive, negative = self._polarity(text)
+        total = positive + negative
+        score = (positive - negative) / total if total else 0.0
+        label = POSITIVE if score > 0 else NEGATIVE if score < 0 else NEUTRAL
+        return round(score, 4), label
+
+    def score_many(self, texts: Iterable[Optional[str]]) -> List[Tuple[float, str]]:
+        """(skor, label) untuk setiap teks, sesuai urutan masukan."""
+        return list(map(self.score, texts))
+
+    def _score_rows(self, rows: Sequence) -> List[dict]:
+        scores = self.score_many(row.content for row in rows)
+        return [
+            {"id": row.id, "sentiment_score": score, "sentiment_label": label}
+            for row, (score, label) in zip(rows, scores)
+        ]
+
+    # --- Pipeline ---------------------------------------------------------------
+
+    def score_pending(self, db: Session, *, batch_size: int, max_batches: int) -> int:
+        """
+        Skor jurnal yang belum punya label, paling banyak ``max_batches`` batch
+        (commit per batch). Mengembalikan jumlah jurnal yang diskor.
+        """
+        scored = 0
+        for _ in range(max_batches):
+            rows = crud.journal.get_unscored(db, limit=batch_size)
+            if not rows:
+                break
+            crud.journal.update_sentiments(db, self._score_rows(rows))
+            db.commit()
+            scored += len(rows)
+            if len(rows) < batch_size:
+                break
+        return scored
+
+    def backfill(
+        self,
+        db: Session,
+        *,
+        batch_size: int = 1000,
+        commit_every: int = 10000,
+        after_id: int = 0,
+        rescore: bool = False,
+    ) -> Iterator[Tuple[int, int]]:
+        """
+        Skor ulang jurnal lama secara streaming (``yield_per``), ``commit_every``
+        baris per transaksi. Setiap commit menghasilkan ``(id terakhir, jumlah)``
+        sebagai checkpoint: tanpa ``rescore`` jurnal yang sudah berlabel
+        dilewati sehingga menjalankan ulang otomatis melanjutkan; dengan
+        ``rescore`` lanjutkan lewat ``after_id``.
+        """
+        while True:
+            count = 0
+            for rows in crud.journal.stream_for_scoring(
+                db, after_id=after_id, limit=commit_every, batch_size=batch_size, only_unscored=not rescore
+            ):
+                crud.journal.update_sentiments(db, self._score_rows(rows))
+                count += len(rows)
+                after_id = rows[-1].id
+            db.commit()
+            if not count:
+                return
+            yield after_id, count
+
+
+sentiment_service = SentimentService()
@@ -0,0 +1,208 @@
+"""
+Classifier lokal (in-process) untuk memilih ``CommunicationTechnique`` tanpa
+memanggil LLM planner. Terdiri dari aturan sederhana dan model Naive Bayes
+kecil yang disimpan di ``data/technique_classifier.json``.
+
+Latih ulang model setelah mengubah data latih:
+
+    python -m app.services.technique_classifier
+"""
+
+import json
+import math
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Pattern, Tuple
+
+import structlog
+
+from app.schemas.plan import CommunicationTechnique
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+TRAINING_DATA_PATH = DATA_DIR / "technique_training.json"
+MODEL_PATH = DATA_DIR / "technique_classifier.json"
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+log = structlog.get_logger(__name__)
+
+
+def tokenize(text: str) -> List[str]:
+    """Unigram + bigram dari teks huruf kecil."""
+    words = TOKEN_RE.findall(text.lower())
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+@dataclass(frozen=True)
+class TechniquePrediction:
+    technique: CommunicationTechnique
+    confidence: float
+    source: str  # "rule" atau "model"
+
+
+# (pola, teknik, confidence, jumlah kata maksimum atau None)
+RULES: List[Tuple[Pattern, CommunicationTechnique, float, Optional[int]]] = [
+    (
+        re.compile(
+            r"^(halo|hallo|hai|hi|hello|hey|pagi|siang|sore|malam|selamat (pagi|siang|sore|malam)|assalamualaikum)\b"
+        ),
+        CommunicationTechnique.SOCIAL_GREETING,
+        0.95,
+        5,
+    ),
+    (
+        re.compile(
+            r"^(apa itu|apa bedanya|apa saja|bagaimana cara|gimana cara|berapa|tips|what is|how (can|do|to))\b"
+        ),
+        CommunicationTechnique.INFORMATION,
+        0.9,
+        None,
+    ),
+    (
+        # "wajar/normal" hanya dalam bentuk pertanyaan ("wajar nggak sih ...",
+        # "apakah normal ...", "apa wajar ...", "... normal?"), bukan kalimat
+        # seperti "hari ini berjalan normal" atau "apa kabar, hari ini normal saja"
+        re.compile(
+            r"\b(wajar|normal) (nggak|ngga|enggak|gak|ga|tidak|kah)\b"
+            r"|\bapakah\b[^.!?]{0,30}\b(wajar|normal)\b|\bapa (wajar|normal)\b"
+            r"|\b(wajar|normal)\b[^.!?]*\?"
+            r"|\bapa aku (salah|terlalu|berlebihan)\b|\bam i overreacting\b|\bis it okay to\b"
+        ),
+        CommunicationTechnique.VALIDATION,
+        0.85,
+        None,
+    ),
+    (
+        re.compile(r"^(maksudnya|maksud kamu|maksudmu)\b"),
+        CommunicationTechnique.CLARIFYING,
+        0.85,
+        None,
+    ),
+]
+
+
+class NaiveBayesModel:
+    """Multinomial Naive Bayes dengan Laplace smoothing, tanpa dependensi eksternal."""
+
+    def __init__(
+        self,
+        class_counts: Dict[str, int],
+        token_counts: Dict[str, Dict[str, int]],
+        alpha: float = 1.0,
+    ):
+        self.class_counts = class_counts
+        self.token_counts = token_counts
+        self.alpha = alpha
+
+        self.vocabulary = {tok for counts in token_counts.values() for tok in counts}
+        total_docs = sum(class_counts.values())
+        vocab_size = len(self.vocabulary)
+        self._log_prior = {
+            cls: math.log(count / total_docs) for cls, count in class_counts.items()
+        }
+        self._log_denominator = {
+            cls: math.log(sum(counts.values()) + alpha * vocab_size)
+            for cls, counts in token_counts.items()
+        }
+
+    @classmethod
+    def train(cls, samples: Dict[str, List[str]], alpha: float = 1.0) -> "NaiveBayesModel":
+        class_counts: Dict[str, int] = {}
+        token_counts: Dict[str, Dict[str, int]] = {}
+        for label, texts in samples.items():
+            class_counts[label] = len(texts)
+            counts = token_counts.setdefault(label, {})
+            for text in texts:
+                for tok in tokenize(text):
+                    counts[tok] = counts.get(tok, 0) + 1
+        return cls(class_counts, token_counts, alpha)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "NaiveBayesModel":
+        return cls(data["class_counts"], data["token_counts"], data.get("alpha", 1.0))
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": 1,
+            "alpha": self.alpha,
+            "class_counts": self.class_counts,
+            "token_counts": self.token_counts,
+        }
+
+    def predict_proba(self, tokens: List[str]) -> Dict[str, float]:
+        scores = {}
+        for cls, counts in self.token_counts.items():
+            score = self._log_prior[cls]
+            for tok in tokens:
+                if tok in self.vocabulary:
+                    score += math.log(counts.get(tok, 0) + self.alpha) - self._log_denominator[cls]
+            scores[cls] = score
+
+        top = max(scores.values())
+        exp_scores = {cls: math.exp(score - top) for cls, score in scores.items()}
+        total = sum(exp_scores.values())
+        return {cls: value / total for cls, value in exp_scores.items()}
+
+
+class TechniqueClassifier:
+    def __init__(self, model: NaiveBayesModel):
+        self.model = model
+
+    def _apply_rules(self, text: str) -> Optional[TechniquePrediction]:
+        words = TOKEN_RE.findall(text)
+        for pattern, technique, confidence, max_words in RULES:
+            if max_words is not None and len(words) > max_words:
+                continue
+            if pattern.search(text):
+                return TechniquePrediction(technique, confidence, "rule")
+        return None
+
+    def predict(self, text: str) -> TechniquePrediction:
+        normalized = " ".join(text.lower().split())
+        rule_prediction = self._apply_rules(normalized)
+        if rule_prediction:
+            return rule_prediction
+
+        tokens = tokenize(normalized)
+        if not tokens:
+            return TechniquePrediction(CommunicationTechnique.UNKNOWN, 0.0, "model")
+
+        proba = self.model.predict_proba(tokens)
+        label, p_max = max(proba.items(), key=lambda item: item[1])
+
+        # Kurangi keyakinan bila sebagian besar kata tidak dikenal model
+        known_ratio = sum(tok in self.model.vocabulary for tok in tokens) / len(tokens)
+        return TechniquePrediction(
+            CommunicationTechnique(label), round(p_max * known_ratio, 4), "model"
+        )
+
+
+def train_and_save(
+    training_path: Path = TRAINING_DATA_PATH, model_path: Path = MODEL_PATH
+) -> NaiveBayesModel:
+    samples = json.loads(training_path.read_text(encoding="utf-8"))
+    model = NaiveBayesModel.train(samples)
+    model_path.write_text(
+        json.dumps(model.to_dict(), ensure_ascii=False, sort_keys=True, indent=1),
+        encoding="utf-8",
+    )
+    return model
+
+
+@lru_cache(maxsize=1)
+def get_technique_classifier() -> TechniqueClassifier:
+    """Muat model dari disk sekali per proses."""
+    if MODEL_PATH.exists():
+        model = NaiveBayesModel.from_dict(json.loads(MODEL_PATH.read_text(encoding="utf-8")))
+    else:
+        log.warning("technique_model_missing_training_in_memory", path=str(MODEL_PATH))
+        samples = json.loads(TRAINING_DATA_PATH.read_text(encoding="utf-8"))
+        model = NaiveBayesModel.train(samples)
+    return TechniqueClassifier(model)
+
+
+if __name__ == "__main__":
+    trained = train_and_save()
+    print(f"Model saved to {MODEL_PATH} ({len(trained.vocabulary)} features)")
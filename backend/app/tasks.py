@@ -1,15 +1,48 @@
 # backend/app/tasks.py
 
+import datetime
+from typing import List
+
+import redis
+from celery import group
+from celery.utils.log import get_task_logger
+
 from app.celery_app import celery_app
+from app.core.cache import get_redis
+from app.core.config import settings
 from app.services.profile_analyzer_service import profile_analyzer
+from app.services.sentiment_service import sentiment_service
 from app.db.session import SessionLocal
 from app import crud
 
+logger = get_task_logger(__name__)
+
+# Debounce per pengguna: kunci ada selama analisis sudah dijadwalkan tapi
+# belum mulai; tulisan berikutnya dalam jendela itu tidak menjadwalkan lagi
+PENDING_KEY = "tasks:profile_analysis_pending:{user_id}"
+
+# Mencegah dua scan batch (mis. beat ganda) berjalan bersamaan. Lock hanya
+# menutup scan + klaim + dispatch dan dilepas setelahnya; TTL hanya pengaman
+# bila proses mati sebelum melepasnya. Run berikutnya tidak mengirim ulang
+# chunk yang belum selesai karena penggunanya sudah diklaim
+# (``analysis_claimed_at``) selama PROFILE_ANALYSIS_CLAIM_SECONDS.
+BATCH_LOCK_KEY = "tasks:profile_analysis_batch"
+BATCH_LOCK_TTL_SECONDS = 120
+
 @celery_app.task
 def analyze_profile_task(user_id: int):
     """
     Tugas Celery untuk menganalisis profil pengguna.
     """
+    # Lepas tanda "pending" sebelum mulai: jurnal yang ditulis selama analisis
+    # berjalan menjadwalkan satu run berikutnya
+    client = get_redis()
+    if client is not None:
+        try:
+            client.delete(PENDING_KEY.format(user_id=user_id))
+        except redis.RedisError as e:
+            logger.warning("Gagal melepas debounce analisis profil: %s", e)
+
     db = SessionLocal()
     try:
         user = crud.user.get(db, id=user_id)
@@ -17,4 +50,125 @@ def analyze_profile_task(user_id: int):
             profile_analyzer.analyze_and_update_profile(db=db, user=user)
     finally:
         db.close()
-    return f"Profile analysis complete for user_id {user_id}"
+
+
+def enqueue_profile_analysis(user_id: int) -> bool:
+    """
+    Jadwalkan ``analyze_profile_task`` setelah PROFILE_ANALYSIS_DEBOUNCE_SECONDS,
+    paling banyak satu yang tertunda per pengguna: rentetan jurnal dilebur
+    menjadi satu analisis. Tanpa Redis tidak menjadwalkan apa pun (batch
+    periodik tetap menyusul). True bila task baru dijadwalkan.
+    """
+    client = get_redis()
+    if client is None:
+        return False
+    delay = settings.PROFILE_ANALYSIS_DEBOUNCE_SECONDS
+    key = PENDING_KEY.format(user_id=user_id)
+    try:
+        # TTL lebih panjang dari jendela: task yang hilang tidak mengunci selamanya
+        if not client.set(key, "1", nx=True, ex=int(delay) + settings.PROFILE_ANALYSIS_PENDING_GRACE_SECONDS):
+            return False
+    except redis.RedisError as e:
+        logger.warning("Debounce analisis profil gagal: %s", e)
+        return False
+    try:
+        analyze_profile_task.apply_async(args=[user_id], countdown=delay)
+    except Exception as e:
+        # Broker tidak tersedia: lepas kunci agar tulisan berikutnya mencoba lagi
+        logger.warning("Gagal menjadwalkan analisis profil: %s", e)
+        try:
+            client.delete(key)
+        except redis.RedisError as e:
+            # Kunci tetap kedaluwarsa sendiri setelah TTL-nya
+            logger.warning("Gagal melepas debounce analisis profil: %s", e)
+        return False
+    return True
+
+
+@celery_app.task
+def analyze_profiles_chunk_task(user_ids: List[int]):
+    """Analisis ulang satu chunk pengguna dengan satu session."""
+    db = SessionLocal()
+    try:
+        for user_id in user_ids:
+            profile_analyzer.analyze_user(db, user_id)
+    finally:
+        db.close()
+    return len(user_ids)
+
+
+@celery_app.task
+def schedule_profile_analysis():
+    """
+    Tugas periodik (Celery beat): cari pengguna yang jurnalnya berubah sejak
+    ``last_analyzed`` lalu sebar ke ``analyze_profiles_chunk_task`` lewat
+    group. Paling banyak PROFILE_ANALYSIS_MAX_CHUNKS chunk per run; sisanya
+    tetap "basi" dan diambil run berikutnya, sehingga beban worker terbatas.
+    """
+    client = get_redis()
+    locked = False
+    if client is not None:
+        try:
+            if not client.set(BATCH_LOCK_KEY, "1", nx=True, ex=BATCH_LOCK_TTL_SECONDS):
+                logger.info("Batch analisis profil masih berjalan, dilewati")
+                return 0
+            locked = True
+        except redis.RedisError as e:
+            logger.warning("Lock batch analisis profil gagal: %s", e)
+
+    try:
+        chunks = _collect_stale_chunks()
+        if chunks:
+            group(analyze_profiles_chunk_task.s(chunk) for chunk in chunks).apply_async()
+    finally:
+        if locked:
+            try:
+                client.delete(BATCH_LOCK_KEY)
+            except redis.RedisError as e:
+                logger.warning("Gagal melepas lock batch analisis profil: %s", e)
+    logger.info("Batch analisis profil: %d pengguna dalam %d chunk", sum(map(len, chunks)), len(chunks))
+    return sum(map(len, chunks))
+
+
+def _collect_stale_chunks() -> List[List[int]]:
+    chunk_size = settings.PROFILE_ANALYSIS_CHUNK_SIZE
+    chunks: List[List[int]] = []
+    now = datetime.datetime.utcnow()
+    claimed_before = now - datetime.timedelta(seconds=settings.PROFILE_ANALYSIS_CLAIM_SECONDS)
+    db = SessionLocal()
+    try:
+        after_id = 0
+        while len(chunks) < settings.PROFILE_ANALYSIS_MAX_CHUNKS:
+            # Keyset pada user id: setiap halaman langsung menjadi satu chunk
+            user_ids = crud.user_profile.get_stale_user_ids(
+                db, after_id=after_id, limit=chunk_size, claimed_before=claimed_before
+            )
+            if not user_ids:
+                break
+            # Diklaim sebelum dispatch; bila dispatch gagal klaim kedaluwarsa
+            # sendiri dan pengguna diambil lagi setelah PROFILE_ANALYSIS_CLAIM_SECONDS
+            crud.user_profile.claim_for_analysis(db, user_ids=user_ids, claimed_at=now)
+            chunks.append(user_ids)
+            after_id = user_ids[-1]
+    finally:
+        db.close()
+    return chunks
+
+
+@celery_app.task
+def score_journal_sentiment_task():
+    """
+    Tugas periodik (Celery beat): skor sentimen jurnal yang belum diskor per
+    micro-batch, sehingga fitur lain membaca ``sentiment_score``/``sentiment_label``
+    yang sudah jadi. Idempoten: run yang tumpang tindih hanya menulis nilai sama.
+    """
+    db = SessionLocal()
+    try:
+        scored = sentiment_service.score_pending(
+            db, batch_size=settings.SENTIMENT_BATCH_SIZE, max_batches=settings.SENTIMENT_MAX_BATCHES
+        )
+    finally:
+        db.close()
+    if scored:
+        logger.info("Skor sentimen: %d jurnal", scored)
+    return scored
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Backfill sentiment scores for existing journals.
+
+Streams journals in id order and writes scores with bulk updates, committing
+every ``--commit-every`` rows. Safe to interrupt: rerunning skips journals
+that already have a label. With ``--rescore`` every journal is scored again;
+resume an interrupted rescore with the last printed ``--after-id``.
+
+    python backfill_sentiment.py [--batch-size 1000] [--commit-every 10000]
+    python backfill_sentiment.py --rescore --after-id 123456
+"""
+from __future__ import annotations
+
+import argparse
+
+from app.db.session import SessionLocal
+from app.services.sentiment_service import sentiment_service
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows fetched and updated per batch")
+    parser.add_argument("--commit-every", type=int, default=10000, help="rows per transaction")
+    parser.add_argument("--after-id", type=int, default=0, help="resume after this journal id")
+    parser.add_argument("--rescore", action="store_true", help="also rescore journals that already have a label")
+    args = parser.parse_args(argv)
+
+    total = 0
+    db = SessionLocal()
+    try:
+        for last_id, count in sentiment_service.backfill(
+            db,
+            batch_size=args.batch_size,
+            commit_every=args.commit_every,
+            after_id=args.after_id,
+            rescore=args.rescore,
+        ):
+            total += count
+            print(f"scored {total} journals, checkpoint --after-id {last_id}", flush=True)
+    finally:
+        db.close()
+    print(f"done, {total} journals scored")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
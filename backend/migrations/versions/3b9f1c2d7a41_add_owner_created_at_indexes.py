@@ -0,0 +1,29 @@
+"""add_owner_created_at_indexes
+
+Revision ID: 3b9f1c2d7a41
+Revises: a7d3e9c1f054
+Create Date: 2026-10-18 13:05:22.481907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9f1c2d7a41'
+down_revision: Union[str, Sequence[str], None] = 'a7d3e9c1f054'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_journals_owner_id_created_at', 'journals', ['owner_id', 'created_at'], unique=False)
+    op.create_index('ix_chat_messages_owner_id_created_at', 'chat_messages', ['owner_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chat_messages_owner_id_created_at', table_name='chat_messages')
+    op.drop_index('ix_journals_owner_id_created_at', table_name='journals')
@@ -0,0 +1,79 @@
+"""add_profile_mood_aggregates
+
+Revision ID: 5e2a7c9d4b18
+Revises: 3b9f1c2d7a41
+Create Date: 2026-10-18 16:40:11.302514
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2a7c9d4b18'
+down_revision: Union[str, Sequence[str], None] = '3b9f1c2d7a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('user_profiles') as batch_op:
+        batch_op.add_column(sa.Column('mood_counts', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('last_mood', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('last_journal_at', sa.DateTime(), nullable=True))
+
+    # Isi agregat dari jurnal yang sudah ada dengan dua statement berbasis
+    # himpunan (tanpa round trip per pengguna): buat profil yang belum ada,
+    # lalu satu UPDATE ... FROM atas subquery agregat. Jurnal terbaru dipilih
+    # menurut (created_at, id), sama dengan jalur inkremental.
+    bind = op.get_bind()
+    op.execute(
+        """
+        INSERT INTO user_profiles (user_id)
+        SELECT DISTINCT j.owner_id FROM journals j
+        WHERE j.owner_id IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM user_profiles p WHERE p.user_id = j.owner_id)
+        """
+    )
+    # Objek JSON {mood: jumlah} per pengguna
+    json_agg = "json_object_agg" if bind.dialect.name == "postgresql" else "json_group_object"
+    op.execute(
+        f"""
+        UPDATE user_profiles
+        SET mood_counts = agg.mood_counts,
+            last_mood = agg.last_mood,
+            last_journal_at = agg.last_journal_at
+        FROM (
+            SELECT c.owner_id, c.mood_counts, l.mood AS last_mood, l.created_at AS last_journal_at
+            FROM (
+                SELECT owner_id,
+                       COALESCE({json_agg}(mood, journals) FILTER (WHERE mood IS NOT NULL), '{{}}') AS mood_counts
+                FROM (
+                    SELECT owner_id, mood, COUNT(*) AS journals
+                    FROM journals
+                    GROUP BY owner_id, mood
+                ) per_mood
+                GROUP BY owner_id
+            ) c
+            JOIN (
+                SELECT owner_id, mood, created_at,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY owner_id ORDER BY created_at DESC NULLS LAST, id DESC
+                       ) AS rn
+                FROM journals
+            ) l ON l.owner_id = c.owner_id AND l.rn = 1
+        ) AS agg
+        WHERE user_profiles.user_id = agg.owner_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('user_profiles') as batch_op:
+        batch_op.drop_column('last_journal_at')
+        batch_op.drop_column('last_mood')
+        batch_op.drop_column('mood_counts')
@@ -0,0 +1,36 @@
+"""add_journal_unscored_index
+
+Revision ID: 8c41d2e7f903
+Revises: 5e2a7c9d4b18
+Create Date: 2026-10-18 19:05:42.118730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41d2e7f903'
+down_revision: Union[str, Sequence[str], None] = '5e2a7c9d4b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Indeks parsial: task skor sentimen hanya memindai jurnal yang belum diskor
+    op.create_index(
+        'ix_journals_unscored',
+        'journals',
+        ['id'],
+        unique=False,
+        postgresql_where=sa.text('sentiment_label IS NULL'),
+        sqlite_where=sa.text('sentiment_label IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_journals_unscored', table_name='journals')
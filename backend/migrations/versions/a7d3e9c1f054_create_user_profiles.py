@@ -0,0 +1,46 @@
+"""create_user_profiles
+
+Revision ID: a7d3e9c1f054
+Revises: 10075d4990c5
+Create Date: 2026-10-18 13:04:10.207316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e9c1f054'
+down_revision: Union[str, Sequence[str], None] = '10075d4990c5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # user_profiles tidak pernah dibuat oleh migrasi sebelumnya; database lama
+    # bisa sudah memilikinya (dibuat di luar Alembic). Sejak revisi ini tabel
+    # dimiliki Alembic, sehingga downgrade di bawah revisi ini menghapusnya dan
+    # revisi awal bisa menghapus ``users`` tanpa FK yang tersisa.
+    if sa.inspect(op.get_bind()).has_table('user_profiles'):
+        return
+    op.create_table('user_profiles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('emerging_themes', sa.JSON(), nullable=True),
+    sa.Column('sentiment_trend', sa.String(), nullable=True),
+    sa.Column('last_analyzed', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_user_profiles_id'), 'user_profiles', ['id'], unique=False)
+    op.create_index(op.f('ix_user_profiles_user_id'), 'user_profiles', ['user_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_user_profiles_user_id'), table_name='user_profiles')
+    op.drop_index(op.f('ix_user_profiles_id'), table_name='user_profiles')
+    op.drop_table('user_profiles')
@@ -0,0 +1,43 @@
+"""add_profile_analysis_claim
+
+Revision ID: d2f6a8b3c915
+Revises: 8c41d2e7f903
+Create Date: 2026-10-18 21:12:07.530418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f6a8b3c915'
+down_revision: Union[str, Sequence[str], None] = '8c41d2e7f903'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STALE_PROFILE_SQL = (
+    'last_journal_at IS NOT NULL AND (last_analyzed IS NULL OR last_journal_at > last_analyzed)'
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user_profiles', sa.Column('analysis_claimed_at', sa.DateTime(), nullable=True))
+    # Indeks parsial: batch analisis profil hanya memindai profil yang basi
+    op.create_index(
+        'ix_user_profiles_stale',
+        'user_profiles',
+        ['user_id'],
+        unique=False,
+        postgresql_where=sa.text(STALE_PROFILE_SQL),
+        sqlite_where=sa.text(STALE_PROFILE_SQL),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_profiles_stale', table_name='user_profiles')
+    with op.batch_alter_table('user_profiles') as batch_op:
+        batch_op.drop_column('analysis_claimed_at')
@@ -3,13 +3,28 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.main import app
-from app.dependencies import get_db, get_current_user
+from app.dependencies import (
+    get_async_db,
+    get_async_read_db,
+    get_async_session_factory,
+    get_current_user,
+    get_db,
+    get_read_db,
+    get_user_async_read_db,
+    get_user_read_db,
+)
 from app.db.base_class import Base
 from app import models
 from app.models.user import User
+from app.core.idempotency import idempotency_store
+from app.crud.crud_user import principal_cache
+from app.services.chat_context_service import chat_context_cache
+from app.services.home_feed_service import home_feed_cache
 
 @pytest.fixture
 def temp_session(tmp_path):
@@ -22,7 +37,15 @@ def temp_session(tmp_path):
     engine.dispose()
 
 @pytest.fixture
-def client(temp_session):
+def temp_async_session(tmp_path, temp_session):
+    # Same SQLite file as temp_session; NullPool because every TestClient
+    # request may run on a fresh event loop.
+    db_path = tmp_path / "test.db"
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    yield async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+@pytest.fixture
+def client(temp_session, temp_async_session):
     # create a user
     db = temp_session()
     user = User(username="tester", email="tester@example.com", hashed_password="fake")
@@ -39,10 +62,27 @@ def client(temp_session):
         finally:
             db.close()
 
+    async def override_get_async_db():
+        async with temp_async_session() as db:
+            yield db
+
     def override_get_current_user():
         return user
 
+    # Cache snapshot bersifat per proses; setiap test memakai database baru
+    chat_context_cache.cache.clear_local()
+    idempotency_store.clear_local()
+    principal_cache.clear_local()
+    home_feed_cache.cache.clear_local()
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # Tanpa replika di test: dependency baca memakai database yang sama
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_user_read_db] = override_get_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+    app.dependency_overrides[get_async_session_factory] = lambda: temp_async_session
+    app.dependency_overrides[get_user_async_read_db] = override_get_async_db
     app.dependency_overrides[get_current_user] = override_get_current_user
     client = TestClient(app)
     yield client, temp_session
@@ -58,3 +58,31 @@ def test_login_invalid_credentials(client):
     assert response.status_code == 401
     assert response.json()["detail"] == "Incorrect email or password"
 
+
+
+def test_login_rehashes_password_when_cost_changes(client, monkeypatch):
+    from passlib.context import CryptContext
+    from app.core.config import settings
+
+    client_app, session_local = client
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=4).hash("secret")
+    db = session_local()
+    try:
+        db.add(User(username="dina", email="dina@example.com", hashed_password=old_hash))
+        db.commit()
+    finally:
+        db.close()
+
+    response = client_app.post(
+        "/api/v1/auth/login",
+        json={"email": "dina@example.com", "password": "secret"},
+    )
+    assert response.status_code == 200
+
+    db = session_local()
+    try:
+        user = db.query(User).filter_by(email="dina@example.com").first()
+        assert user.hashed_password != old_hash
+        assert user.hashed_password.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    finally:
+        db.close()
@@ -0,0 +1,88 @@
+from sqlalchemy import event
+
+from app import crud
+from app.core.security import create_access_token
+from app.dependencies import get_current_user
+from app.main import app
+
+
+def _count_selects(session_local):
+    engine = session_local.kw["bind"]
+    selects = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    return selects, lambda: event.remove(engine, "before_cursor_execute", record)
+
+
+def test_current_user_is_served_from_cache(client):
+    client_app, session_local = client
+    app.dependency_overrides.pop(get_current_user)
+    headers = {"Authorization": f"Bearer {create_access_token(1)}"}
+
+    selects, stop = _count_selects(session_local)
+    try:
+        first = client_app.get("/api/v1/users/me", headers=headers)
+        after_first = len(selects)
+        second = client_app.get("/api/v1/users/me", headers=headers)
+    finally:
+        stop()
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json() == {"id": 1, "username": "tester", "email": "tester@example.com"}
+    assert after_first == 1
+    assert len(selects) == 1
+
+
+def test_user_update_invalidates_cached_principal(client):
+    client_app, session_local = client
+    app.dependency_overrides.pop(get_current_user)
+    headers = {"Authorization": f"Bearer {create_access_token(1)}"}
+    assert client_app.get("/api/v1/users/me", headers=headers).status_code == 200
+
+    db = session_local()
+    try:
+        crud.user.update(db, db_obj=crud.user.get(db, id=1), obj_in={"is_active": False})
+    finally:
+        db.close()
+
+    response = client_app.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Inactive user"
+
+
+def test_password_update_is_hashed(client):
+    _, session_local = client
+    db = session_local()
+    try:
+        db_user = crud.user.update(db, db_obj=crud.user.get(db, id=1), obj_in={"password": "baru"})
+        assert db_user.hashed_password != "baru"
+        assert not hasattr(db_user, "password")
+    finally:
+        db.close()
+
+
+def test_async_commit_invalidates_principal_through_async_client(client, temp_async_session, monkeypatch):
+    import asyncio
+
+    from app.crud.crud_user import principal_cache
+
+    calls = []
+    monkeypatch.setattr(principal_cache, "delete", lambda key: calls.append(("sync", key)))
+
+    async def fake_delete_async(key):
+        calls.append(("async", key))
+
+    monkeypatch.setattr(principal_cache, "delete_async", fake_delete_async)
+
+    async def rehash():
+        async with temp_async_session() as db:
+            db_user = await crud.user.get_async(db, id=1)
+            # Seperti rehash bcrypt saat login: commit di event loop
+            await crud.user.set_password_hash_async(db, db_obj=db_user, hashed_password="rehashed")
+
+    asyncio.run(rehash())
+    assert calls == [("async", 1)]
@@ -58,7 +58,37 @@ def test_chat_flow_success(client):
     app.dependency_overrides.pop(GeneratorService, None)
 
 
-def test_get_latest_journal_returns_newest_entry(client):
+def test_chat_combined_mode_uses_single_call(client, monkeypatch):
+    client_app, session_local = client
+
+    class DummyPlanner:
+        async def get_plan(self, user_message, chat_history, latest_journal, user_profile, emotion_label):
+            raise AssertionError("planner must not be called in combined mode")
+
+    class DummyGenerator:
+        async def plan_and_generate(self, history, emotion, latest_journal, user_profile):
+            assert history[-1] == {"role": "user", "content": "Hi"}
+            return ConversationPlan(technique=CommunicationTechnique.SOCIAL_GREETING), "halo juga"
+
+    from app.core.config import settings
+    from app.main import app
+    monkeypatch.setattr(settings, "CHAT_COMBINED_PLAN_AND_GENERATE", True)
+    app.dependency_overrides[PlannerService] = lambda: DummyPlanner()
+    app.dependency_overrides[GeneratorService] = lambda: DummyGenerator()
+
+    response = client_app.post("/api/v1/chat/", json={"message": "Hi"})
+
+    app.dependency_overrides.pop(PlannerService, None)
+    app.dependency_overrides.pop(GeneratorService, None)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["content"] == "halo juga"
+    assert data["ai_technique"] == "social_greeting"
+
+
+def test_get_latest_journal_returns_newest_entry(client, temp_async_session):
+    import asyncio
     client_app, session_local = client
     db = session_local()
     from app import crud, models, schemas
@@ -79,7 +109,11 @@ def test_get_latest_journal_returns_newest_entry(client):
         )
 
         # Panggil fungsi untuk mendapatkan konten jurnal terbaru
-        latest_content = get_latest_journal(db, user)
+        async def fetch_latest():
+            async with temp_async_session() as async_db:
+                return await get_latest_journal(async_db, user)
+
+        latest_content = asyncio.run(fetch_latest())
         assert latest_content == "second"
     finally:
         db.close()
@@ -131,3 +165,49 @@ def test_flag_missing_message_returns_404(client):
     client_app, _ = client
     response = client_app.patch("/api/v1/chat/9999/flag", json={"flag": True})
     assert response.status_code == 404
+
+
+def test_stream_chat_message_sends_tokens_and_persists(client):
+    client_app, session_local = client
+
+    class DummyPlanner:
+        async def get_plan(self, *args, **kwargs):
+            return ConversationPlan(technique=CommunicationTechnique.EMPATHETIC)
+
+    class DummyGenerator:
+        async def stream_response(self, plan, history, emotion):
+            for token in ["halo", " dari", " ai "]:
+                yield token
+
+    from app.main import app
+    app.dependency_overrides[PlannerService] = lambda: DummyPlanner()
+    app.dependency_overrides[GeneratorService] = lambda: DummyGenerator()
+
+    try:
+        response = client_app.post("/api/v1/chat/stream", json={"message": "Hi"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = [
+            block.split("\n")
+            for block in response.text.strip().split("\n\n")
+        ]
+        names = [lines[0].removeprefix("event: ") for lines in events]
+        assert names == ["token", "token", "token", "done"]
+
+        import json
+        done = json.loads(events[-1][1].removeprefix("data: "))
+        assert done["content"] == "halo dari ai"
+        assert done["sender_type"] == "ai"
+        assert done["ai_technique"] == "empathetic"
+
+        from app.models.chat import ChatMessage
+        db = session_local()
+        try:
+            msgs = db.query(ChatMessage).order_by(ChatMessage.id).all()
+            assert [m.content for m in msgs] == ["Hi", "halo dari ai"]
+        finally:
+            db.close()
+    finally:
+        app.dependency_overrides.pop(PlannerService, None)
+        app.dependency_overrides.pop(GeneratorService, None)
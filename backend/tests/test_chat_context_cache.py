@@ -0,0 +1,256 @@
+import asyncio
+import json
+import time
+
+import redis
+from sqlalchemy import event
+
+from app import crud, schemas
+from app.core.cache import LRUCache, TieredCache
+from app.models.chat import SenderType
+from app.schemas.plan import CommunicationTechnique, ConversationPlan
+from app.services.chat_context_service import chat_context_cache
+from app.services.generator_service import GeneratorService
+from app.services.planner_service import PlannerService
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class FakePipeline:
+    """WATCH/MULTI minimal: ``interfere`` dijalankan sekali setelah GET (tulisan worker lain)."""
+
+    def __init__(self, redis_, interfere=None):
+        self.redis = redis_
+        self.interfere = interfere
+        self.buffered = []
+        self.watched = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def watch(self, key):
+        self.watched = (key, self.redis.data.get(key))
+
+    def get(self, key):
+        value = self.redis.data.get(key)
+        if self.interfere is not None:
+            self.interfere()
+            self.interfere = None
+        return value
+
+    def multi(self):
+        self.buffered = []
+
+    def set(self, key, value, ex=None):
+        self.buffered.append((key, value))
+
+    def execute(self):
+        key, seen = self.watched
+        if self.redis.data.get(key) != seen:
+            raise redis.WatchError()
+        for key, value in self.buffered:
+            self.redis.data[key] = value
+
+
+def test_tiered_cache_update_retries_on_concurrent_write():
+    shared = FakeRedis()
+    cache = TieredCache("ns", redis_client_factory=lambda: shared)
+    cache.set(1, {"items": []})
+    other = TieredCache("ns", redis_client_factory=lambda: shared)
+
+    def append(item):
+        return lambda data: None if data is None else {"items": data["items"] + [item]}
+
+    # Worker lain menambahkan "a" di antara GET dan SET milik kita
+    shared.pipeline = lambda: FakePipeline(
+        shared, interfere=lambda: shared.set("ns:1", json.dumps({"items": ["a"]}))
+    )
+    cache.update(1, append("b"))
+    assert other.get(1, local=False) == {"items": ["a", "b"]}
+
+    # Selalu berebut: entri dibuang, bukan ditimpa dengan data yang kehilangan tulisan
+    class AlwaysContended(FakePipeline):
+        def execute(self):
+            raise redis.WatchError()
+
+    shared.pipeline = lambda: AlwaysContended(shared)
+    cache.update(1, append("c"))
+    assert other.get(1, local=False) is None
+
+    # Entri belum ada: tidak dibuat dari tulisan
+    shared.pipeline = lambda: FakePipeline(shared)
+    cache.update(1, append("d"))
+    assert other.get(1, local=False) is None
+
+
+def test_lru_cache_evicts_and_expires():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    cache.set("short", "x", ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+
+
+def test_tiered_cache_reads_through_shared_tier():
+    shared = FakeRedis()
+    worker_a = TieredCache("ns", redis_client_factory=lambda: shared)
+    worker_b = TieredCache("ns", redis_client_factory=lambda: shared)
+
+    worker_a.set(1, {"v": 1})
+    assert worker_b.get(1) == {"v": 1}
+
+    worker_a.delete(1)
+    assert worker_b.get(1, local=False) is None
+
+
+def _override_services():
+    class DummyPlanner:
+        async def get_plan(self, user_message, chat_history, latest_journal, user_profile, emotion_label):
+            return ConversationPlan(technique=CommunicationTechnique.PROBING)
+
+    class DummyGenerator:
+        async def generate_response(self, plan, history, emotion):
+            return f"balasan ke-{len(history)}"
+
+    from app.main import app
+    app.dependency_overrides[PlannerService] = lambda: DummyPlanner()
+    app.dependency_overrides[GeneratorService] = lambda: DummyGenerator()
+    return app
+
+
+def test_steady_state_chat_turn_issues_no_context_reads(client, temp_async_session):
+    client_app, _ = client
+    app = _override_services()
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sync_engine = temp_async_session.kw["bind"].sync_engine
+    try:
+        assert client_app.post("/api/v1/chat/", json={"message": "satu"}).status_code == 200
+
+        event.listen(sync_engine, "before_cursor_execute", capture)
+        try:
+            resp = client_app.post("/api/v1/chat/", json={"message": "dua"})
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", capture)
+    finally:
+        app.dependency_overrides.pop(PlannerService, None)
+        app.dependency_overrides.pop(GeneratorService, None)
+
+    assert resp.status_code == 200
+    # user1, ai1, user2 ada di riwayat generator
+    assert resp.json()["content"] == "balasan ke-3"
+    context_reads = [
+        s for s in statements
+        if "FROM journals" in s or "FROM user_profiles" in s or "ORDER BY" in s
+    ]
+    assert context_reads == []
+
+
+def test_snapshot_follows_journal_writes_and_flag_invalidation(client, temp_async_session):
+    import asyncio
+    client_app, session_local = client
+    app = _override_services()
+    try:
+        resp = client_app.post("/api/v1/chat/", json={"message": "halo"})
+    finally:
+        app.dependency_overrides.pop(PlannerService, None)
+        app.dependency_overrides.pop(GeneratorService, None)
+    assert resp.status_code == 200
+
+    db = session_local()
+    try:
+        crud.journal.create_with_owner(
+            db=db,
+            obj_in=schemas.JournalCreate(title="t", content="isi jurnal baru", mood="ok"),
+            owner_id=1,
+        )
+    finally:
+        db.close()
+
+    async def snapshot():
+        async with temp_async_session() as async_db:
+            return await chat_context_cache.get_snapshot_async(async_db, 1)
+
+    cached = asyncio.run(snapshot())
+    assert cached.latest_journal == "isi jurnal baru"
+    assert [m.role for m in cached.messages] == [SenderType.USER.value, SenderType.AI.value]
+
+    msg_id = resp.json()["id"]
+    assert client_app.patch(f"/api/v1/chat/{msg_id}/flag", json={"flag": True}).status_code == 200
+    assert chat_context_cache.cache.get(1) is None
+
+
+def test_rollback_of_async_session_invalidates_through_async_client(temp_async_session, monkeypatch):
+    from sqlalchemy import text
+
+    from app.db.unit_of_work import UNIT_OF_WORK
+
+    calls = []
+    monkeypatch.setattr(chat_context_cache, "invalidate", lambda owner_id: calls.append(("sync", owner_id)))
+
+    async def fake_invalidate_many(owner_ids):
+        calls.append(("async", sorted(owner_ids)))
+
+    monkeypatch.setattr(chat_context_cache, "invalidate_many_async", fake_invalidate_many)
+
+    async def scenario():
+        async with temp_async_session() as db:
+            db.info[UNIT_OF_WORK] = True
+            await db.execute(text("SELECT 1"))
+            chat_context_cache.track_pending(db, 7)
+            await db.rollback()
+
+    asyncio.run(scenario())
+    assert calls == [("async", [7])]
+
+
+def test_chat_message_flag_and_delete_invalidate_only_after_commit(temp_session):
+    from app.db.unit_of_work import UNIT_OF_WORK
+    from app.models.chat import ChatMessage
+
+    db = temp_session()
+    stale = {"profile": None, "latest_journal": "", "messages": []}
+    try:
+        message = ChatMessage(content="halo", sender_type=SenderType.USER, owner_id=1)
+        db.add(message)
+        db.commit()
+
+        for write in (
+            lambda: crud.chat_message.set_flag(db, id=message.id, owner_id=1, flag=True),
+            lambda: crud.chat_message.remove(db, id=message.id, owner_id=1),
+        ):
+            db.info[UNIT_OF_WORK] = True
+            write()
+            # Giliran lain memuat ulang dari keadaan sebelum commit di antara
+            # flush dan commit; snapshot itu harus dibuang setelah commit
+            chat_context_cache.cache.set(1, stale)
+            assert chat_context_cache.cache.get(1) is not None
+            db.commit()
+            assert chat_context_cache.cache.get(1) is None
+    finally:
+        db.close()
+        chat_context_cache.cache.clear_local()
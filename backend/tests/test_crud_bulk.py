@@ -0,0 +1,121 @@
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import event
+
+from app import crud, schemas
+from app.models.article import Article
+from app.models.motivational_quote import MotivationalQuote
+
+
+def _count_statements(session):
+    statements = []
+    engine = session.get_bind()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def test_create_many_batches_inserts(temp_session):
+    db = temp_session()
+    try:
+        statements = _count_statements(db)
+        objs = crud.article.create_many(
+            db,
+            objs_in=[schemas.ArticleCreate(title=f"t{i}", url=f"u{i}") for i in range(5)],
+            batch_size=2,
+        )
+        inserts = [s for s in statements if s.startswith("INSERT")]
+    finally:
+        db.close()
+
+    assert sorted(o.title for o in objs) == [f"t{i}" for i in range(5)]
+    assert all(o.id for o in objs)
+    # 3 batch (2 + 2 + 1), bukan 5 insert per baris
+    assert len(inserts) == 3
+
+
+def test_upsert_updates_existing_and_inserts_new(temp_session):
+    db = temp_session()
+    try:
+        first = sorted(
+            crud.article.create_many(
+                db, objs_in=[{"title": "lama", "url": "u1"}, {"title": "tetap", "url": "u2"}]
+            ),
+            key=lambda a: a.url,
+        )
+        crud.article.upsert(
+            db,
+            objs_in=[
+                {"id": first[0].id, "title": "baru", "url": "u1"},
+                {"id": 99, "title": "tambahan", "url": "u3"},
+            ],
+            index_elements=["id"],
+        )
+        crud.article.upsert(
+            db,
+            objs_in=[{"id": first[1].id, "title": "diabaikan", "url": "u2"}],
+            index_elements=["id"],
+            update_fields=[],
+        )
+        rows = {a.id: a.title for a in db.query(Article).all()}
+    finally:
+        db.close()
+
+    assert rows == {first[0].id: "baru", first[1].id: "tetap", 99: "tambahan"}
+
+
+def test_delete_many(temp_session):
+    db = temp_session()
+    try:
+        objs = crud.motivational_quote.create_many(
+            db, objs_in=[{"text": f"q{i}", "author": "a"} for i in range(4)]
+        )
+        deleted = crud.motivational_quote.delete_many(db, ids=[o.id for o in objs[:3]], batch_size=2)
+        remaining = [q.text for q in db.query(MotivationalQuote).all()]
+    finally:
+        db.close()
+
+    assert deleted == 3
+    assert remaining == ["q3"]
+
+
+def test_seed_uses_bulk_inserts(temp_session, monkeypatch):
+    from app.db import seed
+
+    monkeypatch.setattr(seed, "SessionLocal", temp_session)
+    seed.seed()
+
+    db = temp_session()
+    try:
+        assert db.query(Article).count() == len(seed.ARTICLES)
+        assert db.query(MotivationalQuote).count() == len(seed.QUOTES)
+    finally:
+        db.close()
+
+
+def test_bulk_operations_only_flush_inside_unit_of_work(temp_session):
+    from app.db.unit_of_work import UNIT_OF_WORK
+
+    db = temp_session()
+    try:
+        db.info[UNIT_OF_WORK] = True
+        crud.article.create_many(
+            db, objs_in=[schemas.ArticleCreate(title=f"t{i}", url=f"u{i}") for i in range(3)], batch_size=2
+        )
+        assert db.query(Article).count() == 3
+        # Permintaan gagal: tidak ada batch yang sudah ter-commit
+        db.rollback()
+        assert db.query(Article).count() == 0
+    finally:
+        db.close()
+
+
+def test_upsert_rejects_unsupported_dialect():
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "mssql"
+    with pytest.raises(ValueError):
+        crud.article.upsert(db, objs_in=[{"url": "u", "title": "t"}], index_elements=["url"])
@@ -0,0 +1,127 @@
+import os
+import threading
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.core.config import Settings
+from app.db.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, pool_stats
+from app.db.session import engine_options, pool_limits
+
+PG_URL = "postgresql+psycopg2://user:pw@db:5432/dear"
+
+
+def test_sqlite_keeps_default_pool():
+    config = Settings()
+
+    assert engine_options("sqlite:///./x.db", config) == {
+        "connect_args": {"timeout": config.DB_SQLITE_BUSY_TIMEOUT, "check_same_thread": False}
+    }
+    assert engine_options("sqlite+aiosqlite:///./x.db", config, is_async=True) == {
+        "connect_args": {"timeout": config.DB_SQLITE_BUSY_TIMEOUT}
+    }
+
+
+def test_postgres_options_from_settings():
+    config = Settings(DB_POOL_SIZE=7, DB_MAX_OVERFLOW=3, DB_STATEMENT_TIMEOUT_MS=5000)
+
+    sync_opts = engine_options(PG_URL, config)
+    async_opts = engine_options("postgresql+asyncpg://user:pw@db/dear", config, is_async=True)
+
+    assert sync_opts["poolclass"] is InstrumentedQueuePool
+    assert (sync_opts["pool_size"], sync_opts["max_overflow"]) == (7, 3)
+    assert sync_opts["pool_pre_ping"] is True
+    assert sync_opts["connect_args"] == {"options": "-c statement_timeout=5000"}
+    assert async_opts["poolclass"] is InstrumentedAsyncQueuePool
+    assert async_opts["connect_args"] == {"server_settings": {"statement_timeout": "5000"}}
+
+    engine = create_engine(PG_URL, **sync_opts)
+    assert pool_stats(engine)["size"] == 7
+    engine.dispose()
+
+
+def test_pool_sized_from_connection_budget():
+    # 100 koneksi / (4 worker x 2 engine) = 12 per engine, tanpa overflow
+    assert pool_limits(Settings(DB_MAX_CONNECTIONS=100, WEB_CONCURRENCY=4)) == (12, 0)
+    assert pool_limits(Settings(DB_MAX_CONNECTIONS=3, WEB_CONCURRENCY=4)) == (1, 0)
+
+
+def test_pool_metrics_count_overflow_waits_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.3,
+        connect_args={"check_same_thread": False},
+    )
+    first = engine.connect()
+    overflow = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+
+    # Checkout yang menunggu sampai koneksi lain dikembalikan
+    timer = threading.Timer(0.1, overflow.close)
+    timer.start()
+    with engine.connect() as waited:
+        waited.execute(text("SELECT 1"))
+    timer.join()
+    first.close()
+
+    stats = pool_stats(engine)
+    assert stats["checkouts"] == 3
+    assert stats["overflow_opened"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["waits"] == 1
+    assert stats["wait_seconds_max"] >= 0.05
+    assert stats["checked_out"] == 0
+    engine.dispose()
+    assert pool_stats(engine)["checkouts"] == 3
+
+
+def test_pool_stats_endpoint(client, monkeypatch):
+    from app.core.config import settings
+
+    client_app, _ = client
+
+    # Tanpa MONITORING_TOKEN endpoint selalu ditolak
+    monkeypatch.setattr(settings, "MONITORING_TOKEN", None)
+    assert client_app.get("/api/v1/monitoring/db-pool").status_code == 403
+
+    monkeypatch.setattr(settings, "MONITORING_TOKEN", "rahasia")
+    assert client_app.get("/api/v1/monitoring/db-pool").status_code == 403
+    resp = client_app.get("/api/v1/monitoring/db-pool", headers={"X-Monitoring-Token": "salah"})
+    assert resp.status_code == 403
+
+    resp = client_app.get("/api/v1/monitoring/db-pool", headers={"X-Monitoring-Token": "rahasia"})
+    assert resp.status_code == 200
+    assert {"pid", "sync", "async"} <= resp.json().keys()
+
+
+def test_db_layer_does_not_import_services():
+    import subprocess
+    import sys
+
+    code = (
+        "import sys, app.db.session; "
+        "sys.exit(any(m.startswith('app.services') for m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.dirname(__file__)))
+    assert result.returncode == 0
+
+
+def test_session_events_are_registered_once():
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    from app.crud import crud_user
+    from app.events import register_session_events
+    from app.services import chat_context_service, home_feed_service
+
+    register_session_events()
+    register_session_events()
+    assert event.contains(Session, "after_commit", home_feed_service._bump_feed_version)
+    assert event.contains(Session, "after_commit", crud_user._invalidate_changed_users)
+    assert event.contains(
+        Session, "after_transaction_end", chat_context_service._invalidate_uncommitted_owners
+    )
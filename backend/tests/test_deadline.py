@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.core import deadline
+from app.core.config import Settings
+from app.core.openrouter import OpenRouterClient
+from app.schemas.plan import CommunicationTechnique
+from app.services.planner_service import PlannerService
+from app.services.technique_classifier import get_technique_classifier
+
+
+def test_nested_scope_only_tightens_deadline():
+    assert deadline.remaining() is None
+    assert deadline.cap_timeout(20) == 20
+
+    with deadline.deadline_scope(1.0) as outer:
+        with deadline.deadline_scope(60.0) as inner:
+            assert inner == outer
+            assert deadline.cap_timeout(20) <= 1.0
+        with deadline.deadline_scope(0.5):
+            assert deadline.remaining() <= 0.5
+
+    assert deadline.get_deadline() is None
+
+    with deadline.deadline_scope(at=time.monotonic() - 1):
+        with pytest.raises(deadline.DeadlineExceeded):
+            deadline.cap_timeout(20)
+
+
+@pytest.mark.asyncio
+async def test_planner_skips_llm_when_budget_is_low(monkeypatch):
+    async def fail_call(self, model, messages):
+        raise AssertionError("LLM planner must not be called")
+
+    monkeypatch.setattr(PlannerService, "_call_openrouter", fail_call)
+
+    settings = Settings(PLANNER_MODE="llm", PLANNER_MIN_BUDGET_SECONDS=6)
+    planner = PlannerService(settings=settings, classifier=get_technique_classifier())
+    with deadline.deadline_scope(2.0):
+        plan = await planner.get_plan("halo", [], "", None, "neutral")
+
+    assert plan.technique == CommunicationTechnique.SOCIAL_GREETING
+
+
+@pytest.mark.asyncio
+async def test_planner_leaves_budget_for_generator(monkeypatch):
+    captured = {}
+
+    async def fake_call(self, model, messages):
+        captured["remaining"] = deadline.remaining()
+        return {"choices": [{"message": {"content": '{"technique": "probing"}'}}]}
+
+    monkeypatch.setattr(PlannerService, "_call_openrouter", fake_call)
+
+    settings = Settings(PLANNER_MIN_BUDGET_SECONDS=6, GENERATOR_RESERVED_SECONDS=5)
+    planner = PlannerService(settings=settings)
+    with deadline.deadline_scope(15.0):
+        plan = await planner.get_plan("aku bingung", [], "", None, "neutral")
+        assert deadline.remaining() > 14
+
+    assert plan.technique == CommunicationTechnique.PROBING
+    assert captured["remaining"] <= 10
+
+
+@pytest.mark.asyncio
+async def test_client_stops_at_request_deadline():
+    async def handler(request):
+        await asyncio.sleep(5)
+        return httpx.Response(200, json={})
+
+    settings = Settings(OPENROUTER_API_KEY="key", OPENROUTER_HTTP2=False, LLM_HEDGE_DEFAULT_DELAY=None)
+    client = OpenRouterClient(settings, transport=httpx.MockTransport(handler))
+    start = time.monotonic()
+    try:
+        with deadline.deadline_scope(0.1):
+            with pytest.raises(TimeoutError):
+                await client.complete(["primary"], [])
+    finally:
+        await client.aclose()
+
+    assert time.monotonic() - start < 2
@@ -43,3 +43,60 @@ async def test_generate_response_no_duplicate(monkeypatch):
     # ensure no duplicate of the latest user message
     assert len(captured['messages']) == len(history) + 1
     assert "how are you?" in captured['messages'][0]['content']
+
+
+@pytest.mark.asyncio
+async def test_stream_response_falls_back_on_error(monkeypatch):
+    async def failing_stream(self, model, messages):
+        raise RuntimeError("boom")
+        yield  # pragma: no cover
+
+    monkeypatch.setattr(GeneratorService, "_stream_openrouter", failing_stream)
+
+    from app.core.config import settings as app_settings
+    service = GeneratorService(settings=app_settings)
+    tokens = [t async for t in service.stream_response(DummyPlan("information"), [], "neutral")]
+
+    assert len(tokens) == 1
+    assert "listening" in tokens[0]
+
+
+@pytest.mark.asyncio
+async def test_plan_and_generate_parses_structured_reply(monkeypatch):
+    captured = {}
+
+    async def fake_call(self, model, messages, **options):
+        captured['options'] = options
+        content = '```json\n{"technique": "validation", "reply": " Wajar kok merasa begitu. "}\n```'
+        return {"choices": [{"message": {"content": content}}]}
+
+    monkeypatch.setattr(GeneratorService, "_call_openrouter", fake_call)
+
+    from app.core.config import settings as app_settings
+    service = GeneratorService(settings=app_settings)
+    plan, reply = await service.plan_and_generate(
+        history=[{"role": "user", "content": "apa aku berlebihan?"}],
+        emotion="sadness",
+        latest_journal="",
+        user_profile=None,
+    )
+
+    assert plan.technique.value == "validation"
+    assert reply == "Wajar kok merasa begitu."
+    assert captured['options'] == {"response_format": {"type": "json_object"}}
+
+
+@pytest.mark.asyncio
+async def test_plan_and_generate_falls_back_on_invalid_json(monkeypatch):
+    async def fake_call(self, model, messages, **options):
+        return {"choices": [{"message": {"content": "bukan json"}}]}
+
+    monkeypatch.setattr(GeneratorService, "_call_openrouter", fake_call)
+
+    from app.core.config import settings as app_settings
+    from app.services.generator_service import ERROR_RESPONSE_FALLBACK
+    service = GeneratorService(settings=app_settings)
+    plan, reply = await service.plan_and_generate([], "neutral", "", None)
+
+    assert plan.technique.value == "unknown"
+    assert reply == ERROR_RESPONSE_FALLBACK
@@ -1,3 +1,7 @@
+import asyncio
+
+import pytest
+
 from app import crud, schemas
 
 
@@ -25,3 +29,107 @@ def test_home_feed_structure_and_ordering(client):
     assert ids == sorted(ids, reverse=True)
     types = {item["type"] for item in data}
     assert types == {"article", "audio", "quote"}
+
+
+def test_home_feed_etag_and_invalidation(client):
+    client_app, session_local = client
+    db = session_local()
+    try:
+        _create_sample_data(db)
+    finally:
+        db.close()
+
+    first = client_app.get("/api/v1/home-feed")
+    etag = first.headers["ETag"]
+    assert "max-age" in first.headers["Cache-Control"]
+
+    not_modified = client_app.get("/api/v1/home-feed", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    db = session_local()
+    try:
+        crud.article.create_many(db, objs_in=[schemas.ArticleCreate(title="a3", url="u3")])
+    finally:
+        db.close()
+
+    changed = client_app.get("/api/v1/home-feed", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert len(changed.json()) == 5
+
+
+def test_home_feed_is_built_from_primary(client):
+    from app.dependencies import get_async_read_db
+    from app.main import app
+
+    client_app, session_local = client
+    db = session_local()
+    try:
+        _create_sample_data(db)
+    finally:
+        db.close()
+
+    async def lagging_replica():
+        raise AssertionError("feed must not be rebuilt from the replica")
+        yield
+
+    previous = app.dependency_overrides[get_async_read_db]
+    app.dependency_overrides[get_async_read_db] = lagging_replica
+    try:
+        resp = client_app.get("/api/v1/home-feed")
+    finally:
+        app.dependency_overrides[get_async_read_db] = previous
+    assert resp.status_code == 200
+    assert len(resp.json()) == 4
+
+
+@pytest.mark.asyncio
+async def test_home_feed_rebuild_is_single_flight():
+    from app.core.cache import TieredCache
+    from app.services.home_feed_service import HomeFeedCache
+
+    feed_cache = HomeFeedCache(
+        TieredCache("feed-test", redis_client_factory=lambda: None, async_redis_client_factory=lambda: None)
+    )
+    builds = []
+
+    async def build():
+        builds.append(1)
+        await asyncio.sleep(0.05)
+        return [{"type": "quote"}]
+
+    results = await asyncio.gather(*[feed_cache.get_or_build_async(build) for _ in range(20)])
+
+    assert builds == [1]
+    assert len(set(results)) == 1
+    feed_cache.bump_version()
+    await feed_cache.get_or_build_async(build)
+    assert len(builds) == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_cancel_waiters():
+    from app.core.cache import TieredCache
+    from app.services.home_feed_service import HomeFeedCache
+
+    feed_cache = HomeFeedCache(
+        TieredCache("feed-cancel", redis_client_factory=lambda: None, async_redis_client_factory=lambda: None)
+    )
+    started = asyncio.Event()
+
+    async def build():
+        started.set()
+        await asyncio.sleep(0.05)
+        return [{"type": "quote"}]
+
+    leader = asyncio.create_task(feed_cache.get_or_build_async(build))
+    await started.wait()
+    waiter = asyncio.create_task(feed_cache.get_or_build_async(build))
+    await asyncio.sleep(0)
+    # Klien pemimpin putus di tengah rebuild
+    leader.cancel()
+
+    body, _ = await waiter
+    assert body == '[{"type":"quote"}]'
+    assert leader.cancelled()
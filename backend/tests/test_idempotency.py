@@ -0,0 +1,121 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.schemas.plan import CommunicationTechnique, ConversationPlan
+from app.services.generator_service import GeneratorService
+from app.services.planner_service import PlannerService
+
+
+def test_journal_retry_returns_stored_response(client):
+    client_app, session_local = client
+    headers = {"Idempotency-Key": "journal-1"}
+    payload = {"title": "Hari ini", "content": "Aku lelah", "mood": "sedih"}
+
+    first = client_app.post("/api/v1/journals/", json=payload, headers=headers)
+    second = client_app.post("/api/v1/journals/", json=payload, headers=headers)
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+
+    from app.models.journal import Journal
+    db = session_local()
+    try:
+        assert db.query(Journal).count() == 1
+    finally:
+        db.close()
+
+    # Tanpa header, setiap POST tetap membuat entri baru
+    client_app.post("/api/v1/journals/", json=payload)
+    db = session_local()
+    try:
+        assert db.query(Journal).count() == 2
+    finally:
+        db.close()
+
+
+def test_reused_key_with_different_body_is_rejected(client):
+    client_app, _ = client
+    headers = {"Idempotency-Key": "journal-2"}
+
+    client_app.post("/api/v1/journals/", json={"title": "a", "content": "satu", "mood": "senang"}, headers=headers)
+    response = client_app.post(
+        "/api/v1/journals/", json={"title": "a", "content": "dua", "mood": "senang"}, headers=headers
+    )
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_concurrent_chat_duplicates_run_once(client):
+    _, session_local = client
+    calls = []
+
+    class DummyPlanner:
+        async def get_plan(self, user_message, chat_history, latest_journal, user_profile, emotion_label):
+            return ConversationPlan(technique=CommunicationTechnique.EMPATHETIC)
+
+    class DummyGenerator:
+        async def generate_response(self, plan, history, emotion):
+            calls.append(history[-1]["content"])
+            await asyncio.sleep(0.2)
+            return "aku di sini"
+
+    from app.main import app
+    app.dependency_overrides[PlannerService] = lambda: DummyPlanner()
+    app.dependency_overrides[GeneratorService] = lambda: DummyGenerator()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            responses = await asyncio.gather(*[
+                ac.post("/api/v1/chat/", json={"message": "sedih"}, headers={"Idempotency-Key": "chat-1"})
+                for _ in range(3)
+            ])
+    finally:
+        app.dependency_overrides.pop(PlannerService, None)
+        app.dependency_overrides.pop(GeneratorService, None)
+
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    assert len({r.json()["id"] for r in responses}) == 1
+    assert calls == ["sedih"]
+
+    from app.models.chat import ChatMessage
+    db = session_local()
+    try:
+        assert db.query(ChatMessage).count() == 2
+    finally:
+        db.close()
+
+
+def test_key_is_scoped_to_user_not_token(client):
+    from datetime import timedelta
+
+    from app.core.security import create_access_token
+    from app.dependencies import get_current_user
+    from app.main import app
+
+    client_app, _ = client
+    app.dependency_overrides.pop(get_current_user)
+    payload = {"title": "t", "content": "isi", "mood": "sedih"}
+
+    def post(token):
+        return client_app.post(
+            "/api/v1/journals/",
+            json=payload,
+            headers={"Idempotency-Key": "journal-3", "Authorization": f"Bearer {token}"},
+        )
+
+    first = post(create_access_token(1))
+    # Klien me-refresh token lalu mencoba lagi: tetap satu eksekusi
+    retried = post(create_access_token(1, expires_delta=timedelta(minutes=5)))
+    assert first.status_code == retried.status_code == 200
+    assert retried.headers["Idempotent-Replayed"] == "true"
+    assert retried.json() == first.json()
+
+    # Pengguna lain dengan kunci yang sama tidak mendapat respons milik pengguna 1
+    other = post(create_access_token(2))
+    assert "Idempotent-Replayed" not in other.headers
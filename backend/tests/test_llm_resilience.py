@@ -0,0 +1,230 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.core.config import Settings
+from app.core.openrouter import OpenRouterClient
+from app.core.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LatencyTracker,
+    LLMUnavailableError,
+    backoff_delay,
+)
+
+
+def _ok(content: str) -> httpx.Response:
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+def _make_client(handler, **overrides) -> OpenRouterClient:
+    options = dict(
+        OPENROUTER_API_KEY="key",
+        OPENROUTER_HTTP2=False,
+        LLM_RETRY_BASE_DELAY=0,
+        LLM_HEDGE_DEFAULT_DELAY=None,
+    )
+    options.update(overrides)
+    return OpenRouterClient(Settings(**options), transport=httpx.MockTransport(handler))
+
+
+def _model_of(request: httpx.Request) -> str:
+    return json.loads(request.content)["model"]
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    now[0] = 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    # Hanya satu permintaan percobaan saat half-open
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    now[0] = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_latency_percentile_and_backoff():
+    tracker = LatencyTracker(window=100)
+    for i in range(1, 101):
+        tracker.record(i / 100)
+    assert tracker.percentile(95) == pytest.approx(0.95)
+    assert tracker.percentile(50) == pytest.approx(0.5)
+
+    assert backoff_delay(0, 0.25, 2.0, rand=lambda lo, hi: hi) == 0.25
+    assert backoff_delay(10, 0.25, 2.0, rand=lambda lo, hi: hi) == 2.0
+
+
+@pytest.mark.asyncio
+async def test_complete_retries_transient_errors():
+    calls = []
+
+    def handler(request):
+        calls.append(_model_of(request))
+        if len(calls) < 3:
+            return httpx.Response(503)
+        return _ok("ok")
+
+    client = _make_client(handler, LLM_MAX_RETRIES=2)
+    try:
+        data = await client.complete(["primary"], [{"role": "user", "content": "hi"}])
+    finally:
+        await client.aclose()
+
+    assert data["choices"][0]["message"]["content"] == "ok"
+    assert calls == ["primary"] * 3
+    assert client.breaker("primary").state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_complete_falls_back_in_order_and_skips_open_circuit():
+    calls = []
+
+    def handler(request):
+        model = _model_of(request)
+        calls.append(model)
+        if model == "primary":
+            return httpx.Response(500)
+        return _ok(model)
+
+    client = _make_client(handler, LLM_MAX_RETRIES=0, LLM_CIRCUIT_FAILURE_THRESHOLD=1)
+    try:
+        first = await client.complete(["primary", "backup"], [])
+        # Sirkuit model utama sekarang terbuka: langsung ke cadangan
+        second = await client.complete(["primary", "backup"], [])
+    finally:
+        await client.aclose()
+
+    assert first["choices"][0]["message"]["content"] == "backup"
+    assert second["choices"][0]["message"]["content"] == "backup"
+    assert calls == ["primary", "backup", "backup"]
+
+
+@pytest.mark.asyncio
+async def test_complete_does_not_retry_client_errors():
+    calls = []
+
+    def handler(request):
+        calls.append(_model_of(request))
+        return httpx.Response(400)
+
+    client = _make_client(handler, LLM_MAX_RETRIES=3, LLM_CIRCUIT_FAILURE_THRESHOLD=1)
+    try:
+        with pytest.raises(LLMUnavailableError):
+            await client.complete(["primary"], [])
+    finally:
+        await client.aclose()
+
+    assert calls == ["primary"]
+    assert client.breaker("primary").state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_complete_hedges_slow_primary():
+    async def handler(request):
+        model = _model_of(request)
+        if model == "primary":
+            await asyncio.sleep(5)
+        return _ok(model)
+
+    client = _make_client(handler, LLM_HEDGE_DEFAULT_DELAY=0.05)
+    try:
+        data = await asyncio.wait_for(client.complete(["primary", "backup"], []), timeout=2)
+    finally:
+        await client.aclose()
+
+    assert data["choices"][0]["message"]["content"] == "backup"
+    assert len(client.latency("backup")) == 1
+    # Model yang kalah dicatat sebagai batas bawah (waktu saat dibatalkan)
+    assert len(client.latency("primary")) == 1
+    assert client.latency("primary").percentile(50) >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_hedge_percentile_does_not_shrink_under_hedging():
+    calls = []
+
+    async def handler(request):
+        model = _model_of(request)
+        if model == "primary":
+            calls.append(model)
+            # Setiap permintaan kedua lambat dan kalah oleh cadangan
+            await asyncio.sleep(0.01 if len(calls) % 2 else 5)
+        return _ok(model)
+
+    client = _make_client(
+        handler, LLM_HEDGE_DEFAULT_DELAY=0.1, LLM_HEDGE_MIN_SAMPLES=2, LLM_HEDGE_PERCENTILE=90
+    )
+    try:
+        for _ in range(6):
+            await asyncio.wait_for(client.complete(["primary", "backup"], []), timeout=2)
+    finally:
+        await client.aclose()
+
+    # Hanya pemenang yang dicatat: persentil turun ke ~0.01 dan hedge makin sering
+    assert len(client.latency("primary")) == 6
+    assert client.hedge_delay("primary") >= 0.1
+
+
+@pytest.mark.asyncio
+async def test_own_deadline_does_not_trip_the_breaker():
+    import time
+
+    from app.core.deadline import DeadlineExceeded, deadline_scope
+
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise httpx.ReadTimeout("read timed out", request=request)
+
+    client = _make_client(handler, LLM_MAX_RETRIES=2, LLM_CIRCUIT_FAILURE_THRESHOLD=1)
+    try:
+        with deadline_scope(at=time.monotonic() - 1):
+            with pytest.raises(DeadlineExceeded):
+                await client._attempt("primary", [], None)
+        # Timeout yang dipangkas ke sisa anggaran: tidak dicoba ulang, bukan kegagalan provider
+        with deadline_scope(1.0):
+            with pytest.raises(httpx.ReadTimeout):
+                await client._attempt("primary", [], None)
+        assert len(calls) == 1
+        assert client.breaker("primary").state == CircuitBreaker.CLOSED
+
+        # Timeout penuh (OPENROUTER_TIMEOUT) tetap kegagalan provider
+        with pytest.raises(CircuitOpenError):
+            await client._attempt("primary", [], None)
+        assert client.breaker("primary").state == CircuitBreaker.OPEN
+    finally:
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stream_complete_falls_back_before_first_token():
+    body = 'data: {"choices": [{"delta": {"content": "halo"}}]}\n\ndata: [DONE]\n\n'
+
+    def handler(request):
+        if _model_of(request) == "primary":
+            return httpx.Response(502)
+        return httpx.Response(200, content=body.encode())
+
+    client = _make_client(handler)
+    try:
+        tokens = [t async for t in client.stream_complete(["primary", "backup"], [])]
+    finally:
+        await client.aclose()
+
+    assert tokens == ["halo"]
@@ -30,7 +30,7 @@ def test_music_recommend_uses_keyword_and_journals(client, monkeypatch):
     captured = {}
 
     # --- PERBAIKAN 2: Menambahkan `order_by` ke mock ---
-    def fake_get_multi_by_owner(db, owner_id: int, skip: int = 0, limit: int = 100, order_by: str = None):
+    async def fake_get_multi_by_owner(db, owner_id: int, skip: int = 0, limit: int = 100, order_by: str = None):
         captured["limit"] = limit
         # Memastikan mock mengembalikan objek Journal yang valid
         return [Journal(id=i, content=f"j{i}", owner_id=owner_id) for i in range(3)]
@@ -44,7 +44,7 @@ def test_music_recommend_uses_keyword_and_journals(client, monkeypatch):
         return {"tracks": {"items": [{"name": "Song", "id": "xyz"}]}}
 
     # Mock ini tidak lagi dipanggil oleh logika utama, tetapi kita biarkan untuk keamanan.
-    monkeypatch.setattr(crud.journal, "get_multi_by_owner", fake_get_multi_by_owner)
+    monkeypatch.setattr(crud.journal, "get_multi_by_owner_async", fake_get_multi_by_owner)
     monkeypatch.setattr(MusicKeywordService, "generate_keyword", fake_generate_keyword)
     monkeypatch.setattr(Spotify, "search", fake_search)
 
@@ -58,7 +58,7 @@ def test_music_recommend_uses_keyword_and_journals(client, monkeypatch):
 
 def test_music_recommend_returns_empty_list_when_no_results(client, monkeypatch):
     # --- PERBAIKAN 3: Menambahkan `order_by` ke mock ---
-    def fake_get_multi_by_owner(db, owner_id: int, skip: int = 0, limit: int = 100, order_by: str = None):
+    async def fake_get_multi_by_owner(db, owner_id: int, skip: int = 0, limit: int = 100, order_by: str = None):
         # Mengembalikan jurnal untuk memicu logika fallback
         return [Journal(id=1, content="test", mood="Netral", owner_id=owner_id)]
 
@@ -69,7 +69,7 @@ def test_music_recommend_returns_empty_list_when_no_results(client, monkeypatch)
     def fake_search(self, q, type="track", limit=20):
         return {"tracks": {"items": []}}
 
-    monkeypatch.setattr(crud.journal, "get_multi_by_owner", fake_get_multi_by_owner)
+    monkeypatch.setattr(crud.journal, "get_multi_by_owner_async", fake_get_multi_by_owner)
     monkeypatch.setattr(MusicKeywordService, "generate_keyword", fake_generate_keyword)
     monkeypatch.setattr(Spotify, "search", fake_search)
 
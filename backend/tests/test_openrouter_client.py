@@ -0,0 +1,79 @@
+import httpx
+import pytest
+
+from app.core.config import Settings
+from app.core.openrouter import OpenRouterClient
+from app.services.generator_service import GeneratorService
+from app.services.planner_service import PlannerService
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_posts_to_shared_client():
+    captured = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        captured.append(request)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+    settings = Settings(OPENROUTER_API_KEY="key", OPENROUTER_HTTP2=False)
+    client = OpenRouterClient(settings, transport=httpx.MockTransport(handler))
+    try:
+        for _ in range(2):
+            data = await client.chat_completion(
+                model="m",
+                messages=[{"role": "user", "content": "hi"}],
+                headers={"Authorization": "Bearer key"},
+            )
+            assert data["choices"][0]["message"]["content"] == "ok"
+    finally:
+        await client.aclose()
+
+    assert len(captured) == 2
+    assert str(captured[0].url) == "https://openrouter.ai/api/v1/chat/completions"
+    assert captured[0].headers["Authorization"] == "Bearer key"
+    assert client.is_closed
+
+
+def test_dependency_reuses_app_scoped_client():
+    from types import SimpleNamespace
+    from app.dependencies import get_openrouter_client
+
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace()))
+    first = get_openrouter_client(request)
+    second = get_openrouter_client(request)
+
+    assert isinstance(first, OpenRouterClient)
+    assert first is second
+    assert PlannerService(openrouter=first).openrouter is GeneratorService(openrouter=second).openrouter
+
+
+@pytest.mark.asyncio
+async def test_stream_chat_completion_yields_deltas():
+    body = (
+        ": OPENROUTER PROCESSING\n\n"
+        'data: {"choices": [{"delta": {"content": "Ha"}}]}\n\n'
+        'data: {"choices": [{"delta": {"content": "lo"}}]}\n\n'
+        'data: {"choices": [{"delta": {}}]}\n\n'
+        "data: [DONE]\n\n"
+    )
+    captured = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        captured["body"] = request.content
+        return httpx.Response(
+            200, content=body.encode(), headers={"content-type": "text/event-stream"}
+        )
+
+    settings = Settings(OPENROUTER_API_KEY="key", OPENROUTER_HTTP2=False)
+    client = OpenRouterClient(settings, transport=httpx.MockTransport(handler))
+    try:
+        tokens = [
+            t async for t in client.stream_chat_completion(
+                model="m", messages=[{"role": "user", "content": "hi"}]
+            )
+        ]
+    finally:
+        await client.aclose()
+
+    assert tokens == ["Ha", "lo"]
+    assert b'"stream":true' in captured["body"].replace(b" ", b"")
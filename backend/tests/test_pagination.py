@@ -0,0 +1,70 @@
+import datetime
+
+from app.models.chat import ChatMessage, SenderType
+from app.models.journal import Journal
+
+
+def _seed(session_local, model, count, **fields):
+    db = session_local()
+    try:
+        start = datetime.datetime(2024, 1, 1)
+        for i in range(count):
+            # Dua baris per timestamp untuk menguji tie-break pada id
+            db.add(model(owner_id=1, created_at=start + datetime.timedelta(minutes=i // 2), **fields))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _collect(client_app, url, limit):
+    ids, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        resp = client_app.get(url, params=params)
+        assert resp.status_code == 200
+        ids.extend(item["id"] for item in resp.json())
+        pages += 1
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids, pages
+
+
+def test_journals_keyset_pages_cover_everything_once(client):
+    client_app, session_local = client
+    _seed(session_local, Journal, 25, title="t", content="c", mood="m")
+
+    ids, pages = _collect(client_app, "/api/v1/journals/", limit=10)
+
+    assert pages == 3
+    assert ids == sorted(ids, reverse=True)
+    assert len(set(ids)) == 25
+
+
+def test_chat_history_keyset_pages(client):
+    client_app, session_local = client
+    _seed(session_local, ChatMessage, 7, content="halo", sender_type=SenderType.USER)
+
+    ids, pages = _collect(client_app, "/api/v1/chat/", limit=3)
+
+    assert pages == 3
+    assert ids == sorted(ids, reverse=True)
+    assert len(ids) == 7
+
+
+def test_invalid_cursor_is_rejected(client):
+    client_app, _ = client
+    assert client_app.get("/api/v1/journals/", params={"cursor": "!!bad"}).status_code == 400
+    assert client_app.get("/api/v1/chat/", params={"cursor": "bm9wZQ"}).status_code == 400
+
+
+def test_journals_offset_still_supported(client):
+    client_app, session_local = client
+    _seed(session_local, Journal, 5, title="t", content="c", mood="m")
+
+    resp = client_app.get("/api/v1/journals/", params={"skip": 3, "limit": 10})
+
+    assert resp.status_code == 200
+    assert len(resp.json()) == 2
+    assert "X-Next-Cursor" not in resp.headers
@@ -0,0 +1,148 @@
+import datetime
+
+from app import crud, schemas
+from app.models.user_profile import UserProfile
+from app.services.profile_analyzer_service import profile_analyzer
+
+
+class _User:
+    def __init__(self, id):
+        self.id = id
+
+
+def _journal(db, mood, owner_id=1, created_at=None):
+    obj_in = schemas.JournalCreate(title="t", content="isi", mood=mood)
+    journal = crud.journal.create_with_owner(db, obj_in=obj_in, owner_id=owner_id)
+    if created_at is not None:
+        journal.created_at = created_at
+        db.commit()
+    return journal
+
+
+def _profile(db, user_id=1) -> UserProfile:
+    db.expire_all()
+    return db.query(UserProfile).filter_by(user_id=user_id).one()
+
+
+def test_journal_writes_update_mood_aggregates(temp_session):
+    db = temp_session()
+    try:
+        _journal(db, "sad")
+        _journal(db, "sad")
+        latest = _journal(db, "happy")
+
+        profile = _profile(db)
+        assert profile.mood_counts == {"sad": 2, "happy": 1}
+        assert profile.last_mood == "happy"
+        assert profile.sentiment_trend == "meningkat"
+        assert profile.emerging_themes == {"sad": 2 / 3, "happy": 1 / 3}
+
+        crud.journal.remove(db, id=latest.id)
+
+        profile = _profile(db)
+        assert profile.mood_counts == {"sad": 2}
+        assert profile.last_mood == "sad"
+        assert profile.sentiment_trend == "menurun"
+        assert profile.emerging_themes == {"sad": 1.0}
+    finally:
+        db.close()
+
+
+def test_older_journal_does_not_replace_last_mood(temp_session):
+    db = temp_session()
+    try:
+        _journal(db, "happy")
+        _journal(db, "angry", created_at=datetime.datetime(2020, 1, 1))
+        crud.journal.create_with_owner(
+            db, obj_in=schemas.JournalCreate(title="t", content="isi", mood="sad"), owner_id=1
+        )
+        profile = _profile(db)
+        assert profile.last_mood == "sad"
+        assert profile.mood_counts == {"happy": 1, "angry": 1, "sad": 1}
+    finally:
+        db.close()
+
+
+def test_full_recompute_repairs_aggregates(temp_session):
+    db = temp_session()
+    try:
+        _journal(db, "sad")
+        _journal(db, "good")
+        profile = _profile(db)
+        profile.mood_counts = {"sad": 40}
+        profile.last_mood = None
+        db.commit()
+
+        profile_analyzer.analyze_and_update_profile(db, _User(1))
+
+        profile = _profile(db)
+        assert profile.mood_counts == {"sad": 1, "good": 1}
+        assert profile.last_mood == "good"
+        assert profile.sentiment_trend == "meningkat"
+    finally:
+        db.close()
+
+
+
+def test_recompute_aggregates_in_sql_without_journal_bodies(temp_session):
+    from sqlalchemy import event
+
+    db = temp_session()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = temp_session.kw["bind"]
+    try:
+        _journal(db, "sad")
+        _journal(db, "happy")
+        event.listen(engine, "before_cursor_execute", record)
+        profile_analyzer.analyze_and_update_profile(db, _User(1))
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+        db.close()
+
+    journal_selects = [s for s in statements if "FROM journals" in s]
+    assert len(journal_selects) == 1
+    assert "GROUP BY journals.mood" in journal_selects[0]
+    assert "journals.content" not in journal_selects[0]
+
+
+def test_recompute_tolerates_null_created_at_and_breaks_ties_by_id(temp_session):
+    db = temp_session()
+    try:
+        same_time = datetime.datetime(2024, 5, 1, 8, 0)
+        _journal(db, "sad", created_at=same_time)
+        _journal(db, "happy", created_at=same_time)
+        _journal(db, "angry", created_at=same_time).created_at = None
+        db.commit()
+
+        profile_analyzer.analyze_user(db, 1)
+
+        profile = _profile(db)
+        assert profile.mood_counts == {"sad": 1, "happy": 1, "angry": 1}
+        assert profile.last_mood == "happy"
+        assert profile.last_analyzed is not None
+    finally:
+        db.close()
+
+
+def test_chat_snapshot_is_invalidated_only_after_commit(temp_session):
+    from app.db.unit_of_work import UNIT_OF_WORK
+    from app.services.chat_context_service import chat_context_cache
+
+    db = temp_session()
+    try:
+        db.info[UNIT_OF_WORK] = True
+        chat_context_cache.cache.set(1, {"profile": None, "latest_journal": "", "messages": []})
+        _journal(db, "sad")
+
+        # Masih dalam transaksi: permintaan lain tidak boleh memuat ulang dari
+        # keadaan sebelum commit, jadi snapshot belum dibuang
+        assert chat_context_cache.cache.get(1) is not None
+        db.commit()
+        assert chat_context_cache.cache.get(1) is None
+    finally:
+        db.close()
+        chat_context_cache.cache.clear_local()
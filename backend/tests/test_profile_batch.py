@@ -0,0 +1,243 @@
+import datetime
+
+import pytest
+import redis
+
+from app import crud, schemas, tasks
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.models.user import User
+from app.models.user_profile import UserProfile
+from app.services.profile_analyzer_service import profile_analyzer
+
+
+@pytest.fixture
+def eager_tasks(temp_session, monkeypatch):
+    monkeypatch.setattr(tasks, "SessionLocal", temp_session)
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    return temp_session
+
+
+def _add_journal(db, owner_id, mood="sad"):
+    crud.journal.create_with_owner(
+        db, obj_in=schemas.JournalCreate(title="t", content="isi", mood=mood), owner_id=owner_id
+    )
+
+
+def _add_users(db, *user_ids):
+    for user_id in user_ids:
+        db.add(User(id=user_id, username=f"u{user_id}", email=f"u{user_id}@example.com", hashed_password="x"))
+    db.commit()
+
+
+def _mark_stale(db, user_id):
+    profile = db.query(UserProfile).filter_by(user_id=user_id).one()
+    profile.last_analyzed = datetime.datetime(2000, 1, 1)
+    db.commit()
+
+
+def test_stale_users_are_found_by_keyset(eager_tasks):
+    db = eager_tasks()
+    try:
+        _add_users(db, 1, 2, 3, 4)
+        for owner_id in (1, 2, 3, 4):
+            _add_journal(db, owner_id)
+        profile_analyzer.analyze_user(db, 1)
+        _mark_stale(db, 2)
+        _mark_stale(db, 4)
+        # Profil 3 dihapus: pengguna tanpa profil juga perlu dianalisis
+        db.query(UserProfile).filter_by(user_id=3).delete()
+        db.commit()
+
+        assert crud.user_profile.get_stale_user_ids(db) == [2, 3, 4]
+        assert crud.user_profile.get_stale_user_ids(db, after_id=2, limit=1) == [3]
+    finally:
+        db.close()
+
+
+def test_stale_scan_does_not_read_journals(eager_tasks):
+    from sqlalchemy import event
+
+    db = eager_tasks()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = eager_tasks.kw["bind"]
+    try:
+        _add_users(db, 1, 2)
+        _add_journal(db, 1)
+        event.listen(engine, "before_cursor_execute", record)
+        assert crud.user_profile.get_stale_user_ids(db) == [1, 2]
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+        db.close()
+
+    assert statements and not [s for s in statements if "journals" in s]
+
+
+def test_overlapping_runs_do_not_dispatch_claimed_users(eager_tasks, monkeypatch):
+    dispatched = []
+
+    class RecordingGroup:
+        # Chunk hanya dicatat, tidak dijalankan worker
+        def __init__(self, signatures):
+            self.user_ids = [user_id for sig in signatures for user_id in sig.args[0]]
+
+        def apply_async(self):
+            dispatched.append(self.user_ids)
+
+    monkeypatch.setattr(tasks, "group", RecordingGroup)
+    db = eager_tasks()
+    try:
+        _add_users(db, 1, 2)
+        _add_journal(db, 1)
+
+        # Chunk belum diproses worker: run berikutnya tidak mengirimnya lagi
+        assert tasks.schedule_profile_analysis() == 2
+        assert tasks.schedule_profile_analysis() == 0
+        assert dispatched == [[1, 2]]
+
+        # Analisis selesai lalu ada jurnal baru: dikirim lagi walau klaim masih berlaku
+        profile_analyzer.analyze_user(db, 1)
+        _add_journal(db, 1)
+        assert tasks.schedule_profile_analysis() == 1
+
+        # Klaim kedaluwarsa (mis. dispatch gagal): diambil lagi
+        monkeypatch.setattr(settings, "PROFILE_ANALYSIS_CLAIM_SECONDS", -1)
+        assert tasks.schedule_profile_analysis() == 1
+        assert dispatched[-1] == [1]
+    finally:
+        db.close()
+
+
+def test_journal_written_through_api_marks_user_stale(client, monkeypatch):
+    client_app, session_local = client
+    monkeypatch.setattr(tasks, "get_redis", lambda: None)
+    db = session_local()
+    try:
+        resp = client_app.post("/api/v1/journals/", json={"title": "t", "content": "isi", "mood": "sad"})
+        assert resp.status_code == 200
+        assert crud.user_profile.get_stale_user_ids(db) == [1]
+
+        profile_analyzer.analyze_user(db, 1)
+        assert crud.user_profile.get_stale_user_ids(db) == []
+
+        # Update agregat inkremental tidak boleh menggeser last_analyzed
+        resp = client_app.post("/api/v1/journals/", json={"title": "t2", "content": "isi", "mood": "happy"})
+        assert resp.status_code == 200
+        db.expire_all()
+        assert crud.user_profile.get_stale_user_ids(db) == [1]
+    finally:
+        db.close()
+
+
+def test_batch_analysis_is_bounded_per_run(eager_tasks, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_ANALYSIS_CHUNK_SIZE", 2)
+    monkeypatch.setattr(settings, "PROFILE_ANALYSIS_MAX_CHUNKS", 2)
+    db = eager_tasks()
+    try:
+        for owner_id in range(1, 7):
+            _add_journal(db, owner_id)
+            _mark_stale(db, owner_id)
+
+        assert tasks.schedule_profile_analysis() == 4
+        assert crud.user_profile.get_stale_user_ids(db) == [5, 6]
+
+        assert tasks.schedule_profile_analysis() == 2
+        assert crud.user_profile.get_stale_user_ids(db) == []
+        assert tasks.schedule_profile_analysis() == 0
+    finally:
+        db.close()
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+def test_batch_lock_is_released_after_dispatch(eager_tasks, monkeypatch):
+    shared = FakeRedis()
+    monkeypatch.setattr(tasks, "get_redis", lambda: shared)
+    db = eager_tasks()
+    try:
+        _add_journal(db, 1)
+    finally:
+        db.close()
+
+    assert tasks.schedule_profile_analysis() == 1
+    assert tasks.BATCH_LOCK_KEY not in shared.data
+
+    # Run lain sedang memegang lock: dilewati
+    shared.set(tasks.BATCH_LOCK_KEY, "1")
+    assert tasks.schedule_profile_analysis() == 0
+
+
+def test_journal_burst_enqueues_one_analysis(client, monkeypatch):
+    client_app, session_local = client
+    shared = FakeRedis()
+    scheduled = []
+    monkeypatch.setattr(tasks, "get_redis", lambda: shared)
+    monkeypatch.setattr(tasks, "SessionLocal", session_local)
+    monkeypatch.setattr(
+        tasks.analyze_profile_task, "apply_async", lambda args, countdown: scheduled.append((args, countdown))
+    )
+
+    for i in range(3):
+        resp = client_app.post("/api/v1/journals/", json={"title": f"t{i}", "content": "isi", "mood": "sad"})
+        assert resp.status_code == 200
+
+    assert scheduled == [([1], settings.PROFILE_ANALYSIS_DEBOUNCE_SECONDS)]
+
+    # Task mulai: tulisan berikutnya menjadwalkan satu run baru
+    tasks.analyze_profile_task(1)
+    client_app.post("/api/v1/journals/", json={"title": "t", "content": "isi", "mood": "happy"})
+    assert len(scheduled) == 2
+
+
+def test_enqueue_is_skipped_without_redis(monkeypatch):
+    monkeypatch.setattr(tasks, "get_redis", lambda: None)
+    monkeypatch.setattr(
+        tasks.analyze_profile_task, "apply_async", lambda *a, **kw: pytest.fail("must not enqueue")
+    )
+
+    assert tasks.enqueue_profile_analysis(1) is False
+
+
+@pytest.mark.parametrize(
+    "task_name, queue",
+    [
+        ("app.tasks.analyze_profile_task", "analysis"),
+        ("app.tasks.analyze_profiles_chunk_task", "analysis"),
+        ("app.tasks.schedule_profile_analysis", "analysis"),
+        ("app.tasks.score_journal_sentiment_task", "analysis"),
+        ("app.tasks.something_else", "default"),
+    ],
+)
+def test_tasks_are_routed_to_their_queue(task_name, queue):
+    route = celery_app.amqp.router.route({}, task_name)
+    assert route["queue"].name == queue
+
+
+def test_enqueue_survives_broker_and_redis_failures(monkeypatch):
+    class BrokenDeleteRedis(FakeRedis):
+        def delete(self, key):
+            raise redis.ConnectionError("down")
+
+    def broker_down(*args, **kwargs):
+        raise ConnectionError("broker down")
+
+    monkeypatch.setattr(tasks, "get_redis", lambda: BrokenDeleteRedis())
+    monkeypatch.setattr(tasks.analyze_profile_task, "apply_async", broker_down)
+
+    assert tasks.enqueue_profile_analysis(1) is False
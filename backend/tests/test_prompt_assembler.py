@@ -0,0 +1,131 @@
+from app.core.config import Settings, settings
+from app.models.conversation_summary import ConversationSummary
+from app.schemas.chat_context import ChatContextMessage
+from app.schemas.plan import CommunicationTechnique, ConversationPlan
+from app.services.generator_service import GeneratorService
+from app.services.planner_service import PlannerService
+from app.services.prompt_assembler import PromptAssembler, count_tokens
+
+
+def _messages(n, content="pesan"):
+    return [
+        ChatContextMessage(id=i, role="user" if i % 2 else "ai", content=f"{content} {i}")
+        for i in range(1, n + 1)
+    ]
+
+
+def test_fit_history_respects_message_limit_and_budget():
+    assembler = PromptAssembler(settings=Settings(PROMPT_HISTORY_MAX_MESSAGES=3))
+    kept, dropped = assembler.fit_history(_messages(6), max_tokens=1000)
+    assert [m.id for m in kept] == [4, 5, 6]
+    assert [m.id for m in dropped] == [1, 2, 3]
+
+    long = _messages(4, content="x" * 400)
+    kept, dropped = assembler.fit_history(long, max_tokens=250)
+    assert [m.id for m in kept] == [3, 4]
+    assert [m.id for m in dropped] == [1, 2]
+
+
+def test_fit_history_deduplicates_and_truncates_latest():
+    assembler = PromptAssembler(settings=Settings())
+    repeated = [
+        ChatContextMessage(id=1, role="user", content="halo"),
+        ChatContextMessage(id=2, role="user", content="halo"),
+    ]
+    kept, dropped = assembler.fit_history(repeated, max_tokens=100)
+    assert len(kept) == 1 and dropped == []
+
+    huge = [ChatContextMessage(id=1, role="user", content="kata " * 1000)]
+    kept, _ = assembler.fit_history(huge, max_tokens=50)
+    assert count_tokens(kept[0].content) <= 50
+
+
+def test_summary_stays_within_budget():
+    assembler = PromptAssembler(settings=Settings(PROMPT_SUMMARY_MAX_TOKENS=60))
+    summary = ""
+    for batch in range(10):
+        summary = assembler.update_summary(summary, _messages(4, content=f"cerita {batch}. detail"))
+    assert count_tokens(summary) <= 60
+    assert "cerita 9" in summary
+    assert "detail" not in summary
+
+
+def test_format_history_maps_roles_and_prepends_summary():
+    assembler = PromptAssembler(settings=Settings())
+    history = assembler.format_history(_messages(2), summary="- Pengguna: sedih")
+    assert history[0]["role"] == "system"
+    assert "sedih" in history[0]["content"]
+    assert [m["role"] for m in history[1:]] == ["user", "assistant"]
+
+
+def test_chat_folds_old_turns_into_persisted_summary(client, monkeypatch):
+    client_app, session_local = client
+    monkeypatch.setattr(settings, "PROMPT_HISTORY_MAX_MESSAGES", 2)
+    seen = []
+
+    class DummyPlanner:
+        async def get_plan(self, *args, **kwargs):
+            return ConversationPlan(technique=CommunicationTechnique.REFLECTION)
+
+    class DummyGenerator:
+        async def generate_response(self, plan, history, emotion):
+            seen.append(history)
+            return "oke"
+
+    from app.main import app
+    app.dependency_overrides[PlannerService] = lambda: DummyPlanner()
+    app.dependency_overrides[GeneratorService] = lambda: DummyGenerator()
+    try:
+        for text in ["pertama", "kedua", "ketiga"]:
+            assert client_app.post("/api/v1/chat/", json={"message": text}).status_code == 200
+    finally:
+        app.dependency_overrides.pop(PlannerService, None)
+        app.dependency_overrides.pop(GeneratorService, None)
+
+    last = seen[-1]
+    assert last[0]["role"] == "system"
+    assert "pertama" in last[0]["content"]
+    assert [m["content"] for m in last[1:]] == ["oke", "ketiga"]
+
+    db = session_local()
+    try:
+        row = db.query(ConversationSummary).filter_by(user_id=1).one()
+        assert "pertama" in row.summary and "kedua" in row.summary
+        assert row.last_message_id == 3
+    finally:
+        db.close()
+
+
+def test_summary_upsert_is_a_single_conflict_safe_insert(temp_async_session):
+    import asyncio
+
+    from sqlalchemy import event, select
+
+    from app import crud
+
+    statements = []
+    engine = temp_async_session.kw["bind"].sync_engine
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    async def scenario():
+        # Dua giliran "pertama" dari session berbeda untuk pengguna yang sama
+        for summary, last_id in (("satu", 2), ("dua", 4)):
+            async with temp_async_session() as db:
+                await crud.conversation_summary.upsert_async(
+                    db, user_id=1, summary=summary, last_message_id=last_id
+                )
+        async with temp_async_session() as db:
+            return (await db.execute(select(ConversationSummary))).scalars().all()
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        rows = asyncio.run(scenario())
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert [(r.summary, r.last_message_id) for r in rows] == [("dua", 4)]
+    writes = [s for s in statements if s.startswith(("INSERT", "UPDATE"))]
+    assert len(writes) == 2
+    assert all("ON CONFLICT" in s for s in writes)
@@ -0,0 +1,163 @@
+"""
+Regresi query plan: query riwayat yang sering dipanggil harus memakai indeks
+(owner_id, created_at) / user_id, bukan scan tabel + sort, pada dataset besar.
+"""
+
+import datetime
+
+import pytest
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud
+from app.core.cache import TieredCache
+from app.crud.base import encode_cursor
+from app.db.base_class import Base
+from app.models.chat import ChatMessage, SenderType
+from app.models.journal import Journal
+from app.models.user import User
+from app.models.user_profile import UserProfile
+from app.services.chat_context_service import ChatContextCache
+
+USERS = 50
+ROWS_PER_USER = 400
+
+
+@pytest.fixture(scope="module")
+def seeded_db(tmp_path_factory):
+    db_path = tmp_path_factory.mktemp("plans") / "plans.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+
+    start = datetime.datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": u, "username": f"u{u}", "email": f"u{u}@example.com", "hashed_password": "x"}
+            for u in range(1, USERS + 1)
+        ])
+        conn.execute(insert(UserProfile), [
+            {"user_id": u, "emerging_themes": {}, "sentiment_trend": "stabil"}
+            for u in range(1, USERS + 1)
+        ])
+        conn.execute(insert(Journal), [
+            {
+                "owner_id": u,
+                "title": f"j{i}",
+                "content": "isi jurnal",
+                "mood": "netral",
+                "created_at": start + datetime.timedelta(minutes=i * USERS + u),
+            }
+            for u in range(1, USERS + 1)
+            for i in range(ROWS_PER_USER)
+        ])
+        conn.execute(insert(ChatMessage), [
+            {
+                "owner_id": u,
+                "content": "halo",
+                "sender_type": SenderType.USER,
+                "created_at": start + datetime.timedelta(minutes=i * USERS + u),
+            }
+            for u in range(1, USERS + 1)
+            for i in range(ROWS_PER_USER)
+        ])
+        conn.execute(text("ANALYZE"))
+
+    yield engine, db_path
+    engine.dispose()
+
+
+def _capture(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    return statements, lambda: event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _plan(engine, statement, parameters) -> str:
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return "\n".join(row[-1] for row in rows)
+
+
+def _assert_indexed(plan: str, table: str, index: str):
+    assert f"USING INDEX {index}" in plan or f"USING COVERING INDEX {index}" in plan, plan
+    assert f"SCAN {table}" not in plan, plan
+    assert "TEMP B-TREE" not in plan, plan
+
+
+@pytest.mark.parametrize(
+    "call, table, index",
+    [
+        (
+            lambda db: crud.journal.get_multi_by_owner(db, owner_id=7, limit=20, order_by="created_at desc"),
+            "journals",
+            "ix_journals_owner_id_created_at",
+        ),
+        (
+            lambda db: crud.chat_message.get_multi_by_owner(db, owner_id=7, limit=20),
+            "chat_messages",
+            "ix_chat_messages_owner_id_created_at",
+        ),
+        (
+            lambda db: crud.journal.get_page_by_owner(
+                db, owner_id=7, limit=20, cursor=encode_cursor(datetime.datetime(2024, 1, 10), 9000)
+            )[0],
+            "journals",
+            "ix_journals_owner_id_created_at",
+        ),
+        (
+            lambda db: crud.chat_message.get_page_by_owner(
+                db, owner_id=7, limit=20, cursor=encode_cursor(datetime.datetime(2024, 1, 10), 9000)
+            )[0],
+            "chat_messages",
+            "ix_chat_messages_owner_id_created_at",
+        ),
+        (
+            lambda db: crud.user_profile.get_by_user_id(db, user_id=7),
+            "user_profiles",
+            "ix_user_profiles_user_id",
+        ),
+    ],
+)
+def test_crud_history_queries_use_indexes(seeded_db, call, table, index):
+    engine, _ = seeded_db
+    statements, stop = _capture(engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        assert call(db)
+    finally:
+        db.close()
+        stop()
+
+    (statement, parameters), = [s for s in statements if s[0].lstrip().upper().startswith("SELECT")]
+    _assert_indexed(_plan(engine, statement, parameters), table, index)
+
+
+@pytest.mark.asyncio
+async def test_chat_context_snapshot_queries_use_indexes(seeded_db):
+    engine, db_path = seeded_db
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    statements, stop = _capture(async_engine.sync_engine)
+    loader = ChatContextCache(TieredCache("plans-test", redis_client_factory=lambda: None), window=20)
+    try:
+        async with AsyncSession(async_engine) as db:
+            snapshot = await loader._load_async(db, 7)
+    finally:
+        stop()
+        await async_engine.dispose()
+
+    assert len(snapshot.messages) == 20
+    plans = {
+        statement: _plan(engine, statement, parameters)
+        for statement, parameters in statements
+    }
+    journal_plan, = [p for s, p in plans.items() if "FROM journals" in s]
+    chat_plan, = [p for s, p in plans.items() if "FROM chat_messages" in s]
+    profile_plan, = [p for s, p in plans.items() if "FROM user_profiles" in s]
+    _assert_indexed(journal_plan, "journals", "ix_journals_owner_id_created_at")
+    _assert_indexed(chat_plan, "chat_messages", "ix_chat_messages_owner_id_created_at")
+    _assert_indexed(profile_plan, "user_profiles", "ix_user_profiles_user_id")
@@ -0,0 +1,88 @@
+import pytest
+
+from app import crud, dependencies, schemas
+from app.core.config import settings
+from app.db import replica
+from app.db.unit_of_work import UNIT_OF_WORK
+
+
+@pytest.fixture
+def replica_on(monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_REPLICA_URL", "postgresql://replica/dear")
+    replica.last_write_cache.clear_local()
+    yield
+    replica.last_write_cache.clear_local()
+
+
+class _User:
+    def __init__(self, id):
+        self.id = id
+
+
+class _FakeSession:
+    def __init__(self, name):
+        self.name = name
+
+    def close(self):
+        pass
+
+
+def test_commit_records_write_for_owner(replica_on, temp_session):
+    db = temp_session()
+    try:
+        crud.journal.create_with_owner(
+            db, obj_in=schemas.JournalCreate(title="t", content="isi", mood="m"), owner_id=3
+        )
+    finally:
+        db.close()
+
+    assert replica.recently_wrote(3)
+    assert not replica.recently_wrote(4)
+
+
+def test_rolled_back_write_is_not_recorded(replica_on, temp_session):
+    db = temp_session()
+    try:
+        crud.journal.create_with_owner(
+            db, obj_in=schemas.JournalCreate(title="t", content="isi", mood="m"), owner_id=3
+        )
+        db.info[UNIT_OF_WORK] = True
+        crud.journal.create_with_owner(
+            db, obj_in=schemas.JournalCreate(title="t", content="isi", mood="m"), owner_id=5
+        )
+        db.rollback()
+    finally:
+        db.close()
+
+    assert replica.recently_wrote(3)
+    assert not replica.recently_wrote(5)
+
+
+def test_user_reads_route_to_replica_until_own_write(replica_on, monkeypatch):
+    monkeypatch.setattr(dependencies, "SessionLocal", lambda: _FakeSession("primary"))
+    monkeypatch.setattr(dependencies, "ReadSessionLocal", lambda: _FakeSession("replica"))
+
+    def session_for(user):
+        gen = dependencies.get_user_read_db(current_user=user)
+        name = next(gen).name
+        gen.close()
+        return name
+
+    assert session_for(_User(7)) == "replica"
+    replica.record_write(7)
+    assert session_for(_User(7)) == "primary"
+    assert session_for(_User(8)) == "replica"
+
+
+def test_without_replica_nothing_is_recorded(temp_session, monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_REPLICA_URL", None)
+    replica.last_write_cache.clear_local()
+    db = temp_session()
+    try:
+        crud.journal.create_with_owner(
+            db, obj_in=schemas.JournalCreate(title="t", content="isi", mood="m"), owner_id=3
+        )
+    finally:
+        db.close()
+
+    assert not replica.recently_wrote(3)
@@ -0,0 +1,88 @@
+import pytest
+
+from app import crud, schemas, tasks
+from app.models.journal import Journal
+from app.services.sentiment_service import SentimentService, sentiment_service
+
+
+def test_scores_english_and_indonesian():
+    results = sentiment_service.score_many([
+        "I am happy and grateful today",
+        "Hari ini aku sedih dan kecewa",
+        "Aku senang, tapi juga sedikit cemas",
+        "Saya makan nasi goreng",
+        None,
+    ])
+    assert results[0] == (1.0, "positive")
+    assert results[1] == (-1.0, "negative")
+    assert results[2] == (0.0, "neutral")
+    assert results[3] == (0.0, "neutral")
+    assert results[4] == (0.0, "neutral")
+
+
+def test_negation_flips_polarity():
+    assert sentiment_service.score("Aku tidak bahagia")[1] == "negative"
+    assert sentiment_service.score("I'm not sad anymore")[1] == "positive"
+    # Kosakata EmotionService tetap berlaku
+    assert SentimentService().score("what a wonderful day")[1] == "positive"
+
+
+def _add(db, content, owner_id=1):
+    return crud.journal.create_with_owner(
+        db, obj_in=schemas.JournalCreate(title="t", content=content, mood="ok"), owner_id=owner_id
+    ).id
+
+
+@pytest.fixture
+def scoring_db(temp_session, monkeypatch):
+    monkeypatch.setattr(tasks, "SessionLocal", temp_session)
+    return temp_session
+
+
+def test_task_scores_unscored_journals_in_batches(scoring_db, monkeypatch):
+    db = scoring_db()
+    try:
+        ids = [_add(db, text) for text in ("senang sekali", "sedih", "biasa saja")]
+        ids += [_add(db, "lelah") for _ in range(4)]
+    finally:
+        db.close()
+    monkeypatch.setattr(tasks.settings, "SENTIMENT_BATCH_SIZE", 2)
+    monkeypatch.setattr(tasks.settings, "SENTIMENT_MAX_BATCHES", 2)
+
+    assert tasks.score_journal_sentiment_task() == 4
+    assert tasks.score_journal_sentiment_task() == 3
+    assert tasks.score_journal_sentiment_task() == 0
+
+    db = scoring_db()
+    try:
+        rows = {j.id: (j.sentiment_score, j.sentiment_label) for j in db.query(Journal)}
+    finally:
+        db.close()
+    assert rows[ids[0]] == (1.0, "positive")
+    assert rows[ids[1]] == (-1.0, "negative")
+    assert rows[ids[2]] == (0.0, "neutral")
+
+
+def test_backfill_streams_and_resumes(scoring_db):
+    db = scoring_db()
+    try:
+        ids = [_add(db, "bahagia") for _ in range(5)]
+        # Sudah diskor (mis. run sebelumnya yang terputus): dilewati
+        crud.journal.update_sentiments(
+            db, [{"id": ids[0], "sentiment_score": 0.5, "sentiment_label": "positive"}]
+        )
+        db.commit()
+
+        checkpoints = list(sentiment_service.backfill(db, batch_size=2, commit_every=3))
+        assert checkpoints == [(ids[3], 3), (ids[4], 1)]
+        assert db.get(Journal, ids[0]).sentiment_score == 0.5
+        assert list(sentiment_service.backfill(db, batch_size=2, commit_every=3)) == []
+
+        # Rescore dilanjutkan dari checkpoint
+        rescored = list(sentiment_service.backfill(db, batch_size=2, commit_every=10, after_id=ids[1], rescore=True))
+        assert rescored == [(ids[4], 3)]
+        assert list(sentiment_service.backfill(db, rescore=True)) == [(ids[4], 5)]
+        db.expire_all()
+        assert db.get(Journal, ids[0]).sentiment_score == 1.0
+    finally:
+        db.close()
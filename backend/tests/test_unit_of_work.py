@@ -0,0 +1,102 @@
+import pytest
+from sqlalchemy import event
+
+from app import dependencies
+from app.main import app
+from app.models.chat import ChatMessage
+from app.models.journal import Journal
+from app.models.user_profile import UserProfile
+from app.schemas.plan import CommunicationTechnique, ConversationPlan
+from app.services.generator_service import GeneratorService
+from app.services.planner_service import PlannerService
+
+
+@pytest.fixture
+def uow_client(client, temp_session, temp_async_session, monkeypatch):
+    """Pakai get_db/get_async_db asli (unit-of-work) di atas database test."""
+    monkeypatch.setattr(dependencies, "SessionLocal", temp_session)
+    monkeypatch.setattr(dependencies, "AsyncSessionLocal", temp_async_session)
+    app.dependency_overrides.pop(dependencies.get_db, None)
+    app.dependency_overrides.pop(dependencies.get_async_db, None)
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0].upper())
+
+    def record_commit(conn):
+        statements.append("COMMIT")
+
+    engines = [temp_session.kw["bind"], temp_async_session.kw["bind"].sync_engine]
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+        event.listen(engine, "commit", record_commit)
+    yield client[0], statements
+    for engine in engines:
+        event.remove(engine, "before_cursor_execute", record)
+        event.remove(engine, "commit", record_commit)
+
+
+def test_journal_create_commits_once_without_refresh(uow_client, temp_session):
+    client_app, statements = uow_client
+    db = temp_session()
+    try:
+        db.add(UserProfile(user_id=1, mood_counts={}))
+        db.commit()
+    finally:
+        db.close()
+    statements.clear()
+
+    resp = client_app.post("/api/v1/journals/", json={"title": "t", "content": "isi", "mood": "m"})
+
+    assert resp.status_code == 200
+    assert resp.json()["id"]
+    # Insert jurnal + kunci dan update agregat profil, tanpa SELECT refresh
+    assert statements == ["INSERT", "SELECT", "UPDATE", "COMMIT"]
+    db = temp_session()
+    try:
+        assert db.query(Journal).count() == 1
+    finally:
+        db.close()
+
+
+def test_chat_turn_releases_connection_before_llm(uow_client, temp_session):
+    client_app, statements = uow_client
+
+    class DummyPlanner:
+        async def get_plan(self, user_message, chat_history, latest_journal, user_profile, emotion_label):
+            return ConversationPlan(technique=CommunicationTechnique.PROBING)
+
+    class DummyGenerator:
+        async def generate_response(self, plan, history, emotion):
+            statements.append("LLM")
+            return "ceritakan lagi"
+
+    app.dependency_overrides[PlannerService] = lambda: DummyPlanner()
+    app.dependency_overrides[GeneratorService] = lambda: DummyGenerator()
+    try:
+        # Giliran pertama memuat snapshot dari DB; giliran kedua sudah dari cache
+        client_app.post("/api/v1/chat/", json={"message": "halo"})
+        statements.clear()
+        resp = client_app.post("/api/v1/chat/", json={"message": "aku capek"})
+    finally:
+        app.dependency_overrides.pop(PlannerService, None)
+        app.dependency_overrides.pop(GeneratorService, None)
+
+    assert resp.status_code == 200
+    # Pesan pengguna di-commit sebelum menunggu LLM, pesan AI saat respons dikirim
+    assert statements == ["INSERT", "COMMIT", "LLM", "INSERT", "COMMIT"]
+    db = temp_session()
+    try:
+        assert db.query(ChatMessage).count() == 4
+    finally:
+        db.close()
+
+
+def test_failed_request_rolls_back(uow_client, temp_session):
+    client_app, statements = uow_client
+
+    resp = client_app.delete("/api/v1/chat/999")
+
+    assert resp.status_code == 404
+    assert "COMMIT" not in statements